@@ -1,5 +1,6 @@
+from functools import lru_cache
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -12,9 +13,92 @@ class Settings(BaseSettings):
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str = "HS256"
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    JWT_AUDIENCE: str = "authenticated"
+    
+    # Auth verification
+    AUTH_VERIFY_MODE: str = "local"  # 'local' (verify JWT signature) or 'remote' (call Supabase Auth)
+    AUTH_REMOTE_FALLBACK: bool = True  # Ask Supabase Auth when local verification rejects a token
+    AUTH_CACHE_TTL_SECONDS: int = 300
+    AUTH_CACHE_MAX_SIZE: int = 10000
+    AUTH_JWKS_TTL_SECONDS: int = 3600
+    AUTH_JWKS_RETRY_SECONDS: int = 30  # Wait this long after a failed JWKS fetch before trying again
+    JWT_ASYMMETRIC_ALGORITHMS: str = "RS256,ES256"  # Accepted for tokens signed with the JWKS keys
+    
+    # Database
+    DB_MAX_WORKERS: int = 32  # Threads available for concurrent blocking Supabase calls
+    
+    # Outbound HTTP: one pooled client per upstream (Supabase, OpenAI), see app/transport.py
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 32  # Keep >= DB_MAX_WORKERS so HTTP/1.1 fallbacks don't reconnect
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    HTTP_TIMEOUT_SECONDS: float = 30.0  # Default for Supabase calls (OpenAI uses LLM_TIMEOUT_SECONDS)
+    HTTP2_ENABLED: bool = True  # Multiplex requests over fewer connections (needs httpx[http2])
     
     # OpenAI
     OPENAI_API_KEY: str
+    OPENAI_BASE_URL: Optional[str] = None  # OpenAI-compatible endpoint (defaults to api.openai.com)
+    LLM_MAX_CONCURRENCY: int = 8  # Outstanding completions allowed per worker
+    LLM_MAX_CONNECTIONS: int = 20
+    LLM_TIMEOUT_SECONDS: float = 60.0
+    LLM_MAX_RETRIES: int = 3
+    LLM_RETRY_BASE_DELAY_SECONDS: float = 1.0
+    LLM_RETRY_MAX_DELAY_SECONDS: float = 20.0
+    CV_PROMPT_MAX_TOKENS: int = 6000  # Budget for the CV text in the parse prompt (after compaction)
+    
+    # CV parse cache
+    CV_PARSE_CACHE_BACKEND: str = "memory"  # 'memory', 'disk' or 'postgres' (memory is always the first tier)
+    CV_PARSE_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    CV_PARSE_CACHE_MAX_ENTRIES: int = 1000
+    CV_PARSE_CACHE_DIR: str = ".cache/cv_parse"
+    
+    # Persona read cache
+    PERSONA_CACHE_BACKEND: str = "none"  # 'none', 'memory' (single worker only) or 'redis' (memory is then the first tier)
+    PERSONA_CACHE_TTL_SECONDS: int = 60  # 0 disables caching
+    PERSONA_CACHE_MAX_ENTRIES: int = 10000
+    PERSONA_CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+
+    # Job matching
+    JOB_INDEX_TTL_SECONDS: int = 900  # Rebuild the in-memory job index this often (drops deleted jobs)
+    JOB_INDEX_SYNC_SECONDS: int = 60  # Apply new/changed jobs to the index this often in between
+    JOB_INDEX_CANDIDATES: int = 2000  # Jobs pulled from the inverted index and fully scored per request
+    JOB_INDEX_PAGE_SIZE: int = 1000  # Rows per request when loading jobs (PostgREST max-rows)
+
+    # Semantic matching (runs offline)
+    SEMANTIC_INDEX_DIR: str = ".cache/semantic_index"
+    SEMANTIC_INDEX_TTL_SECONDS: int = 86400  # Rebuild the persisted index in the background once this old
+    SEMANTIC_MODEL: str = ""  # Local sentence-transformers model name/path; empty uses hashed TF-IDF
+    SEMANTIC_HASH_DIM: int = 1024  # Vector size for the hashed TF-IDF embedder
+    SEMANTIC_NPROBE: int = 8  # IVF lists scanned per query (higher is more exact but slower)
+
+    # Batched applications
+    APPLICATION_BATCH_MAX_JOBS: int = 50
+    APPLICATION_LETTER_CONCURRENCY: int = 5  # Cover letters in flight per batch (LLM_MAX_CONCURRENCY caps the total)
+    APPLICATION_UPDATE_BATCH_SIZE: int = 10  # Finished letters saved per write
+    APPLICATION_FLUSH_SECONDS: float = 2.0  # Longest a finished letter waits for its batch to fill
+    APPLICATION_STALE_AFTER_SECONDS: int = 1800  # At startup, mark rows left 'processing' this long as 'pending'
+
+    # Uploads
+    MAX_CV_UPLOAD_BYTES: int = 5 * 1024 * 1024
+    UPLOAD_BODY_OVERHEAD_BYTES: int = 64 * 1024  # Allowance for multipart boundaries and headers
+    BULK_IMPORT_MAX_FILES: int = 50
+    BULK_IMPORT_MAX_BYTES: int = 50 * 1024 * 1024
+    BULK_IMPORT_CONCURRENCY: int = 4  # CVs of one import extracted and parsed at a time
+    
+    # Document extraction
+    EXTRACT_MAX_WORKERS: int = 2  # Processes parsing PDF/DOCX files
+    EXTRACT_TIMEOUT_SECONDS: float = 20.0
+    EXTRACT_MAX_PAGES: int = 50
+    EXTRACT_MEMORY_LIMIT_MB: int = 512  # Per extraction process
+    
+    # Background CV upload jobs
+    CV_JOB_BACKEND: str = "memory"  # 'memory' (in-process queue) or 'postgres' (cv_upload_jobs table)
+    CV_JOB_WORKERS: int = 4
+    CV_JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    CV_JOB_STALE_AFTER_SECONDS: int = 600  # Re-claim jobs whose worker stopped reporting progress
+    CV_JOB_MAX_ATTEMPTS: int = 3  # Fail a job once it has been claimed this many times without finishing
+    CV_JOB_QUEUE_MAX_SIZE: int = 100  # Uploads the memory backend holds before rejecting new ones (503)
+    CV_JOB_RETENTION_SECONDS: int = 24 * 3600
+    CV_JOB_MAX_TRACKED: int = 10000
     
     # API
     API_V1_PREFIX: str = "/api"
@@ -25,15 +109,41 @@ class Settings(BaseSettings):
     # Server
     HOST: str = "0.0.0.0"
     PORT: int = 8000
+    WARMUP_ON_STARTUP: bool = False  # Load lazily imported clients/libraries before serving instead of on first use
     
     @property
     def origins_list(self) -> List[str]:
         """Convert comma-separated origins to list"""
         return [origin.strip() for origin in self.ALLOWED_ORIGINS.split(",")]
+
+    @property
+    def jwt_asymmetric_algorithms(self) -> List[str]:
+        return [algorithm.strip() for algorithm in self.JWT_ASYMMETRIC_ALGORITHMS.split(",") if algorithm.strip()]
     
     class Config:
         env_file = ".env"
         case_sensitive = True
 
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """The validated settings, read from the environment/.env on first call"""
+    return Settings()
+
+
+class _LazySettings:
+    """
+    Stands in for the Settings instance until an attribute is first read,
+    so modules that merely import settings (such as the document
+    extraction workers) don't validate the environment at import.
+    """
+
+    def __getattr__(self, name):
+        # Only called for names not found normally: copy the fields over on
+        # first use so later reads are plain attribute lookups
+        loaded = get_settings()
+        self.__dict__.update(loaded.__dict__)
+        return getattr(loaded, name)
+
+
+settings = _LazySettings()
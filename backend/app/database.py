@@ -1,12 +1,26 @@
-from supabase import create_client, Client
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from supabase import create_client, Client, ClientOptions
 from app.config import settings
+from app.metrics import backend_call_seconds, timed
+from app.transport import transports
 
 
 class SupabaseClient:
-    """Supabase database client singleton"""
+    """
+    Supabase database client singleton. Each client has its own httpx
+    client (supabase-py sets the API key headers on it), and both send
+    their requests through the shared pooled "supabase" transport.
+    """
     
     _client: Client = None
     _service_client: Client = None
+    _executor: ThreadPoolExecutor = None
+    
+    @staticmethod
+    def _options(identity: str) -> ClientOptions:
+        return ClientOptions(httpx_client=transports.sync_client("supabase", identity=identity))
     
     @classmethod
     def get_client(cls) -> Client:
@@ -14,7 +28,8 @@ class SupabaseClient:
         if cls._client is None:
             cls._client = create_client(
                 settings.SUPABASE_URL,
-                settings.SUPABASE_ANON_KEY
+                settings.SUPABASE_ANON_KEY,
+                options=cls._options("anon")
             )
         return cls._client
     
@@ -24,9 +39,45 @@ class SupabaseClient:
         if cls._service_client is None:
             cls._service_client = create_client(
                 settings.SUPABASE_URL,
-                settings.SUPABASE_SERVICE_KEY
+                settings.SUPABASE_SERVICE_KEY,
+                options=cls._options("service")
             )
         return cls._service_client
+    
+    @classmethod
+    def reset(cls):
+        """Drop the clients (their transport is closed on shutdown)"""
+        cls._client = None
+        cls._service_client = None
+    
+    @classmethod
+    def get_executor(cls) -> ThreadPoolExecutor:
+        """Bounded thread pool that blocking supabase-py calls are offloaded to"""
+        if cls._executor is None:
+            cls._executor = ThreadPoolExecutor(
+                max_workers=settings.DB_MAX_WORKERS,
+                thread_name_prefix="supabase"
+            )
+        return cls._executor
+
+
+def _call_labels(func) -> dict:
+    """service (postgrest, storage3, ...) and method name of a supabase-py call"""
+    owner = getattr(func, "__self__", None)
+    module = type(owner).__module__ if owner is not None else getattr(func, "__module__", None)
+    return {"service": (module or "unknown").split(".")[0], "call": getattr(func, "__name__", "call")}
+
+
+async def run_sync(func, *args, **kwargs):
+    """
+    Run a blocking supabase-py call without stalling the event loop
+    """
+    loop = asyncio.get_running_loop()
+    with timed(backend_call_seconds, **_call_labels(func)):
+        return await loop.run_in_executor(
+            SupabaseClient.get_executor(),
+            functools.partial(func, *args, **kwargs)
+        )
 
 
 # Dependency for route handlers
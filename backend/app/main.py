@@ -1,7 +1,59 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
+from app.database import SupabaseClient
+from app.metrics import registry
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.upload_limit import UploadSizeLimitMiddleware
 from app.routers import auth, personas
+from app.services.applications import application_batches
+from app.services.compaction import compaction_stats, count_tokens
+from app.services.extraction import document_extractor
+from app.services.llm import llm_client
+from app.services.persona_cache import persona_cache
+from app.services.semantic import semantic_matcher
+from app.services.upload_jobs import upload_jobs
+from app.transport import transports
+
+
+async def warm_up():
+    """
+    Pay for everything that is otherwise loaded on first use (the OpenAI
+    client, Supabase clients, tokenizer and extraction workers) before the
+    first request arrives
+    """
+    start = time.perf_counter()
+
+    def load_clients():
+        llm_client.client
+        SupabaseClient.get_client()
+        SupabaseClient.get_service_client()
+        count_tokens("warm up")
+
+    await asyncio.gather(asyncio.to_thread(load_clients), document_extractor.warm_up())
+    print(f"Warm-up finished in {time.perf_counter() - start:.2f}s")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background workers on startup and stop them on shutdown"""
+    if settings.WARMUP_ON_STARTUP:
+        await warm_up()
+    upload_jobs.start()
+    application_batches.start()
+    semantic_matcher.load()
+    yield
+    await upload_jobs.stop()
+    await application_batches.stop()
+    document_extractor.shutdown()
+    # Last, once nothing is using the pooled connections
+    llm_client.reset()
+    SupabaseClient.reset()
+    await transports.aclose()
 
 
 # Create FastAPI app
@@ -10,7 +62,8 @@ app = FastAPI(
     version="1.0.0",
     description="AI-powered job application platform API",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -20,8 +73,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
+)
+
+# Refuse oversized CV uploads before they are buffered
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_body_size=settings.MAX_CV_UPLOAD_BYTES + settings.UPLOAD_BODY_OVERHEAD_BYTES,
+    path_prefixes=(f"{settings.API_V1_PREFIX}/personas/upload-cv", f"{settings.API_V1_PREFIX}/personas/parse-cv")
+)
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_body_size=settings.BULK_IMPORT_MAX_BYTES + settings.UPLOAD_BODY_OVERHEAD_BYTES,
+    path_prefixes=(f"{settings.API_V1_PREFIX}/personas/bulk-import",)
 )
 
+# Outermost, so rejected uploads and CORS preflights are timed too
+app.add_middleware(MetricsMiddleware, exclude_paths=("/metrics",))
+
 # Include routers
 app.include_router(auth.router, prefix=settings.API_V1_PREFIX)
 app.include_router(personas.router, prefix=settings.API_V1_PREFIX)
@@ -42,10 +111,20 @@ async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "service": "astra-apply-api"
+        "service": "astra-apply-api",
+        "llm": llm_client.stats(),
+        "http": transports.stats(),
+        "persona_cache": persona_cache.stats(),
+        "cv_prompt_compaction": compaction_stats.stats()
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: request, CV pipeline stage, LLM and Supabase call latencies and LLM tokens"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -1,19 +1,144 @@
+import asyncio
+import hashlib
+import time
+from functools import lru_cache
+import httpx
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import JWTError, jwt
+from jose import ExpiredSignatureError, JWTError, jwt
+from jose.exceptions import JOSEError
+from app.cache import TTLCache
 from app.config import settings
-from app.database import get_supabase
-from app.schemas.auth import TokenData
+from app.database import get_supabase, run_sync
+from app.schemas.auth import AuthenticatedUser
+from app.transport import transports
 from supabase import Client
 
 
 security = HTTPBearer()
 
+_jwks_lock = asyncio.Lock()
+
+
+# The caches are built on first use, so importing this module doesn't
+# validate the settings
+
+@lru_cache
+def _user_cache() -> TTLCache:
+    """Verified identities keyed by SHA-256 of the access token"""
+    return TTLCache(max_size=settings.AUTH_CACHE_MAX_SIZE, ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS)
+
+
+@lru_cache
+def _jwks_cache() -> TTLCache:
+    """Signing keys published by Supabase Auth for asymmetric (RS/ES) tokens"""
+    return TTLCache(max_size=1, ttl_seconds=settings.AUTH_JWKS_TTL_SECONDS)
+
+
+@lru_cache
+def _jwks_failures() -> TTLCache:
+    """A recent failed JWKS fetch, so tokens can't force a fetch on every request"""
+    return TTLCache(max_size=1, ttl_seconds=settings.AUTH_JWKS_RETRY_SECONDS)
+
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+async def _get_jwks() -> dict:
+    """
+    Fetch (and cache) the JWKS used to sign asymmetric Supabase tokens.
+    One request fetches at a time, and after a failure none is attempted
+    for AUTH_JWKS_RETRY_SECONDS.
+    """
+    jwks = _jwks_cache().get("jwks")
+    if jwks is not None:
+        return jwks
+
+    async with _jwks_lock:
+        jwks = _jwks_cache().get("jwks")
+        if jwks is not None:
+            return jwks
+        if _jwks_failures().get("jwks") is not None:
+            raise JWTError("JWKS unavailable (recent fetch failed)")
+
+        url = f"{settings.SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json"
+        try:
+            response = await transports.async_client("supabase").get(url, timeout=5.0)
+            response.raise_for_status()
+            jwks = response.json()
+        except Exception:
+            _jwks_failures().set("jwks", True)
+            raise
+        _jwks_cache().set("jwks", jwks)
+        return jwks
+
+
+def _seconds_until_expiry(token: str):
+    """Remaining lifetime from the (unverified) exp claim, if present"""
+    try:
+        return jwt.get_unverified_claims(token)["exp"] - time.time()
+    except Exception:
+        return None
+
+
+async def _verify_local(token: str) -> tuple:
+    """
+    Verify signature, expiry and audience without contacting Supabase Auth.
+    Returns the identity and the number of seconds until the token expires.
+    """
+    header = jwt.get_unverified_header(token)
+    algorithm = header.get("alg") or settings.JWT_ALGORITHM
+
+    # The header only picks the key type; accepted algorithms are fixed
+    if algorithm.startswith("HS"):
+        key = settings.JWT_SECRET_KEY
+        algorithms = [settings.JWT_ALGORITHM]
+    elif algorithm in settings.jwt_asymmetric_algorithms:
+        key = await _get_jwks()
+        algorithms = settings.jwt_asymmetric_algorithms
+    else:
+        raise JWTError(f"Algorithm {algorithm!r} is not allowed")
+
+    claims = jwt.decode(
+        token,
+        key,
+        algorithms=algorithms,
+        audience=settings.JWT_AUDIENCE,
+        options={"require_aud": True, "require_exp": True}
+    )
+
+    if not claims.get("sub"):
+        raise JWTError("Token has no subject")
+
+    user = AuthenticatedUser(
+        id=claims["sub"],
+        email=claims.get("email"),
+        role=claims.get("role")
+    )
+    return user, claims["exp"] - time.time()
+
+
+async def _verify_remote(token: str, supabase: Client) -> AuthenticatedUser:
+    """Verify the token by asking Supabase Auth (catches revoked sessions)"""
+    user_response = await run_sync(supabase.auth.get_user, token)
+
+    if not user_response or not user_response.user:
+        raise JWTError("Token rejected by Supabase Auth")
+
+    user = user_response.user
+    return AuthenticatedUser(
+        id=user.id,
+        email=user.email,
+        role=user.role,
+        created_at=user.created_at
+    )
+
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     supabase: Client = Depends(get_supabase)
-):
+) -> AuthenticatedUser:
     """
     Dependency to get current authenticated user from JWT token
     """
@@ -22,19 +147,35 @@ async def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+    token = credentials.credentials
+    cache_key = _token_key(token)
+
+    cached_user = _user_cache().get(cache_key)
+    if cached_user is not None:
+        return cached_user
+
     try:
-        token = credentials.credentials
-        
+        if settings.AUTH_VERIFY_MODE == "local":
+            try:
+                user, expires_in = await _verify_local(token)
+                _user_cache().set(cache_key, user, ttl_seconds=expires_in)
+                return user
+            except ExpiredSignatureError:
+                raise credentials_exception
+            except (JOSEError, httpx.HTTPError):
+                # Unknown signing key, secret mismatch or JWKS unavailable: let Supabase decide
+                if not settings.AUTH_REMOTE_FALLBACK:
+                    raise credentials_exception
+
         # Verify token with Supabase
-        user_response = supabase.auth.get_user(token)
-        
-        if not user_response or not user_response.user:
-            raise credentials_exception
-            
-        return user_response.user
-        
-    except JWTError:
+        user = await _verify_remote(token, supabase)
+        _user_cache().set(cache_key, user, ttl_seconds=_seconds_until_expiry(token))
+        return user
+
+    except HTTPException:
+        raise
+    except JOSEError:
         raise credentials_exception
     except Exception as e:
         raise HTTPException(
@@ -43,6 +184,40 @@ async def get_current_user(
         )
 
 
+async def get_current_user_profile(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    supabase: Client = Depends(get_supabase),
+    current_user: AuthenticatedUser = Depends(get_current_user)
+) -> AuthenticatedUser:
+    """
+    Like get_current_user, but guarantees the full Supabase Auth record
+    (locally verified tokens do not carry fields such as created_at)
+    """
+    if current_user.created_at is not None:
+        return current_user
+
+    try:
+        user = await _verify_remote(credentials.credentials, supabase)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    _user_cache().set(
+        _token_key(credentials.credentials),
+        user,
+        ttl_seconds=_seconds_until_expiry(credentials.credentials)
+    )
+    return user
+
+
+def invalidate_token(token: str):
+    """Drop a token from the verified-identity cache (e.g. on logout)"""
+    _user_cache().pop(_token_key(token))
+
+
 async def get_current_user_id(current_user = Depends(get_current_user)) -> str:
     """Extract user ID from current user"""
     return current_user.id
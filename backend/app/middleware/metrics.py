@@ -0,0 +1,48 @@
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.metrics import http_request_seconds
+
+
+def route_template(scope: Scope) -> str:
+    """The request path with path parameter values put back as {name}"""
+    if "endpoint" not in scope:
+        return "unmatched"
+    names = {str(value): name for name, value in scope.get("path_params", {}).items()}
+    return "/".join(f"{{{names[part]}}}" if part in names else part for part in scope["path"].split("/"))
+
+
+class MetricsMiddleware:
+    """
+    Record every HTTP request's latency under its route template
+    (/api/personas/{persona_id}, not the raw path, to keep label
+    cardinality bounded). Streaming responses are timed until their last
+    chunk is sent.
+    """
+
+    def __init__(self, app: ASGIApp, exclude_paths: tuple = ()):
+        self.app = app
+        self.exclude_paths = exclude_paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_request_seconds.observe(
+                time.perf_counter() - start,
+                method=scope["method"],
+                route=route_template(scope),
+                status=status_code
+            )
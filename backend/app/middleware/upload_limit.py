@@ -0,0 +1,54 @@
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject oversized upload bodies before they are buffered.
+
+    Requests declaring a Content-Length above the limit are refused outright;
+    chunked bodies are counted as they stream in and aborted once the limit
+    is crossed. Only POST requests under the given path prefixes are checked.
+    """
+
+    def __init__(self, app: ASGIApp, max_body_size: int, path_prefixes: tuple):
+        self.app = app
+        self.max_body_size = max_body_size
+        self.path_prefixes = path_prefixes
+
+    def _too_large(self) -> HTTPException:
+        return HTTPException(
+            status_code=413,
+            detail=f"Upload must be smaller than {self.max_body_size // (1024 * 1024)}MB"
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or not scope["path"].startswith(self.path_prefixes)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_body_size:
+            error = self._too_large()
+            response = JSONResponse({"detail": error.detail}, status_code=error.status_code)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    raise self._too_large()
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,56 @@
+from typing import List, Optional
+from app.database import run_sync
+from supabase import Client
+
+
+class ApplicationRepository:
+    """Async data access for the applications table"""
+
+    def __init__(self, client: Client):
+        self.client = client
+
+    async def _execute(self, query) -> list:
+        response = await run_sync(query.execute)
+        return response.data
+
+    async def create_many(self, rows: List[dict]) -> List[dict]:
+        """
+        Insert applications in one write. Jobs the persona already has an
+        application for are skipped; only the new rows are returned.
+        """
+        if not rows:
+            return []
+        return await self._execute(
+            self.client.table("applications").upsert(
+                rows,
+                on_conflict="persona_id,job_id",
+                ignore_duplicates=True
+            )
+        )
+
+    async def update_many(self, updates: List[dict]) -> List[dict]:
+        """Apply several {id, status, ...} updates in one round trip"""
+        if not updates:
+            return []
+        return await self._execute(self.client.rpc("update_applications", {"p_updates": updates}))
+
+    async def update_stale(self, application_status: str, updated_before: str, fields: dict) -> List[dict]:
+        """Update every application left in a status since before the given time"""
+        return await self._execute(
+            self.client.table("applications")
+                .update(fields)
+                .eq("status", application_status)
+                .lt("updated_at", updated_before)
+        )
+
+    async def list_for_persona(
+        self,
+        persona_id: str,
+        columns: str = "*",
+        application_status: Optional[str] = None
+    ) -> List[dict]:
+        """A persona's applications, newest first"""
+        query = self.client.table("applications").select(columns).eq("persona_id", persona_id)
+        if application_status is not None:
+            query = query.eq("status", application_status)
+        return await self._execute(query.order("created_at", desc=True).order("id"))
@@ -0,0 +1,45 @@
+from typing import List, Optional, Tuple
+from app.database import run_sync
+from supabase import Client
+
+
+class JobRepository:
+    """Async data access for the jobs table (read-only from the API)"""
+
+    def __init__(self, client: Client):
+        self.client = client
+
+    async def _execute(self, query) -> list:
+        response = await run_sync(query.execute)
+        return response.data
+
+    async def list_page(
+        self,
+        columns: str,
+        limit: int,
+        after: Optional[Tuple[str, Optional[str]]] = None
+    ) -> List[dict]:
+        """
+        One page of jobs ordered by (updated_at, id). Pass the (updated_at, id)
+        of the last job seen to continue, or (updated_at, None) to read every
+        job changed at or after that time.
+        """
+        query = self.client.table("jobs").select(columns)
+
+        if after is not None:
+            updated_at, job_id = after
+            if job_id is None:
+                query = query.gte("updated_at", updated_at)
+            else:
+                query = query.or_(
+                    f'updated_at.gt."{updated_at}",'
+                    f'and(updated_at.eq."{updated_at}",id.gt.{job_id})'
+                )
+
+        return await self._execute(query.order("updated_at").order("id").limit(limit))
+
+    async def get_many(self, job_ids: List[str], columns: str = "*") -> List[dict]:
+        """The given jobs, in no particular order (missing ids are skipped)"""
+        if not job_ids:
+            return []
+        return await self._execute(self.client.table("jobs").select(columns).in_("id", job_ids))
@@ -0,0 +1,174 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import List, Optional, Tuple
+from fastapi import Depends
+from app.database import get_supabase, get_supabase_admin, run_sync
+from supabase import Client
+
+
+CV_BUCKET = "cv-uploads"
+
+
+def encode_cursor(row: dict) -> str:
+    """Opaque keyset cursor pointing just past the given row"""
+    raw = json.dumps([row["created_at"], row["id"]]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    The (created_at, id) a cursor points past. Both are re-formatted after
+    parsing, since they are placed into a PostgREST filter expression.
+    """
+    try:
+        created_at, persona_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(created_at).isoformat(), str(uuid.UUID(persona_id))
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+class PersonaRepository:
+    """
+    Async data access for the personas table and the CV storage bucket.
+    Every network call runs on the bounded Supabase thread pool, so a slow
+    PostgREST/Storage request never blocks the event loop.
+    """
+
+    def __init__(self, client: Client):
+        self.client = client
+
+    async def _execute(self, query) -> list:
+        response = await run_sync(query.execute)
+        return response.data
+
+    async def list_for_user(
+        self,
+        user_id: str,
+        columns: str = "*",
+        limit: Optional[int] = None,
+        after: Optional[Tuple[str, str]] = None
+    ) -> List[dict]:
+        """
+        A user's personas ordered by (created_at, id). Pass limit and the
+        (created_at, id) of the last row seen to page with a keyset cursor.
+        """
+        query = self.client.table("personas").select(columns).eq("user_id", user_id)
+
+        if after is not None:
+            created_at, persona_id = after
+            query = query.or_(
+                f'created_at.gt."{created_at}",'
+                f'and(created_at.eq."{created_at}",id.gt.{persona_id})'
+            )
+
+        query = query.order("created_at").order("id")
+        if limit is not None:
+            query = query.limit(limit)
+
+        return await self._execute(query)
+
+    async def get(self, persona_id: str, user_id: str, columns: str = "*") -> Optional[dict]:
+        """A single persona, or None if it does not exist for this user"""
+        rows = await self._execute(
+            self.client.table("personas")
+                .select(columns)
+                .eq("id", persona_id)
+                .eq("user_id", user_id)
+        )
+        return rows[0] if rows else None
+
+    async def create(self, user_id: str, persona_data: dict) -> Optional[dict]:
+        """Insert a persona; it becomes active if it is the user's first"""
+        rows = await self.create_many(user_id, [persona_data])
+        return rows[0] if rows else None
+
+    async def create_many(self, user_id: str, rows: List[dict]) -> List[dict]:
+        """
+        Insert several personas in one transactional round trip. The first
+        becomes active if the user had none, decided inside the same
+        transaction so concurrent creates can't both claim it.
+        """
+        return await self._execute(
+            self.client.rpc("create_personas", {"p_user_id": user_id, "p_personas": rows})
+        )
+
+    async def update(self, persona_id: str, user_id: str, update_data: dict) -> Optional[dict]:
+        rows = await self._execute(
+            self.client.table("personas")
+                .update(update_data)
+                .eq("id", persona_id)
+                .eq("user_id", user_id)
+        )
+        return rows[0] if rows else None
+
+    async def delete(self, persona_id: str, user_id: str) -> Tuple[Optional[dict], Optional[str]]:
+        """
+        Delete a persona. Returns the deleted row (None if it did not exist)
+        and the storage path of its CV if no other persona still uses it.
+        """
+        rows = await self._execute(
+            self.client.rpc("delete_persona", {"p_persona_id": persona_id, "p_user_id": user_id})
+        )
+        if not rows:
+            return None, None
+        persona = rows[0]["persona"]
+        return persona, persona.get("cv_storage_path") if rows[0]["cv_unreferenced"] else None
+
+    async def activate(self, persona_id: str, user_id: str) -> Optional[dict]:
+        """Make the persona the user's only active one, atomically"""
+        rows = await self._execute(
+            self.client.rpc("activate_persona", {"p_persona_id": persona_id, "p_user_id": user_id})
+        )
+        return rows[0] if rows else None
+
+    async def upload_cv_file(self, storage_path: str, content: bytes, content_type: str) -> str:
+        """Upload a CV to storage and return its public URL"""
+        bucket = self.client.storage.from_(CV_BUCKET)
+        await run_sync(
+            bucket.upload,
+            storage_path,
+            content,
+            {
+                "content-type": content_type or "application/octet-stream",
+                "upsert": "true"
+            }
+        )
+        return self.cv_file_url(storage_path)
+
+    async def cv_file_exists(self, storage_path: str) -> bool:
+        """Whether the object is already stored (a HEAD request)"""
+        return await run_sync(self.client.storage.from_(CV_BUCKET).exists, storage_path)
+
+    def cv_file_url(self, storage_path: str) -> str:
+        # Built locally from the bucket URL, no request needed
+        return self.client.storage.from_(CV_BUCKET).get_public_url(storage_path)
+
+    async def cv_file_referenced(self, user_id: str, storage_path: str) -> bool:
+        """Whether any of the user's personas uses the stored CV"""
+        rows = await self._execute(
+            self.client.table("personas")
+                .select("id")
+                .eq("user_id", user_id)
+                .eq("cv_storage_path", storage_path)
+                .limit(1)
+        )
+        return bool(rows)
+
+    async def download_cv_file(self, storage_path: str) -> bytes:
+        return await run_sync(self.client.storage.from_(CV_BUCKET).download, storage_path)
+
+    async def remove_cv_files(self, storage_paths: List[str]):
+        await run_sync(self.client.storage.from_(CV_BUCKET).remove, storage_paths)
+
+
+# Dependencies for route handlers
+def get_persona_repository(supabase: Client = Depends(get_supabase)) -> PersonaRepository:
+    """Persona repository using the anon client"""
+    return PersonaRepository(supabase)
+
+
+def get_persona_admin_repository(admin_client: Client = Depends(get_supabase_admin)) -> PersonaRepository:
+    """Persona repository using the service client (bypasses RLS)"""
+    return PersonaRepository(admin_client)
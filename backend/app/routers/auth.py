@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials
 from app.schemas.auth import UserRegister, UserLogin, Token, UserResponse
 from app.database import get_supabase
-from app.middleware.auth import get_current_user
+from app.middleware.auth import get_current_user, get_current_user_profile, invalidate_token, security
 from supabase import Client
 
 
@@ -90,11 +91,13 @@ async def login(
 @router.post("/logout")
 async def logout(
     supabase: Client = Depends(get_supabase),
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
     """Logout current user"""
     try:
         supabase.auth.sign_out()
+        invalidate_token(credentials.credentials)
         return {"message": "Successfully logged out"}
     except Exception as e:
         raise HTTPException(
@@ -105,7 +108,7 @@ async def logout(
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user_profile)
 ):
     """Get current authenticated user information"""
     return UserResponse(
@@ -1,45 +1,185 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from typing import List
-from app.schemas.persona import PersonaCreate, PersonaUpdate, PersonaResponse, CVParseRequest, CVParseResponse
-from app.database import get_supabase, get_supabase_admin
+import asyncio
+import hashlib
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status, UploadFile, File
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import List, Optional
+from app.schemas.application import ApplicationBatchCreate, ApplicationResponse
+from app.schemas.job import JobMatchResponse
+from app.schemas.persona import PersonaCreate, PersonaUpdate, PersonaResponse, PersonaSummary, CVParseRequest, CVParseResponse, ProvisionalCVParseResponse, UploadJobResponse
+from app.config import settings
 from app.middleware.auth import get_current_user_id
+from app.repositories.personas import PersonaRepository, decode_cursor, encode_cursor, get_persona_repository, get_persona_admin_repository
+from app.repositories.applications import ApplicationRepository
+from app.services.applications import application_batches
 from app.services.cv_parser import cv_parser
-from supabase import Client
+from app.services.cv_upload import create_persona_from_cv, release_cv
+from app.services.fast_extract import extract_fast_fields, public_fields
+from app.services.bulk_import import bulk_import_personas
+from app.services.matching import job_matcher
+from app.services.ingest import IngestedFile, expand_archive, ingest_upload
+from app.services.persona_cache import persona_cache
+from app.services.semantic import SemanticIndexUnavailable, semantic_matcher
+from app.services.upload_jobs import UploadQueueFull, upload_jobs
 
 
 router = APIRouter(prefix="/personas", tags=["Personas"])
 
 
+# Columns a client may request with ?fields=, by column name or by the
+# response alias (avatar_url or avatar), and the alias each is returned as
+FIELD_COLUMNS = {
+    **{name: name for name in PersonaResponse.model_fields},
+    **{field.alias: name for name, field in PersonaResponse.model_fields.items() if field.alias}
+}
+COLUMN_ALIASES = {name: field.alias or name for name, field in PersonaResponse.model_fields.items()}
+
+# Columns behind ?view=summary (no CV details or JSONB blobs)
+SUMMARY_COLUMNS = ["id", "name", "title", "avatar_url", "is_active", "created_at", "updated_at"]
+
+# Enough to tell whether a persona changed (updated_at is bumped by trigger)
+VERSION_COLUMNS = ["id", "updated_at"]
+
+
+def _etag(rows: List[dict], representation: str = "view=full") -> str:
+    """
+    Strong ETag over the (id, updated_at) of every persona in a response
+    and the representation sent (view or fields), so one view's tag never
+    revalidates another
+    """
+    digest = hashlib.sha256(f"{representation};".encode("utf-8"))
+    for row in rows:
+        digest.update(f"{row['id']}@{row.get('updated_at')};".encode("utf-8"))
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    """Whether the client's If-None-Match already names this ETag"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    # If-None-Match uses the weak comparison
+    return "*" in tags or etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+
+def _not_modified_response(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"}
+    )
+
+
 @router.get("", response_model=List[PersonaResponse])
 async def list_personas(
+    request: Request,
+    response: Response,
+    view: str = Query("full", pattern="^(full|summary)$", description="'summary' returns only list-screen fields"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return, e.g. id,name,title"),
+    limit: Optional[int] = Query(None, ge=1, le=100, description="Page size; omit to return every persona"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
     user_id: str = Depends(get_current_user_id),
-    supabase: Client = Depends(get_supabase),
-    admin_client: Client = Depends(get_supabase_admin)
+    admin_repo: PersonaRepository = Depends(get_persona_admin_repository)
 ):
-    """Get all personas for the current user"""
+    """
+    Get all personas for the current user
+    
+    Pages are ordered by (created_at, id); when more remain, the cursor for
+    the next page is returned in the X-Next-Cursor header. Send the ETag
+    back as If-None-Match to get 304 Not Modified when nothing changed.
+    """
     try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    if fields:
+        requested = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in requested if f not in FIELD_COLUMNS]
+        columns = list(dict.fromkeys(FIELD_COLUMNS[f] for f in requested if f in FIELD_COLUMNS))
+        if unknown or not columns:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown) or fields}"
+            )
+    elif view == "summary":
+        columns = SUMMARY_COLUMNS
+    else:
+        columns = None
+    representation = f"fields={','.join(columns)}" if fields else f"view={view}"
+    
+    # The cursor is built from (created_at, id), so always fetch them when
+    # paging; the ETag needs (id, updated_at)
+    select = "*"
+    if columns is not None:
+        select = ",".join(dict.fromkeys(columns + VERSION_COLUMNS + (["created_at"] if limit else [])))
+    
+    try:
+        if request.headers.get("if-none-match"):
+            # Revalidate against versions only before fetching whole rows
+            versions = await persona_cache.get_or_load(
+                user_id,
+                ("list", ",".join(VERSION_COLUMNS), limit, after),
+                lambda: admin_repo.list_for_user(
+                    user_id,
+                    columns=",".join(VERSION_COLUMNS),
+                    limit=limit + 1 if limit else None,
+                    after=after
+                ),
+                revalidation=True
+            )
+            etag = _etag(versions, representation)
+            if _not_modified(request, etag):
+                return _not_modified_response(etag)
+        
         # Use admin client to bypass RLS issues
-        response = admin_client.table("personas").select("*").eq("user_id", user_id).execute()
-        return response.data
+        rows = await persona_cache.get_or_load(
+            user_id,
+            ("list", select, limit, after),
+            lambda: admin_repo.list_for_user(
+                user_id,
+                columns=select,
+                limit=limit + 1 if limit else None,
+                after=after
+            )
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to fetch personas: {str(e)}"
         )
+    
+    # Tag what is actually sent, in case a row changed since the check above
+    headers = {"ETag": _etag(rows, representation), "Cache-Control": "private, no-cache"}
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = encode_cursor(rows[-1])
+    
+    if fields:
+        # Projected rows skip response-model validation, but use its aliases
+        return JSONResponse([{COLUMN_ALIASES[c]: row.get(c) for c in columns} for row in rows], headers=headers)
+    if view == "summary":
+        return JSONResponse(
+            [PersonaSummary.model_validate(row).model_dump(mode="json", by_alias=True) for row in rows],
+            headers=headers
+        )
+    
+    response.headers.update(headers)
+    return rows
 
 
 @router.post("", response_model=PersonaResponse, status_code=status.HTTP_201_CREATED)
 async def create_persona(
     persona: PersonaCreate,
     user_id: str = Depends(get_current_user_id),
-    supabase: Client = Depends(get_supabase)
+    repo: PersonaRepository = Depends(get_persona_repository)
 ):
     """Create a new persona"""
     try:
-        # Check if this should be the first/active persona
-        existing = supabase.table("personas").select("id").eq("user_id", user_id).execute()
-        is_first_persona = len(existing.data) == 0
-        
+        # The first persona is made active by the database, in the same insert
         persona_data = {
             "user_id": user_id,
             "name": persona.name,
@@ -52,21 +192,21 @@ async def create_persona(
             "salary_max": persona.salary_max,
             "cv_file_name": persona.cv_file_name,
             "cv_file_url": persona.cv_file_url,
-            "is_active": is_first_persona,  # First persona is active by default
             "market_demand": "medium",
             "global_matches": 0,
             "confidence_score": 0.0
         }
         
-        response = supabase.table("personas").insert(persona_data).execute()
+        created = await repo.create(user_id, persona_data)
+        await persona_cache.invalidate(user_id)
         
-        if not response.data:
+        if not created:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Failed to create persona"
             )
         
-        return response.data[0]
+        return created
         
     except Exception as e:
         raise HTTPException(
@@ -78,26 +218,42 @@ async def create_persona(
 @router.get("/{persona_id}", response_model=PersonaResponse)
 async def get_persona(
     persona_id: str,
+    request: Request,
+    response: Response,
     user_id: str = Depends(get_current_user_id),
-    supabase: Client = Depends(get_supabase),
-    admin_client: Client = Depends(get_supabase_admin)
+    admin_repo: PersonaRepository = Depends(get_persona_admin_repository)
 ):
-    """Get a specific persona by ID"""
+    """Get a specific persona by ID (supports If-None-Match)"""
     try:
+        if request.headers.get("if-none-match"):
+            # Revalidate against the version only before fetching the row
+            version = await persona_cache.get_or_load(
+                user_id,
+                ("get", ",".join(VERSION_COLUMNS), persona_id),
+                lambda: admin_repo.get(persona_id, user_id, columns=",".join(VERSION_COLUMNS)),
+                revalidation=True
+            )
+            if version:
+                etag = _etag([version])
+                if _not_modified(request, etag):
+                    return _not_modified_response(etag)
+        
         # Use admin client to bypass RLS issues
-        response = admin_client.table("personas")\
-            .select("*")\
-            .eq("id", persona_id)\
-            .eq("user_id", user_id)\
-            .execute()
+        persona = await persona_cache.get_or_load(
+            user_id,
+            ("get", "*", persona_id),
+            lambda: admin_repo.get(persona_id, user_id)
+        )
         
-        if not response.data:
+        if not persona:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Persona not found"
             )
         
-        return response.data[0]
+        response.headers["ETag"] = _etag([persona])
+        response.headers["Cache-Control"] = "private, no-cache"
+        return persona
         
     except HTTPException:
         raise
@@ -113,7 +269,7 @@ async def update_persona(
     persona_id: str,
     persona_update: PersonaUpdate,
     user_id: str = Depends(get_current_user_id),
-    supabase: Client = Depends(get_supabase)
+    repo: PersonaRepository = Depends(get_persona_repository)
 ):
     """Update a persona"""
     try:
@@ -126,19 +282,25 @@ async def update_persona(
                 detail="No fields to update"
             )
         
-        response = supabase.table("personas")\
-            .update(update_data)\
-            .eq("id", persona_id)\
-            .eq("user_id", user_id)\
-            .execute()
-        
-        if not response.data:
+        try:
+            # Activation must also deactivate the user's other personas
+            if update_data.get("is_active"):
+                del update_data["is_active"]
+                updated = await repo.activate(persona_id, user_id)
+                if updated and update_data:
+                    updated = await repo.update(persona_id, user_id, update_data)
+            else:
+                updated = await repo.update(persona_id, user_id, update_data)
+        finally:
+            await persona_cache.invalidate(user_id)
+        
+        if not updated:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Persona not found"
             )
         
-        return response.data[0]
+        return updated
         
     except HTTPException:
         raise
@@ -153,22 +315,24 @@ async def update_persona(
 async def delete_persona(
     persona_id: str,
     user_id: str = Depends(get_current_user_id),
-    supabase: Client = Depends(get_supabase)
+    repo: PersonaRepository = Depends(get_persona_repository),
+    admin_repo: PersonaRepository = Depends(get_persona_admin_repository)
 ):
-    """Delete a persona"""
+    """Delete a persona, and its stored CV if no other persona uses the same file"""
     try:
-        response = supabase.table("personas")\
-            .delete()\
-            .eq("id", persona_id)\
-            .eq("user_id", user_id)\
-            .execute()
+        deleted, unreferenced_cv = await repo.delete(persona_id, user_id)
+        await persona_cache.invalidate(user_id)
         
-        if not response.data:
+        if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Persona not found"
             )
         
+        if unreferenced_cv:
+            # The persona is gone either way; a failure only wastes space
+            await release_cv(user_id, unreferenced_cv, admin_repo)
+        
         return {"message": "Persona deleted successfully"}
         
     except HTTPException:
@@ -184,30 +348,20 @@ async def delete_persona(
 async def activate_persona(
     persona_id: str,
     user_id: str = Depends(get_current_user_id),
-    supabase: Client = Depends(get_supabase)
+    repo: PersonaRepository = Depends(get_persona_repository)
 ):
     """Set a persona as the active one"""
     try:
-        # Deactivate all other personas
-        supabase.table("personas")\
-            .update({"is_active": False})\
-            .eq("user_id", user_id)\
-            .execute()
-        
-        # Activate the selected persona
-        response = supabase.table("personas")\
-            .update({"is_active": True})\
-            .eq("id", persona_id)\
-            .eq("user_id", user_id)\
-            .execute()
-        
-        if not response.data:
+        activated = await repo.activate(persona_id, user_id)
+        await persona_cache.invalidate(user_id)
+        
+        if not activated:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Persona not found"
             )
         
-        return response.data[0]
+        return activated
         
     except HTTPException:
         raise
@@ -218,123 +372,181 @@ async def activate_persona(
         )
 
 
-@router.post("/upload-cv", response_model=PersonaResponse, status_code=status.HTTP_201_CREATED)
-async def upload_cv_and_create_persona(
-    file: UploadFile = File(...),
+@router.get("/{persona_id}/matches", response_model=List[JobMatchResponse])
+async def get_persona_matches(
+    persona_id: str,
+    limit: int = Query(20, ge=1, le=100),
+    mode: str = Query("keyword", pattern="^(keyword|semantic)$"),
     user_id: str = Depends(get_current_user_id),
-    supabase: Client = Depends(get_supabase),
-    admin_client: Client = Depends(get_supabase_admin)
+    admin_repo: PersonaRepository = Depends(get_persona_admin_repository)
 ):
     """
-    Upload CV file, parse it, create persona, and save file to storage
-    This is a unified endpoint that handles the complete CV upload flow
+    Best-matching jobs for a persona. The default keyword mode scores skills,
+    roles, seniority, salary and location; semantic mode ranks by embedding
+    similarity between the persona's profile and the job descriptions.
     """
     try:
-        # Validate file type
-        if not file.filename.lower().endswith(('.pdf', '.docx', '.doc', '.txt')):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Only PDF, DOCX, DOC, and TXT files are supported"
-            )
+        persona = await persona_cache.get_or_load(
+            user_id,
+            ("get", "*", persona_id),
+            lambda: admin_repo.get(persona_id, user_id)
+        )
         
-        # Validate file size (5MB max)
-        file_content = await file.read()
-        if len(file_content) > 5 * 1024 * 1024:
+        if not persona:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="File size must be less than 5MB"
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Persona not found"
             )
         
-        # Extract text based on file type
-        if file.filename.lower().endswith('.pdf'):
-            cv_text = cv_parser.extract_text_from_pdf(file_content)
-        elif file.filename.lower().endswith(('.docx', '.doc')):
-            cv_text = cv_parser.extract_text_from_docx(file_content)
-        else:  # .txt
-            cv_text = file_content.decode('utf-8')
-        
-        # Parse with OpenAI
-        parsed_data = await cv_parser.parse_cv_with_openai(cv_text)
-        
-        # Check if this should be the first/active persona
-        existing = supabase.table("personas").select("id").eq("user_id", user_id).execute()
-        is_first_persona = len(existing.data) == 0
-        
-        # Create persona record first (without CV file URL)
-        persona_data = {
-            "user_id": user_id,
-            "name": parsed_data.get("name", "Unknown"),
-            "title": parsed_data.get("title", "Professional"),
-            "location": parsed_data.get("location"),
-            "avatar_url": None,
-            "experience_level": parsed_data.get("experience_level"),
-            "skills": parsed_data.get("skills", []),
-            "salary_min": parsed_data.get("salary_min"),
-            "salary_max": parsed_data.get("salary_max"),
-            "email": parsed_data.get("email"),
-            "phone": parsed_data.get("phone"),
-            "summary": parsed_data.get("summary"),
-            "roles": parsed_data.get("roles", []),
-            "job_search_location": parsed_data.get("job_search_location"),
-            "education": parsed_data.get("education"),
-            "work_history": parsed_data.get("work_history", []),
-            "gender": parsed_data.get("gender"),
-            "areas_of_improvement": parsed_data.get("areas_of_improvement", []),
-            "cv_file_name": file.filename,
-            "cv_file_url": None,  # Will update after upload
-            "is_active": is_first_persona,
-            "market_demand": "medium",
-            "global_matches": 0,
-            "confidence_score": 0.0
-        }
-        
-        # Insert persona into database using admin client to bypass RLS
-        response = admin_client.table("personas").insert(persona_data).execute()
+        if mode == "semantic":
+            return await semantic_matcher.match(persona, limit)
+        return await job_matcher.match(persona, limit)
         
-        if not response.data:
+    except HTTPException:
+        raise
+    except SemanticIndexUnavailable as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "30"}
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to match jobs: {str(e)}"
+        )
+
+
+async def _get_persona_or_404(persona_id: str, user_id: str, admin_repo: PersonaRepository) -> dict:
+    persona = await persona_cache.get_or_load(
+        user_id,
+        ("get", "*", persona_id),
+        lambda: admin_repo.get(persona_id, user_id)
+    )
+    if not persona:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Persona not found"
+        )
+    return persona
+
+
+@router.post(
+    "/{persona_id}/applications/batch",
+    response_model=List[ApplicationResponse],
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def create_application_batch(
+    persona_id: str,
+    batch: ApplicationBatchCreate,
+    user_id: str = Depends(get_current_user_id),
+    admin_repo: PersonaRepository = Depends(get_persona_admin_repository)
+):
+    """
+    Apply to several jobs at once. The applications are created immediately
+    with status 'processing' and returned; cover letters are written in the
+    background and each row moves to 'applied' as its letter is saved.
+    Poll GET /personas/{persona_id}/applications for progress. Jobs already
+    applied to are skipped.
+    """
+    # First occurrence of each job wins
+    match_scores = {}
+    for item in batch.jobs:
+        match_scores.setdefault(item.job_id, item.match_score)
+    
+    if len(match_scores) > settings.APPLICATION_BATCH_MAX_JOBS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.APPLICATION_BATCH_MAX_JOBS} jobs can be applied to at once"
+        )
+    
+    persona = await _get_persona_or_404(persona_id, user_id, admin_repo)
+    
+    try:
+        return await application_batches.submit(persona, match_scores)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create applications: {str(e)}"
+        )
+
+
+@router.get("/{persona_id}/applications", response_model=List[ApplicationResponse])
+async def list_applications(
+    persona_id: str,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    user_id: str = Depends(get_current_user_id),
+    admin_repo: PersonaRepository = Depends(get_persona_admin_repository)
+):
+    """A persona's applications, newest first (optionally only those with ?status=)"""
+    await _get_persona_or_404(persona_id, user_id, admin_repo)
+    
+    try:
+        return await ApplicationRepository(admin_repo.client).list_for_persona(
+            persona_id,
+            application_status=status_filter
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+async def _cancel_on_disconnect(request: Request, coro):
+    """Await coro, cancelling it (and any running extraction) if the client disconnects"""
+    task = asyncio.ensure_future(coro)
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=1.0)
+        if done:
+            return task.result()
+        if await request.is_disconnected():
+            task.cancel()
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Failed to create persona"
+                status_code=499,
+                detail="Client closed request"
             )
-        
-        persona = response.data[0]
-        persona_id = persona['id']
-        
-        # Upload file to Supabase Storage
-        try:
-            # Create file path: {user_id}/{persona_id}_{filename}
-            file_extension = file.filename.split('.')[-1]
-            storage_path = f"{user_id}/{persona_id}_cv.{file_extension}"
-            
-            # Upload to cv-uploads bucket using admin client
-            storage_response = admin_client.storage.from_("cv-uploads").upload(
-                storage_path,
-                file_content,
-                {
-                    "content-type": file.content_type or "application/octet-stream",
-                    "upsert": "true"
-                }
-            )
-            
-            # Get public URL
-            file_url = admin_client.storage.from_("cv-uploads").get_public_url(storage_path)
-            
-            # Update persona with CV file URL using admin client
-            update_response = admin_client.table("personas")\
-                .update({"cv_file_url": file_url})\
-                .eq("id", persona_id)\
-                .execute()
-            
-            if update_response.data:
-                persona = update_response.data[0]
-                
-        except Exception as storage_error:
-            # If storage fails, we still have the persona created
-            # Log the error but don't fail the request
-            print(f"Storage upload failed: {str(storage_error)}")
-            # Continue without CV URL
-        
-        return persona
+
+
+async def _read_cv_upload(file: UploadFile, allowed_kinds: tuple = ("pdf", "docx", "txt")) -> IngestedFile:
+    """Stream an uploaded CV in, validating its size and (sniffed) type"""
+    try:
+        return await ingest_upload(file, settings.MAX_CV_UPLOAD_BYTES, allowed_kinds)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.post("/upload-cv", response_model=PersonaResponse, status_code=status.HTTP_201_CREATED)
+async def upload_cv_and_create_persona(
+    request: Request,
+    file: UploadFile = File(...),
+    user_id: str = Depends(get_current_user_id),
+    admin_repo: PersonaRepository = Depends(get_persona_admin_repository)
+):
+    """
+    Upload CV file, parse it, create persona, and save file to storage
+    This is a unified endpoint that handles the complete CV upload flow
+    """
+    try:
+        upload = await _read_cv_upload(file)
+        
+        return await _cancel_on_disconnect(request, create_persona_from_cv(
+            user_id=user_id,
+            file_name=upload.filename,
+            content_type=upload.content_type,
+            file_content=upload.content,
+            admin_repo=admin_repo,
+            kind=upload.kind,
+            file_hash=upload.sha256
+        ))
         
     except ValueError as e:
         raise HTTPException(
@@ -350,8 +562,113 @@ async def upload_cv_and_create_persona(
         )
 
 
+@router.post("/upload-cv/async", response_model=UploadJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def upload_cv_in_background(
+    file: UploadFile = File(...),
+    user_id: str = Depends(get_current_user_id)
+):
+    """
+    Queue a CV upload and return immediately with a job id.
+    Poll GET /personas/jobs/{job_id} for progress and the created persona.
+    """
+    upload = await _read_cv_upload(file)
+    
+    try:
+        return await upload_jobs.submit(user_id, upload.filename, upload.content_type, upload.content)
+    except UploadQueueFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "30"}
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to queue CV upload: {str(e)}"
+        )
+
+
+@router.get("/jobs/{job_id}", response_model=UploadJobResponse)
+async def get_upload_job(
+    job_id: str,
+    user_id: str = Depends(get_current_user_id)
+):
+    """Get the status of a background CV upload"""
+    try:
+        job = await upload_jobs.get(job_id, user_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    
+    return job
+
+
+@router.post("/bulk-import")
+async def bulk_import_cvs(
+    files: List[UploadFile] = File(...),
+    user_id: str = Depends(get_current_user_id),
+    admin_repo: PersonaRepository = Depends(get_persona_admin_repository)
+):
+    """
+    Create personas from many CVs (individual files and/or zip archives).
+    Streams one NDJSON line per file as it is parsed, created or rejected.
+    """
+    uploads = []
+    for file in files:
+        try:
+            upload = await ingest_upload(
+                file,
+                settings.BULK_IMPORT_MAX_BYTES,
+                allowed_kinds=("pdf", "docx", "txt", "zip")
+            )
+        except ValueError as e:
+            uploads.append((file.filename, str(e)))
+            continue
+        
+        if upload.kind != "zip":
+            if upload.size > settings.MAX_CV_UPLOAD_BYTES:
+                uploads.append((upload.filename, f"File size must be less than {settings.MAX_CV_UPLOAD_BYTES // (1024 * 1024)}MB"))
+            else:
+                uploads.append((upload.filename, upload))
+            continue
+        
+        try:
+            uploads.extend(await asyncio.to_thread(
+                expand_archive,
+                upload,
+                settings.MAX_CV_UPLOAD_BYTES,
+                settings.BULK_IMPORT_MAX_FILES
+            ))
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+    
+    if len(uploads) > settings.BULK_IMPORT_MAX_FILES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.BULK_IMPORT_MAX_FILES} CVs can be imported at once"
+        )
+    
+    async def stream():
+        async for event in bulk_import_personas(user_id, uploads, admin_repo):
+            yield json.dumps(event) + "\n"
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
 @router.post("/parse-cv", response_model=CVParseResponse)
 async def parse_cv_file(
+    request: Request,
     file: UploadFile = File(...),
     user_id: str = Depends(get_current_user_id)
 ):
@@ -360,24 +677,15 @@ async def parse_cv_file(
     Returns extracted persona data (legacy endpoint - use /upload-cv instead)
     """
     try:
-        # Validate file type
-        if not file.filename.lower().endswith(('.pdf', '.docx')):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Only PDF and DOCX files are supported"
-            )
+        upload = await _read_cv_upload(file, allowed_kinds=("pdf", "docx"))
         
-        # Read file content
-        content = await file.read()
-        
-        # Extract text based on file type
-        if file.filename.lower().endswith('.pdf'):
-            cv_text = cv_parser.extract_text_from_pdf(content)
-        else:
-            cv_text = cv_parser.extract_text_from_docx(content)
-        
-        # Parse with OpenAI
-        parsed_data = await cv_parser.parse_cv_with_openai(cv_text)
+        # Extract text and parse with OpenAI (cached by file and text hash)
+        parsed_data = await _cancel_on_disconnect(request, cv_parser.parse_file(
+            upload.content,
+            upload.filename,
+            kind=upload.kind,
+            file_hash=upload.sha256
+        ))
         
         return CVParseResponse(**parsed_data)
         
@@ -386,6 +694,83 @@ async def parse_cv_file(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to parse CV: {str(e)}"
+        )
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.post("/parse-cv/stream")
+async def parse_cv_file_stream(
+    file: UploadFile = File(...),
+    user_id: str = Depends(get_current_user_id)
+):
+    """
+    Parse a CV like /parse-cv, streaming progress as Server-Sent Events:
+    `stage` (uploaded, extracted, parsing), `provisional` (rule-based
+    fields), `field` as each top-level field is generated, `work_history`
+    for each role, then `result` (a CVParseResponse) or `error`.
+    Closing the connection cancels the parse.
+    """
+    upload = await _read_cv_upload(file, allowed_kinds=("pdf", "docx"))
+    
+    async def stream():
+        yield _sse("stage", {"stage": "uploaded", "file_name": upload.filename, "size": upload.size})
+        try:
+            async for event, data in cv_parser.parse_file_stream(
+                upload.content,
+                upload.filename,
+                kind=upload.kind,
+                file_hash=upload.sha256
+            ):
+                if event == "result":
+                    data = CVParseResponse(**data).model_dump()
+                yield _sse(event, data)
+        except Exception as e:
+            yield _sse("error", {"detail": str(e)})
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        # Stop proxies (nginx) from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/parse-cv/quick", response_model=ProvisionalCVParseResponse)
+async def parse_cv_file_quick(
+    request: Request,
+    file: UploadFile = File(...),
+    user_id: str = Depends(get_current_user_id)
+):
+    """
+    Rule-based fields from a CV (email, phone, country from the calling
+    code, dictionary skills and a name/title guess) without calling the
+    LLM. Fast enough to show while /parse-cv or /upload-cv is still running.
+    """
+    try:
+        upload = await _read_cv_upload(file, allowed_kinds=("pdf", "docx"))
+        cv_text = await _cancel_on_disconnect(request, cv_parser.extract_text(
+            upload.content,
+            upload.filename,
+            kind=upload.kind
+        ))
+        return public_fields(extract_fast_fields(cv_text))
+        
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -0,0 +1,33 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from datetime import datetime
+
+
+class ApplicationBatchItem(BaseModel):
+    job_id: str = Field(..., alias="jobId")
+    match_score: Optional[float] = Field(None, alias="matchScore", ge=0, le=100)
+
+    class Config:
+        populate_by_name = True
+
+
+class ApplicationBatchCreate(BaseModel):
+    jobs: List[ApplicationBatchItem] = Field(..., min_length=1)
+
+
+class ApplicationResponse(BaseModel):
+    id: str
+    persona_id: str = Field(..., alias="personaId")
+    job_id: str = Field(..., alias="jobId")
+    status: str  # 'processing' while the cover letter is written, then 'applied' (or 'pending' if it failed)
+    match_score: Optional[float] = Field(None, alias="matchScore")
+    ai_cover_letter: Optional[str] = Field(None, alias="coverLetter")
+    notes: Optional[str] = None
+    applied_at: Optional[datetime] = Field(None, alias="appliedAt")
+    created_at: datetime = Field(..., alias="createdAt")
+    updated_at: datetime = Field(..., alias="updatedAt")
+
+    class Config:
+        from_attributes = True
+        populate_by_name = True
+        by_alias = True
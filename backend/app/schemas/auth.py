@@ -26,6 +26,14 @@ class TokenData(BaseModel):
     email: Optional[str] = None
 
 
+class AuthenticatedUser(BaseModel):
+    """Identity resolved from a verified access token"""
+    id: str
+    email: Optional[str] = None
+    role: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
 class UserResponse(BaseModel):
     id: str
     email: str
@@ -0,0 +1,29 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict
+from datetime import datetime
+
+
+class JobSummary(BaseModel):
+    id: str
+    title: str
+    company: str
+    company_logo_url: Optional[str] = Field(None, alias="logo")
+    location: Optional[str] = None
+    is_remote: Optional[bool] = Field(False, alias="remote")
+    salary_min: Optional[int] = Field(None, alias="salaryMin")
+    salary_max: Optional[int] = Field(None, alias="salaryMax")
+    salary_currency: Optional[str] = Field(None, alias="salaryCurrency")
+    visa_sponsored: Optional[bool] = Field(False, alias="visaSponsored")
+    tags: Optional[List[str]] = []
+    posted_date: Optional[datetime] = Field(None, alias="posted")
+    experience_required: Optional[str] = Field(None, alias="experience")
+    industry: Optional[str] = None
+
+    class Config:
+        populate_by_name = True
+
+
+class JobMatchResponse(JobSummary):
+    match_score: float = Field(..., alias="matchScore")  # 0-100
+    breakdown: Dict[str, float] = {}  # Per-component scores, 0-1
+    matched_skills: List[str] = Field(default_factory=list, alias="matchedSkills")
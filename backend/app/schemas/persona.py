@@ -87,6 +87,33 @@ class PersonaResponse(PersonaBase):
         by_alias = True
 
 
+class PersonaSummary(BaseModel):
+    """Compact persona for list screens (no CV details or JSONB blobs)"""
+    id: str
+    name: str
+    title: str
+    avatar_url: Optional[str] = Field(None, alias="avatar")
+    is_active: bool = Field(..., alias="isActive")
+    created_at: datetime = Field(..., alias="createdAt")
+    updated_at: datetime = Field(..., alias="updatedAt")
+    
+    class Config:
+        from_attributes = True
+        populate_by_name = True
+        by_alias = True
+
+
+class UploadJobResponse(BaseModel):
+    id: str
+    status: str  # 'queued', 'extracting', 'parsing', 'saving', 'done', 'failed'
+    file_name: Optional[str] = None
+    persona_id: Optional[str] = None
+    provisional: Optional[Dict[str, Any]] = None  # Rule-based fields, available before parsing finishes
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+
 class CVParseRequest(BaseModel):
     cv_text: str
 
@@ -109,3 +136,9 @@ class CVParseResponse(BaseModel):
     work_history: List[Dict[str, Any]] = []
     gender: Optional[str] = None
     areas_of_improvement: List[Dict[str, str]] = []
+
+
+class ProvisionalCVParseResponse(CVParseResponse):
+    """Rule-based fields only; name and title are guesses and may be missing"""
+    name: Optional[str] = None
+    title: Optional[str] = None
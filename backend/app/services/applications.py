@@ -0,0 +1,234 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Set
+from app.config import settings
+from app.database import SupabaseClient
+from app.repositories.applications import ApplicationRepository
+from app.repositories.jobs import JobRepository
+from app.services.cv_parser import cv_parser
+
+
+# Application lifecycle for batched submissions
+PROCESSING = "processing"
+APPLIED = "applied"
+PENDING = "pending"  # Cover letter failed or was interrupted; the application was not sent
+
+COVER_LETTER_MODEL = "gpt-3.5-turbo"
+
+COVER_LETTER_SYSTEM_PROMPT = "You are a career coach who writes concise, specific cover letters."
+
+COVER_LETTER_PROMPT = """
+Write a cover letter from the candidate below for the job below.
+
+- 3 short paragraphs, under 250 words in total
+- Tie the candidate's most relevant experience and skills to the job's requirements
+- Do not invent experience, employers or qualifications the candidate doesn't list
+- No placeholders such as [Hiring Manager]; open with "Dear Hiring Team,"
+
+Candidate:
+{candidate}
+
+Job:
+{job}
+
+Return ONLY the letter text.
+"""
+
+LETTER_JOB_COLUMNS = "id,title,company,location,description,requirements,tags"
+
+# Keeps prompts (and token spend) bounded for long job ads
+MAX_DESCRIPTION_CHARS = 3000
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def describe_candidate(persona: dict) -> str:
+    lines = [
+        f"Name: {persona.get('name')}",
+        f"Title: {persona.get('title')}",
+        f"Experience: {persona.get('experience_level') or 'unknown'}",
+        f"Skills: {', '.join(persona.get('skills') or [])}",
+        f"Summary: {persona.get('summary') or ''}"
+    ]
+    for item in (persona.get("work_history") or [])[:3]:
+        lines.append(f"- {item.get('position')} at {item.get('company')} ({item.get('duration') or ''}): {item.get('description') or ''}")
+    return "\n".join(lines)
+
+
+def describe_job(job: dict) -> str:
+    lines = [
+        f"Title: {job.get('title')}",
+        f"Company: {job.get('company')}",
+        f"Location: {job.get('location') or 'unspecified'}",
+        f"Requirements: {'; '.join(job.get('requirements') or [])}",
+        f"Description: {(job.get('description') or '')[:MAX_DESCRIPTION_CHARS]}"
+    ]
+    return "\n".join(lines)
+
+
+async def write_cover_letter(persona: dict, job: dict) -> str:
+    response = await cv_parser.client.chat_completion(
+        model=COVER_LETTER_MODEL,
+        messages=[
+            {"role": "system", "content": COVER_LETTER_SYSTEM_PROMPT},
+            {
+                "role": "user",
+                "content": COVER_LETTER_PROMPT.format(candidate=describe_candidate(persona), job=describe_job(job))
+            }
+        ],
+        temperature=0.7,
+        max_tokens=600
+    )
+    letter = (response.choices[0].message.content or "").strip()
+    if not letter:
+        raise ValueError("Empty cover letter")
+    return letter
+
+
+class ApplicationBatches:
+    """
+    Creates a batch of applications up front (status 'processing') and then
+    writes their cover letters in the background. At most
+    APPLICATION_LETTER_CONCURRENCY letters per batch are in flight (on top of
+    the global LLM cap), and finished letters are saved in groups of
+    APPLICATION_UPDATE_BATCH_SIZE, or after APPLICATION_FLUSH_SECONDS, so
+    clients polling the applications list see rows move to 'applied' as
+    they complete.
+
+    Batches cut short by a shutdown save the letters already written and
+    mark the rest 'pending'. Rows a crashed worker left in 'processing' are
+    marked 'pending' at startup once APPLICATION_STALE_AFTER_SECONDS old.
+    """
+
+    def __init__(self):
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def repo(self) -> ApplicationRepository:
+        return ApplicationRepository(SupabaseClient.get_service_client())
+
+    async def submit(self, persona: dict, match_scores: Dict[str, float]) -> List[dict]:
+        """
+        Create applications for the given jobs ({job_id: match_score}) and
+        start writing their cover letters. Returns the created rows; jobs
+        the persona has already applied to are skipped.
+        """
+        jobs = await JobRepository(SupabaseClient.get_service_client()).get_many(
+            list(match_scores),
+            LETTER_JOB_COLUMNS
+        )
+        jobs_by_id = {job["id"]: job for job in jobs}
+        missing = [job_id for job_id in match_scores if job_id not in jobs_by_id]
+        if missing:
+            raise ValueError(f"Jobs not found: {', '.join(missing)}")
+
+        applications = await self.repo.create_many([
+            {
+                "persona_id": persona["id"],
+                "job_id": job_id,
+                "status": PROCESSING,
+                "match_score": match_score
+            }
+            for job_id, match_score in match_scores.items()
+        ])
+
+        if applications:
+            task = asyncio.create_task(self._write_letters(persona, applications, jobs_by_id))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return applications
+
+    def start(self):
+        """Recover batches a crashed worker left behind (called from the app lifespan)"""
+        task = asyncio.create_task(self._recover_stale())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _recover_stale(self):
+        updated_before = datetime.now(timezone.utc) - timedelta(seconds=settings.APPLICATION_STALE_AFTER_SECONDS)
+        try:
+            recovered = await self.repo.update_stale(PROCESSING, updated_before.isoformat(), {
+                "status": PENDING,
+                "notes": "Cover letter generation was interrupted"
+            })
+            if recovered:
+                print(f"Marked {len(recovered)} interrupted applications as pending")
+        except Exception as e:
+            print(f"Failed to recover interrupted applications: {str(e)}")
+
+    async def stop(self):
+        """Cancel in-flight batches (called from the app lifespan)"""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _write_letters(self, persona: dict, applications: List[dict], jobs_by_id: Dict[str, dict]):
+        semaphore = asyncio.Semaphore(settings.APPLICATION_LETTER_CONCURRENCY)
+        results: asyncio.Queue = asyncio.Queue()
+
+        async def write(application: dict):
+            async with semaphore:
+                try:
+                    letter = await write_cover_letter(persona, jobs_by_id[application["job_id"]])
+                    update = {"id": application["id"], "status": APPLIED, "ai_cover_letter": letter, "applied_at": _now()}
+                except Exception as e:
+                    update = {"id": application["id"], "status": PENDING, "notes": f"Cover letter generation failed: {str(e)}"}
+            await results.put(update)
+
+        writers = [asyncio.create_task(write(application)) for application in applications]
+        saved: Set[str] = set()
+        try:
+            await self._save_as_completed(results, len(writers), saved)
+        except asyncio.CancelledError:
+            # Shutting down: don't leave the unwritten ones in 'processing'
+            await self._save([
+                {"id": application["id"], "status": PENDING, "notes": "Cover letter generation was interrupted"}
+                for application in applications
+                if application["id"] not in saved
+            ], saved)
+            raise
+        finally:
+            for writer in writers:
+                writer.cancel()
+
+    async def _save(self, updates: List[dict], saved: Set[str]):
+        try:
+            await self.repo.update_many(updates)
+        except Exception as e:
+            print(f"Failed to save {len(updates)} application updates: {str(e)}")
+        saved.update(update["id"] for update in updates)
+
+    async def _save_as_completed(self, results: asyncio.Queue, remaining: int, saved: Set[str]):
+        loop = asyncio.get_running_loop()
+        pending: List[dict] = []
+        flush_at = None
+
+        try:
+            while remaining:
+                timeout = None if flush_at is None else max(flush_at - loop.time(), 0)
+                try:
+                    pending.append(await asyncio.wait_for(results.get(), timeout))
+                    remaining -= 1
+                    if flush_at is None:
+                        flush_at = loop.time() + settings.APPLICATION_FLUSH_SECONDS
+                except asyncio.TimeoutError:
+                    pass
+
+                if pending and (
+                    len(pending) >= settings.APPLICATION_UPDATE_BATCH_SIZE
+                    or not remaining
+                    or loop.time() >= flush_at
+                ):
+                    updates, pending, flush_at = pending, [], None
+                    await self._save(updates, saved)
+        except asyncio.CancelledError:
+            # Keep the letters already written
+            if pending:
+                await self._save(pending, saved)
+            raise
+
+
+# Singleton instance
+application_batches = ApplicationBatches()
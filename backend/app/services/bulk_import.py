@@ -0,0 +1,156 @@
+import asyncio
+import uuid
+from typing import AsyncIterator, List, Optional, Tuple, Union
+from app.repositories.personas import PersonaRepository
+from app.services.cv_parser import cv_parser
+from app.config import settings
+from app.services.cv_upload import (
+    build_persona_data,
+    cleanup_in_background,
+    cv_blob_path,
+    discard_cv,
+    ensure_cv_stored,
+    release_cv,
+    store_cv
+)
+from app.services.persona_cache import persona_cache
+from app.services.ingest import IngestedFile
+
+
+async def _parse_and_store(
+    user_id: str,
+    upload: IngestedFile,
+    admin_repo: PersonaRepository,
+    slots: asyncio.Semaphore
+) -> Tuple[dict, Optional[Tuple[str, str, bool]]]:
+    """
+    Parse one CV, then make sure it is stored (returns path, URL and
+    whether it was uploaded now)
+    """
+    async with slots:
+        parsed_data = await cv_parser.parse_file(
+            upload.content,
+            upload.filename,
+            kind=upload.kind,
+            file_hash=upload.sha256
+        )
+
+    storage_path = cv_blob_path(user_id, upload.sha256, upload.filename, upload.kind)
+    storing = asyncio.create_task(store_cv(storage_path, upload.content, upload.content_type, admin_repo))
+    try:
+        stored = await asyncio.shield(storing)
+    except asyncio.CancelledError:
+        # The import was abandoned; release the file once it is stored
+        cleanup_in_background(discard_cv(storing, user_id, storage_path, admin_repo))
+        raise
+    if stored is None:
+        # Same policy as single uploads: keep the persona, skip the file
+        return parsed_data, None
+
+    return parsed_data, (storage_path, *stored)
+
+
+async def bulk_import_personas(
+    user_id: str,
+    uploads: List[Tuple[str, Union[IngestedFile, str]]],
+    admin_repo: PersonaRepository
+) -> AsyncIterator[dict]:
+    """
+    Import many CVs at once, yielding one result event at a time.
+
+    Files are parsed concurrently, BULK_IMPORT_CONCURRENCY at a time
+    (extraction in the process pool, LLM calls under the shared concurrency
+    cap), and each CV is stored as soon as it is parsed, unless an
+    identical file already is. All personas are then written in a single
+    insert, using ids generated up front so each created row can be matched
+    to its file. If the import ends early (the client disconnects), files
+    uploaded for it are released again.
+    """
+    persona_ids = {}
+    tasks = {}
+    slots = asyncio.Semaphore(settings.BULK_IMPORT_CONCURRENCY)
+    for index, (filename, upload) in enumerate(uploads):
+        if isinstance(upload, str):
+            # Rejected during ingestion
+            yield {"file": filename, "status": "failed", "error": upload}
+            continue
+        persona_ids[index] = str(uuid.uuid4())
+        task = asyncio.create_task(_parse_and_store(user_id, upload, admin_repo, slots))
+        tasks[task] = index
+
+    parsed = {}
+    finished = False
+    try:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index = tasks[task]
+                filename = uploads[index][0]
+                try:
+                    parsed[index] = task.result()
+                    yield {"file": filename, "status": "parsed"}
+                except Exception as e:
+                    yield {"file": filename, "status": "failed", "error": str(e)}
+        finished = True
+    finally:
+        for task in tasks:
+            task.cancel()
+        if not finished:
+            # Nothing will be inserted; files still being stored are
+            # released by their task (see _parse_and_store)
+            results = [task.result() for task in tasks if task.done() and not task.cancelled() and task.exception() is None]
+            uploaded_paths = {stored[0] for _, stored in results if stored and stored[2]}
+            for storage_path in uploaded_paths:
+                cleanup_in_background(release_cv(user_id, storage_path, admin_repo))
+
+    if not parsed:
+        return
+
+    # The first row becomes active if the user has no personas yet
+    rows = []
+    for index in sorted(parsed):
+        parsed_data, stored = parsed[index]
+        row = build_persona_data(user_id, parsed_data, uploads[index][0])
+        row["id"] = persona_ids[index]
+        if stored:
+            row["cv_storage_path"], row["cv_file_url"] = stored[:2]
+        rows.append(row)
+
+    try:
+        created = await admin_repo.create_many(user_id, rows)
+    except Exception as e:
+        # Nothing was written; don't leave the files uploaded for it behind
+        uploaded_paths = {stored[0] for _, stored in parsed.values() if stored and stored[2]}
+        for storage_path in uploaded_paths:
+            await release_cv(user_id, storage_path, admin_repo)
+        for index in sorted(parsed):
+            yield {"file": uploads[index][0], "status": "failed", "error": f"Failed to create persona: {str(e)}"}
+        return
+
+    await persona_cache.invalidate(user_id)
+    created_by_id = {row["id"]: row for row in created}
+
+    # Files removed by a concurrent delete while these were being saved
+    stored_paths = {
+        stored[0]: index
+        for index, (_, stored) in parsed.items()
+        if stored and persona_ids[index] in created_by_id
+    }
+    await asyncio.gather(*(
+        ensure_cv_stored(storage_path, uploads[index][1].content, uploads[index][1].content_type, admin_repo)
+        for storage_path, index in stored_paths.items()
+    ))
+    for index in sorted(parsed):
+        persona = created_by_id.get(persona_ids[index])
+        if persona is None:
+            yield {"file": uploads[index][0], "status": "failed", "error": "Failed to create persona"}
+            continue
+        yield {
+            "file": uploads[index][0],
+            "status": "created",
+            "persona_id": persona["id"],
+            "name": persona.get("name"),
+            "title": persona.get("title"),
+            "cv_file_url": persona.get("cv_file_url")
+        }
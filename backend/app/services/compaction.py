@@ -0,0 +1,289 @@
+import math
+import re
+import unicodedata
+from collections import Counter
+from typing import Callable, List, Optional, Tuple
+from app.config import settings
+from app.metrics import cv_prompt_tokens
+
+
+# Page separator emitted by PDF extraction
+PAGE_BREAK = "\f"
+
+# CV sections by how much the parser needs them: higher survives truncation longer
+SECTION_PRIORITIES = {
+    "experience": 5,
+    "skills": 4,
+    "summary": 4,
+    "education": 3,
+    "certifications": 2,
+    "projects": 2,
+    "languages": 2,
+    "awards": 1,
+    "publications": 1,
+    "volunteering": 1,
+    "interests": 0,
+    "references": 0
+}
+
+SECTION_HEADINGS = {
+    "experience": ["experience", "work experience", "professional experience", "employment", "employment history", "work history", "career history"],
+    "skills": ["skills", "technical skills", "core skills", "key skills", "competencies", "core competencies", "technologies"],
+    "summary": ["summary", "profile", "professional summary", "personal statement", "about me", "objective", "career objective"],
+    "education": ["education", "qualifications", "academic background", "education and training"],
+    "certifications": ["certifications", "certificates", "licenses", "courses", "training"],
+    "projects": ["projects", "personal projects", "key projects"],
+    "languages": ["languages"],
+    "awards": ["awards", "honours", "honors", "achievements"],
+    "publications": ["publications", "talks", "conferences"],
+    "volunteering": ["volunteering", "volunteer experience", "community"],
+    "interests": ["interests", "hobbies", "hobbies and interests", "activities"],
+    "references": ["references", "referees"]
+}
+
+_HEADING_LOOKUP = {heading: section for section, headings in SECTION_HEADINGS.items() for heading in headings}
+
+# Anything before the first heading (name, title, contact details)
+HEADER_SECTION = "header"
+HEADER_PRIORITY = 6
+
+TRUNCATION_MARKER = "[...]"
+
+_PAGE_NUMBER_RE = re.compile(r"^(?:page\s*)?[-–]?\s*\d+\s*(?:(?:of|/)\s*\d+)?\s*[-–]?$", re.IGNORECASE)
+_HYPHEN_BREAK_RE = re.compile(r"(\w)-\n(\w)")
+_SPACES_RE = re.compile(r"[ \t\u00a0\u2000-\u200b\u3000]+")
+_CONTROL_RE = re.compile(r"[\x00-\x08\x0b\x0e-\x1f\x7f]")
+_BULLET_RE = re.compile(r"^(?:[•●▪■◦‣∙·]|[*\-–—](?=\s))\s*")
+_DIGITS_RE = re.compile(r"\d+")
+
+
+_encoder = None
+
+
+def _get_encoder():
+    global _encoder
+    if _encoder is None:
+        try:
+            import tiktoken
+            _encoder = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            # tiktoken missing (or its BPE file can't be fetched offline)
+            _encoder = False
+    return _encoder
+
+
+def count_tokens(text: str) -> int:
+    """Tokens in text for the OpenAI chat models (an estimate without tiktoken)"""
+    if not text:
+        return 0
+    encoder = _get_encoder()
+    if encoder:
+        return len(encoder.encode(text, disallowed_special=()))
+    # Roughly 4 characters per token for English text
+    return math.ceil(len(text) / 4)
+
+
+def normalize_cv_text(text: str) -> str:
+    """
+    Undo common extraction noise: odd unicode forms and control characters,
+    words hyphenated across line breaks, bullet glyphs and runs of spaces or
+    blank lines. Page breaks are kept.
+    """
+    text = unicodedata.normalize("NFKC", text).replace("\r\n", "\n").replace("\r", "\n")
+    text = _CONTROL_RE.sub("", text)
+    text = _HYPHEN_BREAK_RE.sub(r"\1\2", text)
+
+    pages = []
+    for page in text.split(PAGE_BREAK):
+        lines = []
+        for line in page.split("\n"):
+            line = _SPACES_RE.sub(" ", line).strip()
+            line = _BULLET_RE.sub("- ", line)
+            if line or (lines and lines[-1]):
+                lines.append(line)
+        pages.append("\n".join(lines).strip("\n"))
+    return PAGE_BREAK.join(pages)
+
+
+def _line_signature(line: str) -> str:
+    """Compare headers/footers ignoring page numbers and case"""
+    return _DIGITS_RE.sub("#", line.lower())
+
+
+def _has_letters(line: str) -> bool:
+    """Headers/footers have words; lines of only digits (years, date ranges) differ per page"""
+    return any(ch.isalpha() for ch in line)
+
+
+def _is_page_number(line: str, page_count: int) -> bool:
+    """"3", "Page 3", "3 of 5", "- 3 -"... with a number no larger than the page count (so not a year)"""
+    if not _PAGE_NUMBER_RE.match(line):
+        return False
+    return int(_DIGITS_RE.search(line).group()) <= page_count
+
+
+def strip_page_furniture(text: str, edge_lines: int = 3) -> str:
+    """
+    Drop page numbers and the headers/footers repeated across pages: lines
+    within edge_lines of the top or bottom of a page whose text (ignoring
+    digits) recurs on most pages, or that hold only a page number. The
+    first repeated occurrence is kept. Single-page text is left alone, and
+    number-only lines in the body, or too large to be a page (such as a
+    year), are always kept.
+    """
+    pages = [page.split("\n") for page in text.split(PAGE_BREAK)]
+    if len(pages) < 2:
+        return text
+
+    edges = Counter()
+    for lines in pages:
+        edges.update({_line_signature(line) for line in lines[:edge_lines] + lines[-edge_lines:] if _has_letters(line)})
+    threshold = max(2, math.ceil(len(pages) / 2))
+    repeated = {signature for signature, count in edges.items() if count >= threshold}
+
+    seen = set()
+    kept = []
+    for lines in pages:
+        for i, line in enumerate(lines):
+            at_edge = i < edge_lines or i >= len(lines) - edge_lines
+            if at_edge and _is_page_number(line, len(pages)):
+                continue
+            signature = _line_signature(line)
+            if at_edge and signature in repeated:
+                if signature in seen:
+                    continue
+                seen.add(signature)
+            kept.append(line)
+
+    # Blank lines at page joins can now be adjacent
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(kept)).strip()
+
+
+def _heading(line: str) -> Optional[str]:
+    key = line.strip().rstrip(":").strip().lower()
+    if len(key) > 40:
+        return None
+    return _HEADING_LOOKUP.get(re.sub(r"[^a-z& ]", "", key).replace("&", "and").strip())
+
+
+def split_sections(text: str) -> List[Tuple[str, List[str]]]:
+    """(section, lines) in document order; the section's heading is its first line"""
+    sections = [(HEADER_SECTION, [])]
+    for line in text.split("\n"):
+        section = _heading(line)
+        if section is not None:
+            sections.append((section, [line]))
+        else:
+            sections[-1][1].append(line)
+    return [(section, lines) for section, lines in sections if any(lines)]
+
+
+def _fit_lines(lines: List[str], budget: int, count: Callable[[str], int]) -> List[str]:
+    """The leading lines of a section that fit in budget tokens"""
+    kept = []
+    used = count(TRUNCATION_MARKER)
+    for line in lines:
+        cost = count(line) + 1
+        if used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    if len(kept) < len(lines):
+        kept.append(TRUNCATION_MARKER)
+    return kept
+
+
+def truncate_sections(text: str, max_tokens: int, count: Callable[[str], int] = count_tokens) -> str:
+    """
+    Bring text under max_tokens without cutting mid-line. Whole sections are
+    dropped lowest priority first (references, interests, ...), but never
+    the header, summary, experience, skills or education. If that isn't enough, the
+    budget is shared between the remaining sections (those smaller than an
+    equal share keep everything) and each keeps its leading lines, which for
+    work history are the most recent roles.
+    """
+    sections = split_sections(text)
+    sizes = [count("\n".join(lines)) + 1 for _, lines in sections]
+    if sum(sizes) <= max_tokens:
+        return text
+
+    def priority(section: str) -> int:
+        return HEADER_PRIORITY if section == HEADER_SECTION else SECTION_PRIORITIES.get(section, 1)
+
+    keep = list(range(len(sections)))
+    for i in sorted(keep, key=lambda i: (priority(sections[i][0]), -i)):
+        if sum(sizes[j] for j in keep) <= max_tokens or priority(sections[i][0]) >= SECTION_PRIORITIES["education"]:
+            break
+        keep.remove(i)
+
+    # Water-filling: small sections keep everything, large ones share the rest
+    budgets = {}
+    remaining = max_tokens
+    pending = sorted(keep, key=lambda i: sizes[i])
+    while pending:
+        share = remaining // len(pending)
+        i = pending.pop(0)
+        budgets[i] = min(sizes[i], share)
+        remaining -= budgets[i]
+
+    parts = []
+    for i in keep:
+        lines = sections[i][1]
+        parts.append("\n".join(lines if budgets[i] >= sizes[i] else _fit_lines(lines, budgets[i], count)))
+    return "\n".join(parts)
+
+
+class CompactionStats:
+    """Running totals of prompt tokens saved by compaction"""
+
+    def __init__(self):
+        self.requests = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self.truncated = 0
+
+    def record(self, tokens_in: int, tokens_out: int, truncated: bool):
+        self.requests += 1
+        self.tokens_in += tokens_in
+        self.tokens_out += tokens_out
+        self.truncated += int(truncated)
+        cv_prompt_tokens.inc(tokens_in, stage="extracted")
+        cv_prompt_tokens.inc(tokens_out, stage="compacted")
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "tokens_in": self.tokens_in,
+            "tokens_out": self.tokens_out,
+            "tokens_saved": self.tokens_in - self.tokens_out,
+            "truncated": self.truncated,
+            "tokenizer": "tiktoken" if _get_encoder() else "estimate"
+        }
+
+
+compaction_stats = CompactionStats()
+
+
+def compact_cv_text(text: str, max_tokens: Optional[int] = None) -> Tuple[str, dict]:
+    """
+    Normalize extracted CV text, strip page headers/footers and fit it into
+    the token budget (CV_PROMPT_MAX_TOKENS by default). Returns the compact
+    text and a report of the tokens before and after.
+    """
+    max_tokens = settings.CV_PROMPT_MAX_TOKENS if max_tokens is None else max_tokens
+    tokens_in = count_tokens(text)
+
+    compact = strip_page_furniture(normalize_cv_text(text))
+    before_truncation = count_tokens(compact)
+    truncated = before_truncation > max_tokens
+    if truncated:
+        compact = truncate_sections(compact, max_tokens)
+
+    tokens_out = count_tokens(compact) if truncated else before_truncation
+    compaction_stats.record(tokens_in, tokens_out, truncated)
+    return compact, {
+        "tokens_in": tokens_in,
+        "tokens_out": tokens_out,
+        "tokens_saved": tokens_in - tokens_out,
+        "truncated": truncated
+    }
@@ -1,48 +1,22 @@
-from openai import OpenAI
 from app.config import settings
-import PyPDF2
-import docx
-import io
+from app.metrics import stage
+from app.services.compaction import compact_cv_text
+from app.services.extraction import document_extractor, extract_docx_text, extract_pdf_text
+from app.services.fast_extract import authoritative_fields, extract_fast_fields, merge_parsed, public_fields
+from app.services.json_stream import IncrementalJSONParser
+from app.services.llm import llm_client
+from app.services.parse_cache import CVParseCache, hash_bytes
+import asyncio
+import hashlib
 import json
+from typing import AsyncIterator, List, Tuple
 
 
-class CVParserService:
-    """Service for parsing CV files using OpenAI"""
-    
-    def __init__(self):
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
-    
-    def extract_text_from_pdf(self, file_content: bytes) -> str:
-        """Extract text from PDF file"""
-        try:
-            pdf_file = io.BytesIO(file_content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-            
-            return text
-        except Exception as e:
-            raise ValueError(f"Failed to extract text from PDF: {str(e)}")
-    
-    def extract_text_from_docx(self, file_content: bytes) -> str:
-        """Extract text from DOCX file"""
-        try:
-            doc_file = io.BytesIO(file_content)
-            doc = docx.Document(doc_file)
-            
-            text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
-            return text
-        except Exception as e:
-            raise ValueError(f"Failed to extract text from DOCX: {str(e)}")
-    
-    async def parse_cv_with_openai(self, cv_text: str) -> dict:
-        """
-        Parse CV text using OpenAI GPT to extract comprehensive structured information
-        """
-        try:
-            prompt = f"""
+CV_PARSE_MODEL = "gpt-3.5-turbo"
+
+CV_PARSE_SYSTEM_PROMPT = "You are a professional CV parser that extracts structured data from resumes."
+
+CV_PARSE_PROMPT = """
 You are an expert CV/Resume parser. Extract the following information from the CV text provided below and return it as a JSON object with these exact keys:
 
 - name: Full name of the candidate
@@ -79,42 +53,228 @@ CV Text:
 
 Return ONLY the JSON object, no additional text or explanation.
 """
-            
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a professional CV parser that extracts structured data from resumes."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=2000
-            )
-            
-            # Parse JSON from response
-            content = response.choices[0].message.content.strip()
-            
-            # Remove markdown code blocks if present
-            if content.startswith("```json"):
-                content = content[7:]
-            if content.startswith("```"):
-                content = content[3:]
-            if content.endswith("```"):
-                content = content[:-3]
-            content = content.strip()
-            
-            parsed_data = json.loads(content)
-            
-            # Validate required fields
-            if not parsed_data.get("name") or not parsed_data.get("title"):
-                raise ValueError("Failed to extract required fields (name, title)")
-            
+
+# Appended when the rule-based parse already found some fields
+KNOWN_FIELDS_PROMPT = "\nThese fields are already known; return null for them: {fields}\n"
+
+# Fields whose list items are streamed one by one by parse_file_stream
+STREAMED_ARRAYS = ("work_history",)
+
+# Bump when code that shapes a parse changes outside the prompt text: CV
+# compaction, the rule-based fields (fast_extract) or how they are merged
+PARSE_PIPELINE_VERSION = 2
+
+def prompt_version() -> str:
+    """
+    Changes whenever the model, prompt text, CV token budget or parse
+    pipeline changes, invalidating cached parses
+    """
+    return hashlib.sha256("\n".join([
+        CV_PARSE_MODEL,
+        CV_PARSE_SYSTEM_PROMPT,
+        CV_PARSE_PROMPT,
+        KNOWN_FIELDS_PROMPT,
+        str(settings.CV_PROMPT_MAX_TOKENS),
+        str(PARSE_PIPELINE_VERSION)
+    ]).encode("utf-8")).hexdigest()[:12]
+
+
+class CVParserService:
+    """Service for parsing CV files using OpenAI"""
+    
+    def __init__(self):
+        self.client = llm_client
+        self._cache = None
+        self.extractor = document_extractor
+    
+    @property
+    def cache(self) -> CVParseCache:
+        """The parse cache, created (and its prompt version computed) on first use"""
+        if self._cache is None:
+            self._cache = CVParseCache(prompt_version=prompt_version())
+        return self._cache
+    
+    def extract_text_from_pdf(self, file_content: bytes) -> str:
+        """Extract text from PDF file (in-process; prefer extract_text)"""
+        return extract_pdf_text(file_content)
+    
+    def extract_text_from_docx(self, file_content: bytes) -> str:
+        """Extract text from DOCX file (in-process; prefer extract_text)"""
+        return extract_docx_text(file_content)
+    
+    async def extract_text(self, file_content: bytes, filename: str, kind: str = None) -> str:
+        """Extract text based on sniffed kind (or file extension), off the event loop"""
+        return await self.extractor.extract(file_content, filename, kind=kind)
+    
+    async def parse_file(
+        self,
+        file_content: bytes,
+        filename: str,
+        on_stage=None,
+        kind: str = None,
+        file_hash: str = None,
+        on_provisional=None
+    ) -> dict:
+        """
+        Extract and parse an uploaded CV, reusing cached results for
+        identical files or identical extracted text.
+        on_stage is awaited with "extracting" and "parsing" as work starts.
+        on_provisional is awaited with the rule-based fields (see
+        fast_extract) as soon as the text is extracted, before the LLM call.
+        kind and file_hash may be passed when already known from ingestion.
+        """
+        file_hash = file_hash or hash_bytes(file_content)
+        
+        parsed_data = await self.cache.get_by_file(file_hash)
+        if parsed_data is not None:
             return parsed_data
+        
+        if on_stage:
+            await on_stage("extracting")
+        with stage("extract"):
+            cv_text = await self.extract_text(file_content, filename, kind=kind)
+        
+        provisional = extract_fast_fields(cv_text)
+        if on_provisional:
+            await on_provisional(public_fields(provisional))
+        
+        if on_stage:
+            await on_stage("parsing")
+        return await self.cache.get_or_parse(
+            cv_text,
+            lambda text: self.parse_cv_with_openai(text, provisional),
+            file_hash=file_hash
+        )
+    
+    async def parse_cv_with_openai(self, cv_text: str, provisional: dict = None) -> dict:
+        """
+        Parse CV text using OpenAI GPT to extract comprehensive structured information.
+        The rule-based fields (provisional, computed here if not given) fill
+        anything the model leaves empty and override it for contact details.
+        """
+        if provisional is None:
+            provisional = extract_fast_fields(cv_text)
+        
+        try:
+            messages = await self._build_messages(cv_text, provisional)
+            with stage("llm_parse"):
+                response = await self.client.chat_completion(
+                    model=CV_PARSE_MODEL,
+                    messages=messages,
+                    temperature=0.3,
+                    max_tokens=2000
+                )
+            return self._parse_response(response.choices[0].message.content, provisional)
             
         except json.JSONDecodeError as e:
             raise ValueError(f"Failed to parse OpenAI response as JSON: {str(e)}")
         except Exception as e:
             raise ValueError(f"OpenAI parsing error: {str(e)}")
-
+    
+    async def parse_file_stream(
+        self,
+        file_content: bytes,
+        filename: str,
+        kind: str = None,
+        file_hash: str = None
+    ) -> AsyncIterator[Tuple[str, dict]]:
+        """
+        Parse an uploaded CV like parse_file, yielding (event, data) pairs
+        as the work progresses:
+          ("stage", {"stage": "extracted" | "parsing"})
+          ("provisional", rule-based fields)
+          ("field", {"name": key, "value": value})   as each field is generated
+          ("work_history", {"index": i, "item": {...}})
+          ("result", the final parse)
+        Cached results are returned as a single "result". Concurrent streams
+        of the same CV are not coalesced.
+        """
+        file_hash = file_hash or hash_bytes(file_content)
+        
+        parsed_data = await self.cache.get_by_file(file_hash)
+        if parsed_data is not None:
+            yield "result", parsed_data
+            return
+        
+        with stage("extract"):
+            cv_text = await self.extract_text(file_content, filename, kind=kind)
+        yield "stage", {"stage": "extracted", "characters": len(cv_text)}
+        
+        provisional = extract_fast_fields(cv_text)
+        yield "provisional", public_fields(provisional)
+        
+        parsed_data = await self.cache.get_by_text(cv_text)
+        if parsed_data is None:
+            yield "stage", {"stage": "parsing"}
+            
+            parser = IncrementalJSONParser(stream_arrays=STREAMED_ARRAYS)
+            chunks = []
+            try:
+                messages = await self._build_messages(cv_text, provisional)
+                with stage("llm_parse"):
+                    async for chunk in self.client.chat_completion_stream(
+                        model=CV_PARSE_MODEL,
+                        messages=messages,
+                        temperature=0.3,
+                        max_tokens=2000
+                    ):
+                        chunks.append(chunk)
+                        for event in parser.feed(chunk):
+                            if event[0] == "item":
+                                yield event[1], {"index": event[2], "item": event[3]}
+                            elif event[1] not in STREAMED_ARRAYS and event[2] not in (None, "", []):
+                                # Rule-based contact details win, so don't flash the model's
+                                if event[1] in authoritative_fields(provisional):
+                                    continue
+                                yield "field", {"name": event[1], "value": event[2]}
+                
+                parsed_data = self._parse_response("".join(chunks), provisional)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Failed to parse OpenAI response as JSON: {str(e)}")
+            except Exception as e:
+                raise ValueError(f"OpenAI parsing error: {str(e)}")
+            
+            await self.cache.store(cv_text, parsed_data)
+        
+        await self.cache.store_file(file_hash, parsed_data)
+        yield "result", parsed_data
+    
+    async def _build_messages(self, cv_text: str, provisional: dict) -> List[dict]:
+        # Normalizing and budgeting the text keeps latency and cost in check
+        with stage("compact"):
+            cv_text, _ = await asyncio.to_thread(compact_cv_text, cv_text)
+        prompt = CV_PARSE_PROMPT.format(cv_text=cv_text)
+        
+        # No need for the model to transcribe what the regexes already found
+        known = authoritative_fields(provisional)
+        if known:
+            prompt += KNOWN_FIELDS_PROMPT.format(fields=", ".join(known))
+        
+        return [
+            {"role": "system", "content": CV_PARSE_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+    
+    @staticmethod
+    def _parse_response(content: str, provisional: dict) -> dict:
+        content = content.strip()
+        
+        # Remove markdown code blocks if present
+        if content.startswith("```json"):
+            content = content[7:]
+        if content.startswith("```"):
+            content = content[3:]
+        if content.endswith("```"):
+            content = content[:-3]
+        content = content.strip()
+        
+        parsed_data = merge_parsed(provisional, json.loads(content))
+        
+        # Validate required fields
+        if not parsed_data.get("name") or not parsed_data.get("title"):
+            raise ValueError("Failed to extract required fields (name, title)")
+        
+        return parsed_data
 
 # Singleton instance
 cv_parser = CVParserService()
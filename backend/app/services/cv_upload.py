@@ -0,0 +1,234 @@
+import asyncio
+import uuid
+from typing import Awaitable, Callable, Optional, Tuple
+from app.metrics import cv_storage_events, stage
+from app.repositories.personas import PersonaRepository
+from app.services.cv_parser import cv_parser
+from app.services.parse_cache import hash_bytes
+from app.services.persona_cache import persona_cache
+
+
+StageCallback = Callable[[str], Awaitable[None]]
+
+# Cleanup of CVs orphaned by a failed or cancelled upload; referenced here
+# so they finish even though nothing awaits them
+_cleanup_tasks = set()
+
+
+def cleanup_in_background(cleanup: Awaitable[None]):
+    """Run a cleanup to completion even though the request that needs it is gone"""
+    task = asyncio.create_task(cleanup)
+    _cleanup_tasks.add(task)
+    task.add_done_callback(_cleanup_tasks.discard)
+
+
+def cv_blob_path(user_id: str, file_hash: str, file_name: str, kind: Optional[str] = None) -> str:
+    """
+    Where a CV is stored: {user_id}/blobs/{sha256}.{ext}. Content-addressed,
+    so personas created from the same file share one object.
+    """
+    file_extension = kind or file_name.split('.')[-1]
+    return f"{user_id}/blobs/{file_hash}.{file_extension}"
+
+
+def build_persona_data(user_id: str, parsed_data: dict, file_name: str) -> dict:
+    """Map parsed CV fields onto a personas row (is_active is set on insert)"""
+    return {
+        "user_id": user_id,
+        "name": parsed_data.get("name", "Unknown"),
+        "title": parsed_data.get("title", "Professional"),
+        "location": parsed_data.get("location"),
+        "avatar_url": None,
+        "experience_level": parsed_data.get("experience_level"),
+        "skills": parsed_data.get("skills", []),
+        "salary_min": parsed_data.get("salary_min"),
+        "salary_max": parsed_data.get("salary_max"),
+        "email": parsed_data.get("email"),
+        "phone": parsed_data.get("phone"),
+        "summary": parsed_data.get("summary"),
+        "roles": parsed_data.get("roles", []),
+        "job_search_location": parsed_data.get("job_search_location"),
+        "education": parsed_data.get("education"),
+        "work_history": parsed_data.get("work_history", []),
+        "gender": parsed_data.get("gender"),
+        "areas_of_improvement": parsed_data.get("areas_of_improvement", []),
+        "cv_file_name": file_name,
+        "cv_file_url": None,  # Set by the caller once the file is stored
+        "cv_storage_path": None,
+        "market_demand": "medium",
+        "global_matches": 0,
+        "confidence_score": 0.0
+    }
+
+
+async def create_persona_from_cv(
+    user_id: str,
+    file_name: str,
+    content_type: Optional[str],
+    file_content: bytes,
+    admin_repo: PersonaRepository,
+    on_stage: Optional[StageCallback] = None,
+    kind: Optional[str] = None,
+    file_hash: Optional[str] = None,
+    on_provisional: Optional[Callable[[dict], Awaitable[None]]] = None
+) -> dict:
+    """
+    Complete CV upload flow: extract, parse, create the persona and store
+    the file. Used by both the synchronous endpoint and the job workers.
+    on_provisional receives the rule-based fields before the LLM parse.
+
+    The file's storage path depends only on its content, so it is stored
+    (or found already stored) while the CV is parsed. The persona is then
+    inserted once, with its final cv_file_url, and the file is checked
+    again (see ensure_cv_stored). If no persona is created, a file uploaded
+    for it is removed again.
+    """
+    persona_id = str(uuid.uuid4())
+    storage_path = cv_blob_path(user_id, file_hash or hash_bytes(file_content), file_name, kind)
+    upload = asyncio.create_task(store_cv(storage_path, file_content, content_type, admin_repo))
+
+    try:
+        # Extract text and parse with OpenAI (cached by file and text hash)
+        parsed_data = await cv_parser.parse_file(
+            file_content,
+            file_name,
+            on_stage=on_stage,
+            kind=kind,
+            file_hash=file_hash,
+            on_provisional=on_provisional
+        )
+
+        if on_stage:
+            await on_stage("saving")
+    except BaseException:
+        # Including cancellation (client disconnect): the upload may still
+        # be running, so clean up in the background once it is done
+        cleanup_in_background(discard_cv(upload, user_id, storage_path, admin_repo))
+        raise
+
+    # Once parsing is done, finish the writes even if the client goes away,
+    # so a disconnect can't leave a persona without its stored CV
+    try:
+        return await asyncio.shield(_save_persona(
+            user_id, persona_id, parsed_data, file_name, upload, storage_path, file_content, content_type, admin_repo
+        ))
+    finally:
+        await persona_cache.invalidate(user_id)
+
+
+async def store_cv(
+    storage_path: str,
+    file_content: bytes,
+    content_type: Optional[str],
+    admin_repo: PersonaRepository
+) -> Optional[Tuple[str, bool]]:
+    """
+    Make sure the CV is stored, skipping the upload if an identical file
+    already is. Returns its URL and whether it was uploaded now, or None if
+    storage failed.
+    """
+    try:
+        with stage("storage_upload"):
+            if await admin_repo.cv_file_exists(storage_path):
+                cv_storage_events.inc(event="reused")
+                return admin_repo.cv_file_url(storage_path), False
+            file_url = await admin_repo.upload_cv_file(storage_path, file_content, content_type)
+        cv_storage_events.inc(event="uploaded")
+        return file_url, True
+    except Exception as storage_error:
+        # The persona is still created, just without its CV file
+        cv_storage_events.inc(event="upload_failed")
+        print(f"Storage upload failed: {str(storage_error)}")
+        return None
+
+
+async def ensure_cv_stored(
+    storage_path: str,
+    file_content: bytes,
+    content_type: Optional[str],
+    admin_repo: PersonaRepository
+):
+    """
+    Re-upload a CV that went missing before the persona using it was saved.
+    A concurrent delete (or failed upload) of the last persona with the
+    same file removes the object once it sees no reference to it, which
+    can happen after this upload found it stored but before the new
+    persona was inserted. Checked after the insert: a removal that checks
+    references later sees the new persona and keeps the file, and one past
+    that check has almost always removed it by now (what is left is the
+    removal request itself still being in flight).
+    """
+    try:
+        if not await admin_repo.cv_file_exists(storage_path):
+            print(f"CV file {storage_path} was removed while saving; uploading it again")
+            await admin_repo.upload_cv_file(storage_path, file_content, content_type)
+            cv_storage_events.inc(event="reuploaded")
+    except Exception as storage_error:
+        # The persona may now point at a missing file
+        cv_storage_events.inc(event="check_failed")
+        print(f"Failed to check CV file {storage_path}: {str(storage_error)}")
+
+
+async def release_cv(user_id: str, storage_path: str, admin_repo: PersonaRepository):
+    """
+    Remove a stored CV unless a persona uses it. References are checked
+    right before removing; uploads that race with this re-check the file
+    once their persona is saved (see ensure_cv_stored).
+    """
+    try:
+        if await admin_repo.cv_file_referenced(user_id, storage_path):
+            cv_storage_events.inc(event="kept")
+            return
+        await admin_repo.remove_cv_files([storage_path])
+        cv_storage_events.inc(event="removed")
+    except Exception as cleanup_error:
+        # Left behind as an orphan
+        cv_storage_events.inc(event="remove_failed")
+        print(f"Failed to remove CV file {storage_path}: {str(cleanup_error)}")
+
+
+async def discard_cv(
+    upload: "asyncio.Task[Optional[Tuple[str, bool]]]",
+    user_id: str,
+    storage_path: str,
+    admin_repo: PersonaRepository
+):
+    """Wait for the upload of a persona that won't be created and release what it stored"""
+    stored = await upload
+    if stored is not None and stored[1]:
+        await release_cv(user_id, storage_path, admin_repo)
+
+
+async def _save_persona(
+    user_id: str,
+    persona_id: str,
+    parsed_data: dict,
+    file_name: str,
+    upload: "asyncio.Task[Optional[Tuple[str, bool]]]",
+    storage_path: str,
+    file_content: bytes,
+    content_type: Optional[str],
+    admin_repo: PersonaRepository
+) -> dict:
+    stored = await upload
+    persona_data = build_persona_data(user_id, parsed_data, file_name)
+    persona_data["id"] = persona_id
+    if stored is not None:
+        persona_data["cv_file_url"] = stored[0]
+        persona_data["cv_storage_path"] = storage_path
+
+    # Insert persona into database using admin client to bypass RLS; the
+    # database makes it active if it is the user's first
+    try:
+        with stage("persona_insert"):
+            persona = await admin_repo.create(user_id, persona_data)
+        if not persona:
+            raise ValueError("Failed to create persona")
+    except Exception:
+        if stored is not None and stored[1]:
+            await release_cv(user_id, storage_path, admin_repo)
+        raise
+
+    if stored is not None:
+        await ensure_cv_stored(storage_path, file_content, content_type, admin_repo)
+    return persona
@@ -0,0 +1,223 @@
+import asyncio
+import io
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional, Set, Tuple
+from app.config import settings
+
+
+# Worker-side functions: these run in the extraction processes, so they
+# must stay importable at module level and avoid touching app state.
+
+def _limit_worker_memory(memory_limit_mb: int):
+    """Cap the worker's address space so a hostile document can't exhaust RAM"""
+    try:
+        import resource
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError):
+        # Not supported on this platform; rely on the timeout alone
+        pass
+
+
+def _preload_parsers():
+    """Import the document libraries ahead of the first real extraction"""
+    import docx
+    import PyPDF2
+
+
+def extract_pdf_text(file_content: bytes, max_pages: Optional[int] = None) -> str:
+    """Extract text from PDF file"""
+    import PyPDF2
+
+    try:
+        pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_content))
+        pages = pdf_reader.pages
+        page_count = len(pages) if max_pages is None else min(len(pages), max_pages)
+
+        # Join once at the end instead of repeated string concatenation; the
+        # form feed between pages lets compaction spot headers and footers
+        return "\f".join(pages[i].extract_text() or "" for i in range(page_count))
+    except Exception as e:
+        raise ValueError(f"Failed to extract text from PDF: {str(e)}")
+
+
+def extract_docx_text(file_content: bytes) -> str:
+    """Extract text from DOCX file"""
+    import docx
+
+    try:
+        doc = docx.Document(io.BytesIO(file_content))
+        return "\n".join(paragraph.text for paragraph in doc.paragraphs)
+    except Exception as e:
+        raise ValueError(f"Failed to extract text from DOCX: {str(e)}")
+
+
+def document_kind(filename: str) -> str:
+    """Fallback document kind from a file extension"""
+    if filename.lower().endswith('.pdf'):
+        return "pdf"
+    if filename.lower().endswith(('.docx', '.doc')):
+        return "docx"
+    return "txt"
+
+
+def extract_document_text(file_content: bytes, kind: str, max_pages: Optional[int] = None) -> str:
+    """Extract text for a document kind ('pdf', 'docx' or 'txt')"""
+    if kind == "pdf":
+        return extract_pdf_text(file_content, max_pages)
+    if kind == "docx":
+        return extract_docx_text(file_content)
+    try:
+        return str(file_content, 'utf-8')
+    except UnicodeDecodeError as e:
+        raise ValueError(f"Failed to decode text file: {str(e)}")
+
+
+class DocumentExtractor:
+    """
+    Runs CPU-bound PDF/DOCX parsing in a process pool, with a per-document
+    timeout, a page cap and a per-worker memory limit.
+
+    At most EXTRACT_MAX_WORKERS documents are handed to the pool at a time,
+    so the timeout only counts time spent running, not waiting for a
+    worker. ProcessPoolExecutor can't abort a running task, so a document
+    that times out retires its pool: new work goes to a fresh pool, and the
+    old one's workers are killed once its other documents have finished.
+    A cancelled extraction (client disconnect) is left to finish or time
+    out without affecting anyone else's.
+    """
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        # Documents running in each pool, and those given up on (timed out)
+        self._running: Dict[ProcessPoolExecutor, Set[Future]] = {}
+        self._abandoned: Set[Future] = set()
+        self._retired: Set[ProcessPoolExecutor] = set()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # A worker killed by its memory limit breaks the whole pool
+        if self._pool is None or self._pool._broken:
+            self._pool = ProcessPoolExecutor(
+                max_workers=settings.EXTRACT_MAX_WORKERS,
+                # spawn: forking a process that owns DB/HTTP threads is unsafe
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_limit_worker_memory,
+                initargs=(settings.EXTRACT_MEMORY_LIMIT_MB,)
+            )
+        return self._pool
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(settings.EXTRACT_MAX_WORKERS)
+        return self._slots
+
+    @staticmethod
+    def _kill(pool: ProcessPoolExecutor):
+        for process in list((pool._processes or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _retire(self, pool: ProcessPoolExecutor):
+        """Send new work to a fresh pool and kill this one once it drains"""
+        if self._pool is pool:
+            self._pool = None
+        self._retired.add(pool)
+        self._kill_if_drained(pool)
+
+    def _kill_if_drained(self, pool: ProcessPoolExecutor):
+        running = self._running.get(pool, set())
+        if pool in self._retired and running <= self._abandoned:
+            self._retired.discard(pool)
+            self._running.pop(pool, None)
+            self._kill(pool)
+
+    def _time_out(self, pool: ProcessPoolExecutor, job: Future):
+        if job.done() or job in self._abandoned:
+            return
+        # The worker is stuck on it: free its slot and retire the pool
+        self._abandoned.add(job)
+        self._get_slots().release()
+        self._retire(pool)
+
+    def _finished(self, pool: ProcessPoolExecutor, job: Future, watchdog: asyncio.TimerHandle):
+        watchdog.cancel()
+        self._running.get(pool, set()).discard(job)
+        if job in self._abandoned:
+            self._abandoned.discard(job)
+        else:
+            self._get_slots().release()
+        self._kill_if_drained(pool)
+
+    async def _submit(self, file_content: bytes, kind: str) -> Tuple[ProcessPoolExecutor, Future]:
+        """Wait for a free worker, then start extracting; the timeout runs from here"""
+        loop = asyncio.get_running_loop()
+        slots = self._get_slots()
+        await slots.acquire()
+        try:
+            pool = self._get_pool()
+            job = pool.submit(extract_document_text, file_content, kind, settings.EXTRACT_MAX_PAGES)
+        except BaseException:
+            slots.release()
+            raise
+
+        self._running.setdefault(pool, set()).add(job)
+        # Enforced even if the caller stops waiting
+        watchdog = loop.call_later(settings.EXTRACT_TIMEOUT_SECONDS, self._time_out, pool, job)
+        job.add_done_callback(lambda _: loop.call_soon_threadsafe(self._finished, pool, job, watchdog))
+        return pool, job
+
+    def shutdown(self):
+        pools = set(self._running) | self._retired | ({self._pool} if self._pool else set())
+        self._pool = None
+        self._running.clear()
+        self._abandoned.clear()
+        self._retired.clear()
+        for pool in pools:
+            self._kill(pool)
+
+    async def warm_up(self):
+        """Start the worker processes and have each import the parsers"""
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        await asyncio.gather(*(
+            loop.run_in_executor(pool, _preload_parsers)
+            for _ in range(settings.EXTRACT_MAX_WORKERS)
+        ))
+
+    async def extract(self, file_content: bytes, filename: str, kind: Optional[str] = None) -> str:
+        """
+        Extract a document's text without blocking the event loop.
+        kind is the sniffed type; the filename extension is only a fallback.
+        """
+        kind = kind or document_kind(filename)
+
+        # Plain text needs no parsing
+        if kind == "txt":
+            return extract_document_text(file_content, kind)
+
+        for attempt in range(2):
+            pool, job = await self._submit(file_content, kind)
+            result = asyncio.wrap_future(job)
+            # Nobody reads it if the caller was cancelled
+            result.add_done_callback(lambda f: f.cancelled() or f.exception())
+            try:
+                # Shielded: cancelling the caller must not cancel the job,
+                # which keeps its worker (and slot) until it ends or times out
+                return await asyncio.wait_for(asyncio.shield(result), timeout=settings.EXTRACT_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                self._time_out(pool, job)
+                raise ValueError("Timed out extracting text from document")
+            except BrokenProcessPool:
+                # A worker blew through the memory limit (or its pool was
+                # killed); retry once on a fresh pool
+                if attempt == 1:
+                    raise ValueError("Document extraction failed (worker exceeded its resource limits)")
+            except MemoryError:
+                raise ValueError("Document is too large to extract")
+
+
+# Singleton instance
+document_extractor = DocumentExtractor()
@@ -0,0 +1,188 @@
+import re
+from typing import List, Optional, Tuple
+
+
+# Fields taken from the rule-based result even when the model returns a
+# value: regexes get these exactly right, the model sometimes mangles them.
+# Only applies when the match was unambiguous (see authoritative_fields)
+AUTHORITATIVE_FIELDS = ("email", "phone")
+
+MAX_SKILLS = 15
+
+# Canonical spelling of skills worth matching literally. Ambiguous short
+# words ("go", "r", "c") are left to the model.
+SKILLS = [
+    "Python", "Java", "JavaScript", "TypeScript", "C++", "C#", "Ruby", "PHP", "Swift", "Kotlin",
+    "Scala", "Rust", "Golang", "Objective-C", "Dart", "Perl", "MATLAB", "Elixir", "Haskell", "Bash",
+    "SQL", "PostgreSQL", "MySQL", "SQLite", "MongoDB", "Redis", "Cassandra", "DynamoDB", "Elasticsearch",
+    "Snowflake", "BigQuery", "Oracle", "SQL Server", "Supabase", "Firebase",
+    "React", "React Native", "Angular", "Vue.js", "Next.js", "Node.js", "Express", "Django", "Flask",
+    "FastAPI", "Spring Boot", "Ruby on Rails", "Laravel", ".NET", "ASP.NET", "jQuery", "Redux",
+    "GraphQL", "REST", "gRPC", "HTML", "CSS", "Sass", "Tailwind CSS", "Flutter", "Expo",
+    "AWS", "Azure", "GCP", "Google Cloud", "Docker", "Kubernetes", "Terraform", "Ansible", "Jenkins",
+    "GitHub Actions", "GitLab CI", "CI/CD", "Linux", "Git", "Nginx", "Kafka", "RabbitMQ", "Spark",
+    "Hadoop", "Airflow", "dbt", "Microservices", "Serverless",
+    "Machine Learning", "Deep Learning", "NLP", "Computer Vision", "TensorFlow", "PyTorch",
+    "scikit-learn", "Pandas", "NumPy", "LLM", "Data Analysis", "Data Engineering", "Tableau", "Power BI",
+    "Excel", "Statistics",
+    "Figma", "Sketch", "Adobe XD", "Photoshop", "Illustrator", "UX Design", "UI Design", "User Research",
+    "Agile", "Scrum", "Kanban", "Jira", "Confluence", "Product Management", "Project Management",
+    "Stakeholder Management", "SEO", "Google Analytics", "Salesforce", "HubSpot", "SAP",
+    "Unit Testing", "Selenium", "Cypress", "Jest", "Pytest", "TDD"
+]
+
+# Longest first so "React Native" wins over "React"
+_SKILL_RE = re.compile(
+    r"(?<![\w+#.])(" + "|".join(re.escape(skill.lower()) for skill in sorted(SKILLS, key=len, reverse=True)) + r")(?![\w+#])"
+)
+_SKILL_NAMES = {skill.lower(): skill for skill in SKILLS}
+
+_EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+_PHONE_RE = re.compile(r"(?:\+|00)?\(?\d[\d\s().-]{7,18}\d")
+_PHONE_LABEL_RE = re.compile(
+    r"(?:\b(?:phone|telephone|tel|mobile|mob|cell|ph)\b\.?(?:\s*(?:no\.?|number))?\s*[:\-–]?|\b[tmp]\s*:)\s*$",
+    re.IGNORECASE
+)
+_YEAR_RE = re.compile(r"(?:19|20)\d\d")
+_NAME_RE = re.compile(r"^[A-Z][A-Za-z'’.-]+(?: [A-Z][A-Za-z'’.-]+){1,3}$")
+
+# Calling code -> country, as in the parse prompt's location fallback.
+# +1 (USA/Canada) and +7 (Russia/Kazakhstan) are ambiguous and left out.
+COUNTRY_CODES = {
+    "20": "Egypt", "27": "South Africa", "30": "Greece", "31": "Netherlands", "32": "Belgium",
+    "33": "France", "34": "Spain", "36": "Hungary", "39": "Italy", "40": "Romania", "41": "Switzerland",
+    "43": "Austria", "44": "UK", "45": "Denmark", "46": "Sweden", "47": "Norway", "48": "Poland",
+    "49": "Germany", "51": "Peru", "52": "Mexico", "54": "Argentina", "55": "Brazil", "56": "Chile",
+    "57": "Colombia", "60": "Malaysia", "61": "Australia", "62": "Indonesia", "63": "Philippines",
+    "64": "New Zealand", "65": "Singapore", "66": "Thailand", "81": "Japan", "82": "South Korea",
+    "84": "Vietnam", "86": "China", "90": "Turkey", "91": "India", "92": "Pakistan", "94": "Sri Lanka",
+    "234": "Nigeria", "254": "Kenya", "351": "Portugal", "353": "Ireland", "358": "Finland",
+    "380": "Ukraine", "420": "Czech Republic", "880": "Bangladesh", "966": "Saudi Arabia",
+    "971": "United Arab Emirates", "972": "Israel", "974": "Qatar"
+}
+
+
+def find_email(text: str) -> Optional[str]:
+    match = _EMAIL_RE.search(text)
+    return match.group(0).rstrip(".") if match else None
+
+
+def find_phone_match(text: str) -> Tuple[Optional[str], bool]:
+    """
+    The first phone number in the text, and whether it is unambiguous.
+
+    A match must be phone-shaped: start with +, 00 or 0, or follow a label
+    such as "Phone:", "Tel" or "M:". Runs with a year-like digit group are
+    skipped (date ranges such as 01.2019 - 12.2021), except after a +.
+    International or labelled numbers are confident; a number that only
+    starts with 0 is returned as a fallback, but not as confident.
+    """
+    fallback = None
+    for match in _PHONE_RE.finditer(text):
+        candidate = match.group(0).strip()
+        digits = re.sub(r"\D", "", candidate)
+        if not 9 <= len(digits) <= 15:
+            continue
+        if not candidate.startswith("+") and any(_YEAR_RE.fullmatch(group) for group in re.findall(r"\d+", candidate)):
+            continue
+
+        phone = re.sub(r"\s+", " ", candidate)
+        labelled = _PHONE_LABEL_RE.search(text[max(0, match.start() - 30):match.start()]) is not None
+        if labelled or candidate.startswith(("+", "00")):
+            return phone, True
+        if fallback is None and candidate.lstrip("(").startswith("0"):
+            fallback = phone
+    return fallback, False
+
+
+def find_phone(text: str) -> Optional[str]:
+    """The first phone number in the text (see find_phone_match)"""
+    return find_phone_match(text)[0]
+
+
+def country_from_phone(phone: Optional[str]) -> Optional[str]:
+    """Country for an international number (+44 ... or 0044 ...), if unambiguous"""
+    if not phone:
+        return None
+    digits = re.sub(r"\D", "", phone)
+    if not phone.startswith("+"):
+        if not digits.startswith("00"):
+            return None
+        digits = digits[2:]
+    for length in (3, 2):
+        country = COUNTRY_CODES.get(digits[:length])
+        if country:
+            return country
+    return None
+
+
+def find_skills(text: str) -> List[str]:
+    """Dictionary skills mentioned in the text, in order of first mention"""
+    found = []
+    for match in _SKILL_RE.finditer(text.lower()):
+        skill = _SKILL_NAMES[match.group(1)]
+        if skill not in found:
+            found.append(skill)
+            if len(found) >= MAX_SKILLS:
+                break
+    return found
+
+
+def find_name_and_title(text: str):
+    """
+    CVs usually open with the candidate's name, then their title. Returns
+    (name, title); either may be None.
+    """
+    lines = [line.strip() for line in text.split("\n")[:10] if line.strip()]
+    for i, line in enumerate(lines):
+        if _NAME_RE.match(line):
+            title = lines[i + 1] if i + 1 < len(lines) else None
+            if title and (len(title) > 60 or "@" in title or re.search(r"\d{3}", title)):
+                title = None
+            return line, title
+    return None, None
+
+
+def extract_fast_fields(cv_text: str) -> dict:
+    """
+    Rule-based parse that runs in milliseconds: contact details, a country
+    from the phone's calling code, dictionary skills and a name/title guess.
+    Same keys as the LLM parse; anything not found is None (or empty).
+    """
+    email = find_email(cv_text)
+    phone, phone_confident = find_phone_match(cv_text)
+    name, title = find_name_and_title(cv_text)
+    return {
+        "name": name,
+        "title": title,
+        "email": email,
+        "phone": phone,
+        "location": country_from_phone(phone),
+        "skills": find_skills(cv_text),
+        # Which of the AUTHORITATIVE_FIELDS found were matched unambiguously
+        "confident": [field for field, confident in (("email", bool(email)), ("phone", phone_confident)) if confident]
+    }
+
+
+def authoritative_fields(provisional: dict) -> List[str]:
+    """The AUTHORITATIVE_FIELDS a rule-based result found unambiguously"""
+    confident = provisional.get("confident") or ()
+    return [field for field in AUTHORITATIVE_FIELDS if provisional.get(field) and field in confident]
+
+
+def public_fields(provisional: dict) -> dict:
+    """A rule-based result without its internal bookkeeping, as shown to clients"""
+    return {key: value for key, value in provisional.items() if key != "confident"}
+
+
+def merge_parsed(provisional: dict, parsed: dict) -> dict:
+    """
+    The model's fields over the rule-based ones: anything the model left
+    empty keeps the fast-path value, and authoritative_fields keep the
+    fast-path value whenever it was matched unambiguously.
+    """
+    merged = {key: value for key, value in public_fields(provisional).items() if value not in (None, "", [])}
+    merged.update({key: value for key, value in parsed.items() if value not in (None, "", [])})
+    for key in authoritative_fields(provisional):
+        merged[key] = provisional[key]
+    return {**parsed, **merged}
@@ -0,0 +1,163 @@
+import hashlib
+import io
+import zipfile
+from typing import List, Optional
+from fastapi import UploadFile
+
+
+CHUNK_SIZE = 64 * 1024
+
+# Sniffed document kinds and the MIME type stored alongside them
+CONTENT_TYPES = {
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "txt": "text/plain; charset=utf-8",
+    "zip": "application/zip",
+}
+
+
+class UploadTooLargeError(ValueError):
+    pass
+
+
+class UnsupportedFileTypeError(ValueError):
+    pass
+
+
+class IngestedFile:
+    """
+    An upload read in chunks: hashed as it arrived, size-checked and typed
+    from its magic bytes. The content is held in one buffer; use `view` for
+    zero-copy access and `content` when an immutable bytes object is needed.
+    """
+
+    def __init__(self, filename: str, kind: str, buffer: bytearray, sha256: str):
+        self.filename = filename
+        self.kind = kind
+        self.content_type = CONTENT_TYPES[kind]
+        self.sha256 = sha256
+        self.size = len(buffer)
+        self._buffer = buffer
+        self._content: Optional[bytes] = None
+
+    @property
+    def view(self) -> memoryview:
+        return memoryview(self._content if self._content is not None else self._buffer)
+
+    @property
+    def content(self) -> bytes:
+        # Materialized once; every consumer shares the same object
+        if self._content is None:
+            self._content = bytes(self._buffer)
+            self._buffer = bytearray()
+        return self._content
+
+
+def kind_from_content_type(content_type: Optional[str]) -> Optional[str]:
+    """Map a stored (sniffed) MIME type back to its document kind"""
+    for kind, mime in CONTENT_TYPES.items():
+        if mime == content_type:
+            return kind
+    return None
+
+
+def sniff_kind(head: bytes, data: memoryview) -> Optional[str]:
+    """Identify a document from its leading bytes rather than its filename"""
+    if head.startswith(b"%PDF-"):
+        return "pdf"
+
+    if head.startswith(b"PK\x03\x04"):
+        # DOCX is a zip container; anything else zipped is an archive
+        try:
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                if "word/document.xml" in archive.namelist():
+                    return "docx"
+                return "zip"
+        except zipfile.BadZipFile:
+            return None
+
+    # Legacy binary .doc (OLE2) and other binaries aren't supported
+    if b"\x00" in head:
+        return None
+    try:
+        bytes(data[:CHUNK_SIZE]).decode("utf-8")
+    except UnicodeDecodeError as e:
+        # A multi-byte character may straddle the sniffing window
+        if e.start < min(len(data), CHUNK_SIZE) - 3:
+            return None
+    return "txt"
+
+
+async def ingest_upload(
+    file: UploadFile,
+    max_bytes: int,
+    allowed_kinds: tuple = ("pdf", "docx", "txt")
+) -> IngestedFile:
+    """
+    Read an UploadFile chunk by chunk, hashing as it arrives and aborting
+    as soon as max_bytes is crossed
+    """
+    buffer = bytearray()
+    hasher = hashlib.sha256()
+
+    while True:
+        chunk = await file.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        if len(buffer) + len(chunk) > max_bytes:
+            raise UploadTooLargeError(f"File size must be less than {max_bytes // (1024 * 1024)}MB")
+        hasher.update(chunk)
+        buffer += chunk
+
+    kind = _check_kind(buffer, allowed_kinds)
+    return IngestedFile(file.filename or f"cv.{kind}", kind, buffer, hasher.hexdigest())
+
+
+def ingest_bytes(filename: str, data: bytes, allowed_kinds: tuple = ("pdf", "docx", "txt")) -> IngestedFile:
+    """Build an IngestedFile from content that is already in memory"""
+    buffer = bytearray(data)
+    kind = _check_kind(buffer, allowed_kinds)
+    return IngestedFile(filename, kind, buffer, hashlib.sha256(buffer).hexdigest())
+
+
+def _check_kind(buffer: bytearray, allowed_kinds: tuple) -> str:
+    if not buffer:
+        raise UnsupportedFileTypeError("Uploaded file is empty")
+
+    kind = sniff_kind(bytes(buffer[:8]), memoryview(buffer))
+    if kind is None or kind not in allowed_kinds:
+        names = [k.upper() for k in allowed_kinds if k != "zip"]
+        names = ", ".join(names[:-1]) + " and " + names[-1] if len(names) > 1 else names[0]
+        raise UnsupportedFileTypeError(f"Only {names} files are supported")
+    return kind
+
+
+def expand_archive(archive_file: IngestedFile, max_member_bytes: int, max_files: int) -> List[tuple]:
+    """
+    Unpack a zip of CVs. Returns (filename, IngestedFile or error message)
+    pairs; member sizes are checked before decompression to defuse zip bombs.
+    """
+    results = []
+    with zipfile.ZipFile(io.BytesIO(archive_file.view)) as archive:
+        members = [
+            info for info in archive.infolist()
+            if not info.is_dir() and not info.filename.startswith("__MACOSX/")
+            and not info.filename.rsplit("/", 1)[-1].startswith(".")
+        ]
+        if len(members) > max_files:
+            raise ValueError(f"Archive contains more than {max_files} files")
+
+        for info in members:
+            filename = info.filename.rsplit("/", 1)[-1]
+            if info.file_size > max_member_bytes:
+                results.append((filename, f"File size must be less than {max_member_bytes // (1024 * 1024)}MB"))
+                continue
+            try:
+                with archive.open(info) as member:
+                    data = member.read(max_member_bytes + 1)
+                if len(data) > max_member_bytes:
+                    raise UploadTooLargeError(f"File size must be less than {max_member_bytes // (1024 * 1024)}MB")
+                results.append((filename, ingest_bytes(filename, data)))
+            except (ValueError, zipfile.BadZipFile) as e:
+                results.append((filename, str(e)))
+    return results
@@ -0,0 +1,121 @@
+import math
+from array import array
+from typing import Dict, Iterable, Optional, Tuple
+import numpy as np
+
+
+class InvertedIndex:
+    """
+    Term -> document-slot postings in a compact, array-backed layout.
+
+    The bulk of the postings live in a merged CSC base: one int32 array of
+    slots grouped by term, plus an offsets array (the slots for term t are
+    base_slots[base_ptr[t]:base_ptr[t + 1]]). Documents added since the last
+    merge go into small per-term delta arrays. Removal is the caller's job:
+    it masks dead slots out at query time and passes a slot remap to merge()
+    to drop them for good.
+    """
+
+    def __init__(self):
+        self.vocab: Dict[str, int] = {}
+        self._base_ptr = np.zeros(1, dtype=np.int64)
+        self._base_slots = np.empty(0, dtype=np.int32)
+        self._delta: Dict[int, array] = {}
+        self.delta_size = 0
+
+    def add(self, slot: int, terms: Iterable[str]):
+        """Index a document's (unique) terms under its slot"""
+        for term in terms:
+            term_id = self.vocab.setdefault(term, len(self.vocab))
+            postings = self._delta.get(term_id)
+            if postings is None:
+                postings = self._delta[term_id] = array("i")
+            postings.append(slot)
+            self.delta_size += 1
+
+    def postings(self, term: str) -> np.ndarray:
+        """Sorted slots containing a term (including slots removed since the last merge)"""
+        term_id = self.vocab.get(term)
+        if term_id is None:
+            return np.empty(0, dtype=np.int32)
+
+        parts = []
+        if term_id + 1 < len(self._base_ptr):
+            parts.append(self._base_slots[self._base_ptr[term_id]:self._base_ptr[term_id + 1]])
+        delta = self._delta.get(term_id)
+        if delta is not None:
+            # Copied: a live view would stop the array from growing
+            parts.append(np.frombuffer(delta, dtype=np.int32).copy())
+        if not parts:
+            return np.empty(0, dtype=np.int32)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def idf(self, term: str, doc_count: int) -> float:
+        """Inverse document frequency; rare (or unseen) terms count for more"""
+        return math.log((doc_count + 1) / (len(self.postings(term)) + 1)) + 1.0
+
+    def accumulate(self, weights: Dict[str, float], size: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sparse matrix-vector product with a query {term: weight}: returns the
+        sorted slots that contain any query term and their summed weights.
+        Only the query terms' postings are read; pass size (the slot count)
+        to let very common terms use a dense accumulator instead of a sort.
+        """
+        postings = [(self.postings(term), weight) for term, weight in weights.items()]
+        postings = [(slots, weight) for slots, weight in postings if len(slots)]
+        if not postings:
+            return np.empty(0, dtype=np.int32), np.empty(0)
+
+        slots = np.concatenate([slots for slots, _ in postings])
+        values = np.repeat([weight for _, weight in postings], [len(slots) for slots, _ in postings])
+
+        if size and len(slots) * 8 > size:
+            sums = np.bincount(slots, weights=values, minlength=size)
+            hit = np.flatnonzero(sums)
+            return hit, sums[hit]
+
+        unique, inverse = np.unique(slots, return_inverse=True)
+        return unique, np.bincount(inverse, weights=values)
+
+    def merge(self, remap: Optional[np.ndarray] = None):
+        """
+        Fold the delta postings into the base. remap (old slot -> new slot,
+        -1 for removed documents) renumbers the slots while merging.
+        """
+        counts = np.diff(self._base_ptr)
+        term_ids = [np.repeat(np.arange(len(counts), dtype=np.int32), counts)]
+        slots = [self._base_slots]
+        for term_id, postings in self._delta.items():
+            term_ids.append(np.full(len(postings), term_id, dtype=np.int32))
+            slots.append(np.frombuffer(postings, dtype=np.int32))
+        term_ids = np.concatenate(term_ids)
+        slots = np.concatenate(slots)
+
+        if remap is not None:
+            slots = remap[slots]
+            live = slots >= 0
+            term_ids = term_ids[live]
+            slots = slots[live].astype(np.int32)
+
+        # Stable sort keeps each term's postings in slot order
+        order = np.argsort(term_ids, kind="stable")
+        self._base_slots = slots[order]
+        self._base_ptr = np.concatenate(([0], np.cumsum(np.bincount(term_ids, minlength=len(self.vocab)))))
+        self._delta = {}
+        self.delta_size = 0
+
+
+def lookup(slots: np.ndarray, values: np.ndarray, wanted: np.ndarray) -> np.ndarray:
+    """Values for the wanted slots from a sorted (slots, values) pair; 0 where absent"""
+    if not len(slots):
+        return np.zeros(len(wanted))
+    positions = np.minimum(np.searchsorted(slots, wanted), len(slots) - 1)
+    return np.where(slots[positions] == wanted, values[positions], 0.0)
+
+
+def contains(postings: np.ndarray, wanted: np.ndarray) -> np.ndarray:
+    """Membership of the wanted slots in a (sorted) postings array"""
+    if not len(postings):
+        return np.zeros(len(wanted), dtype=bool)
+    positions = np.minimum(np.searchsorted(postings, wanted), len(postings) - 1)
+    return postings[positions] == wanted
@@ -0,0 +1,104 @@
+import json
+from typing import Iterable, List, Optional, Tuple
+
+
+class IncrementalJSONParser:
+    """
+    Parses a JSON object as it streams in and reports each top-level field
+    once its value is complete, without re-parsing the whole buffer per
+    chunk. For the keys in stream_arrays, array elements are also reported
+    one by one as they close. Anything before the opening brace (such as a
+    ```json fence) is ignored.
+
+    feed() returns a list of events:
+      ("field", key, value)        a top-level field is complete
+      ("item", key, index, value)  an element of a streamed array is complete
+    """
+
+    def __init__(self, stream_arrays: Iterable[str] = ()):
+        self.stream_arrays = set(stream_arrays)
+        self.buffer = ""
+        self._pos = 0
+        self._stack: List[str] = []  # Open containers: '{' or '['
+        self._in_string = False
+        self._escaped = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None  # Most recent complete string at depth 1 (a key candidate)
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+        self._item_start: Optional[int] = None
+        self._item_index = 0
+        self.done = False
+
+    def feed(self, chunk: str) -> List[Tuple]:
+        self.buffer += chunk
+        events = []
+        buffer = self.buffer
+
+        while self._pos < len(buffer) and not self.done:
+            i = self._pos
+            char = buffer[i]
+            self._pos += 1
+            depth = len(self._stack)
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if depth == 1 and self._value_start is None:
+                        self._last_string = json.loads(buffer[self._string_start:i + 1])
+                continue
+
+            if depth == 0:
+                if char == "{":
+                    self._stack.append("{")
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char == ":" and depth == 1:
+                self._key = self._last_string
+                self._value_start = i + 1
+            elif char in "{[":
+                self._stack.append(char)
+                if depth == 1 and char == "[" and self._key in self.stream_arrays:
+                    self._item_start = i + 1
+                    self._item_index = 0
+            elif char in "}]":
+                if depth == 2 and self._item_start is not None:
+                    self._emit_item(events, buffer[self._item_start:i])
+                    self._item_start = None
+                self._stack.pop()
+                if depth == 1:
+                    self._emit_field(events, buffer, i)
+                    self.done = True
+            elif char == ",":
+                if depth == 1:
+                    self._emit_field(events, buffer, i)
+                elif depth == 2 and self._item_start is not None:
+                    self._emit_item(events, buffer[self._item_start:i])
+                    self._item_start = i + 1
+
+        return events
+
+    def _emit_field(self, events: List[Tuple], buffer: str, end: int):
+        if self._value_start is None:
+            return
+        raw = buffer[self._value_start:end]
+        self._value_start = None
+        try:
+            events.append(("field", self._key, json.loads(raw)))
+        except ValueError:
+            # Malformed output is reported by the final, whole-document parse
+            pass
+
+    def _emit_item(self, events: List[Tuple], raw: str):
+        try:
+            events.append(("item", self._key, self._item_index, json.loads(raw)))
+        except ValueError:
+            return
+        self._item_index += 1
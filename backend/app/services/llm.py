@@ -0,0 +1,160 @@
+import asyncio
+import random
+from typing import AsyncIterator, Optional
+from app.config import settings
+from app.metrics import llm_request_seconds, record_llm_usage, timed
+from app.transport import transports
+
+
+class LLMClient:
+    """
+    Shared AsyncOpenAI client with a global concurrency cap, per-call
+    timeouts and jittered retries on rate limits and server errors.
+
+    The openai package is slow to import, so it is imported and the client
+    built on first use rather than when this module loads.
+    """
+
+    def __init__(self):
+        self._client = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.queued = 0
+
+    @property
+    def _semaphore(self) -> asyncio.Semaphore:
+        """The global concurrency cap, created on first use"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+        return self._slots
+
+    @property
+    def client(self):
+        """The AsyncOpenAI client, created on first access"""
+        if self._client is None:
+            from openai import AsyncOpenAI
+
+            self._client = AsyncOpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                base_url=settings.OPENAI_BASE_URL,
+                timeout=settings.LLM_TIMEOUT_SECONDS,
+                max_retries=0,  # Retries are handled here so they respect the semaphore
+                http_client=transports.async_client(
+                    "openai",
+                    max_connections=settings.LLM_MAX_CONNECTIONS,
+                    timeout=settings.LLM_TIMEOUT_SECONDS
+                )
+            )
+        return self._client
+
+    def reset(self):
+        """Drop the client (its transport is closed on shutdown)"""
+        self._client = None
+
+    def stats(self) -> dict:
+        """Current load, for sizing workers against OpenAI rate limits"""
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_concurrency": settings.LLM_MAX_CONCURRENCY
+        }
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        from openai import APIConnectionError, APIStatusError, APITimeoutError, RateLimitError
+
+        if isinstance(error, (RateLimitError, APITimeoutError, APIConnectionError)):
+            return True
+        return isinstance(error, APIStatusError) and error.status_code >= 500
+
+    @staticmethod
+    def _backoff(attempt: int, error: Exception) -> float:
+        """Full-jitter exponential backoff, honouring Retry-After when sent"""
+        from openai import APIStatusError
+
+        retry_after = None
+        if isinstance(error, APIStatusError):
+            retry_after = error.response.headers.get("retry-after")
+        try:
+            if retry_after is not None:
+                return min(float(retry_after), settings.LLM_RETRY_MAX_DELAY_SECONDS)
+        except ValueError:
+            pass
+        ceiling = min(settings.LLM_RETRY_MAX_DELAY_SECONDS, settings.LLM_RETRY_BASE_DELAY_SECONDS * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    async def chat_completion(self, **kwargs):
+        """Create a chat completion once a concurrency slot is free"""
+        attempt = 0
+        while True:
+            self.queued += 1
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self.queued -= 1
+
+            self.in_flight += 1
+            try:
+                with timed(llm_request_seconds, model=kwargs.get("model")):
+                    response = await self.client.chat.completions.create(**kwargs)
+                record_llm_usage(kwargs.get("model"), response.usage)
+                return response
+            except Exception as e:
+                if attempt >= settings.LLM_MAX_RETRIES or not self._is_retryable(e):
+                    raise
+                delay = self._backoff(attempt, e)
+            finally:
+                self.in_flight -= 1
+                self._semaphore.release()
+
+            # Back off without holding a slot so other calls can proceed
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def chat_completion_stream(self, **kwargs) -> AsyncIterator[str]:
+        """
+        Stream a chat completion's text as it is generated. The concurrency
+        slot is held until the stream ends or the caller stops reading.
+        Failures are retried only before any text has been yielded.
+        """
+        attempt = 0
+        while True:
+            self.queued += 1
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self.queued -= 1
+
+            self.in_flight += 1
+            started = False
+            try:
+                with timed(llm_request_seconds, model=kwargs.get("model")):
+                    stream = await self.client.chat.completions.create(
+                        stream=True,
+                        stream_options={"include_usage": True},
+                        **kwargs
+                    )
+                    # Closes the response (freeing its connection) if the caller stops early
+                    async with stream:
+                        async for chunk in stream:
+                            if chunk.usage is not None:
+                                # Sent in a final chunk with no choices
+                                record_llm_usage(kwargs.get("model"), chunk.usage)
+                            if chunk.choices and chunk.choices[0].delta.content:
+                                started = True
+                                yield chunk.choices[0].delta.content
+                return
+            except Exception as e:
+                if started or attempt >= settings.LLM_MAX_RETRIES or not self._is_retryable(e):
+                    raise
+                delay = self._backoff(attempt, e)
+            finally:
+                self.in_flight -= 1
+                self._semaphore.release()
+
+            attempt += 1
+            await asyncio.sleep(delay)
+
+
+# Singleton instance
+llm_client = LLMClient()
@@ -0,0 +1,476 @@
+import asyncio
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.config import settings
+from app.database import SupabaseClient
+from app.repositories.jobs import JobRepository
+from app.services.inverted_index import InvertedIndex, contains, lookup
+
+
+# Columns the index is built from (descriptions are never loaded)
+INDEX_COLUMNS = "id,title,location,is_remote,salary_min,salary_max,experience_required,tags,requirements,updated_at"
+
+# Columns returned with each match
+JOB_COLUMNS = (
+    "id,title,company,company_logo_url,location,is_remote,salary_min,salary_max,"
+    "salary_currency,visa_sponsored,tags,posted_date,experience_required,industry"
+)
+
+# Share of each component in the final 0-100 score
+WEIGHTS = {"skills": 0.45, "roles": 0.2, "experience": 0.15, "salary": 0.1, "location": 0.1}
+
+# Component score when the persona or the job doesn't say
+NEUTRAL = 0.5
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in is of on or our the to we with you your year years experience".split()
+)
+
+EXPERIENCE_LEVELS = {
+    "intern": 0, "internship": 0, "entry": 0, "junior": 0, "graduate": 0,
+    "mid": 1, "intermediate": 1,
+    "senior": 2,
+    "lead": 3, "staff": 3, "principal": 3,
+    "head": 4, "director": 4, "executive": 4,
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+_YEARS_RE = re.compile(r"(\d+)\s*\+?\s*(?:-\s*\d+\s*)?(?:years|yrs)")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercase word tokens, keeping tech names like c++, c# and node.js intact"""
+    if not text:
+        return []
+    return [token for token in (t.rstrip(".") for t in _TOKEN_RE.findall(text.lower())) if token]
+
+
+def normalize_term(text: Optional[str]) -> str:
+    return " ".join(tokenize(text))
+
+
+def requirement_terms(text: Optional[str]) -> set:
+    """Unigrams and bigrams of a requirement line, without stopwords"""
+    tokens = tokenize(text)
+    terms = {t for t in tokens if t not in STOPWORDS}
+    terms.update(
+        f"{a} {b}" for a, b in zip(tokens, tokens[1:])
+        if a not in STOPWORDS and b not in STOPWORDS
+    )
+    return terms
+
+
+def location_terms(text: Optional[str]) -> set:
+    """'Berlin, Germany / Remote' -> {'berlin', 'germany', 'remote'}"""
+    if not text:
+        return set()
+    parts = re.split(r"[,/;|]|\bor\b", text.lower())
+    return {term for term in (normalize_term(part) for part in parts) if term}
+
+
+def experience_rank(text: Optional[str]) -> int:
+    """Seniority on a 0 (entry) to 4 (executive) scale, or -1 if unknown"""
+    for token in tokenize(text):
+        if token in EXPERIENCE_LEVELS:
+            return EXPERIENCE_LEVELS[token]
+    years = _YEARS_RE.search((text or "").lower())
+    if years:
+        n = int(years.group(1))
+        return 0 if n < 2 else 1 if n < 5 else 2 if n < 8 else 3
+    return -1
+
+
+def job_experience_rank(job: dict) -> int:
+    """A job's seniority, falling back to its title ("Senior ...")"""
+    rank = experience_rank(job.get("experience_required"))
+    return rank if rank >= 0 else experience_rank(job.get("title"))
+
+
+def job_skill_terms(job: dict) -> set:
+    """Skill vocabulary of a job: whole tags, tag words and requirement n-grams"""
+    tags = job.get("tags") or []
+    terms = {normalize_term(tag) for tag in tags} | {t for tag in tags for t in tokenize(tag)}
+    terms.update(t for requirement in job.get("requirements") or [] for t in requirement_terms(requirement))
+    terms.discard("")
+    return terms
+
+
+def _grow(values: np.ndarray, size: int, fill) -> np.ndarray:
+    """Return values with room for at least size entries (doubling capacity)"""
+    if size <= len(values):
+        return values
+    grown = np.full(max(size, 2 * len(values), 1024), fill, dtype=values.dtype)
+    grown[:len(values)] = values
+    return grown
+
+
+class JobIndex:
+    """
+    In-memory index of the jobs table for match scoring.
+
+    Each job occupies a slot. Skills (tags + requirements), title and
+    location terms are kept in inverted indexes over those slots, and the
+    numeric fields in dense NumPy columns. Jobs can be added, replaced and
+    removed incrementally: removed slots are masked out until compact()
+    renumbers the survivors and merges the postings.
+
+    Scoring first pulls a candidate set from the skill and title postings,
+    so only jobs sharing at least one term with the persona get scored.
+    """
+
+    def __init__(self):
+        self.built_at = time.monotonic()
+        self.skills = InvertedIndex()
+        self.titles = InvertedIndex()
+        self.locations = InvertedIndex()
+        self.job_ids: List[Optional[str]] = []  # slot -> job id (None once removed)
+        self.slots: Dict[str, int] = {}  # job id -> slot
+        self.alive = np.zeros(0, dtype=bool)
+        self.is_remote = np.zeros(0, dtype=bool)
+        self.experience = np.zeros(0, dtype=np.int8)
+        self.salary_min = np.zeros(0, dtype=np.float64)
+        self.salary_max = np.zeros(0, dtype=np.float64)
+
+    @classmethod
+    def build(cls, rows: List[dict]) -> "JobIndex":
+        index = cls()
+        index.add_many(rows)
+        index.compact()
+        return index
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    @property
+    def dead_slots(self) -> int:
+        return len(self.job_ids) - len(self.slots)
+
+    def add(self, job: dict):
+        """Index a job, replacing any previous version of it"""
+        self.remove(job["id"])
+
+        slot = len(self.job_ids)
+        self.job_ids.append(job["id"])
+        self.slots[job["id"]] = slot
+
+        size = slot + 1
+        self.alive = _grow(self.alive, size, False)
+        self.is_remote = _grow(self.is_remote, size, False)
+        self.experience = _grow(self.experience, size, -1)
+        self.salary_min = _grow(self.salary_min, size, np.nan)
+        self.salary_max = _grow(self.salary_max, size, np.nan)
+
+        self.alive[slot] = True
+        self.is_remote[slot] = bool(job.get("is_remote"))
+        self.experience[slot] = job_experience_rank(job)
+        self.salary_min[slot] = job.get("salary_min") or np.nan
+        self.salary_max[slot] = job.get("salary_max") or np.nan
+
+        self.skills.add(slot, job_skill_terms(job))
+        self.titles.add(slot, requirement_terms(job.get("title")))
+        self.locations.add(slot, location_terms(job.get("location")))
+
+    def add_many(self, jobs: List[dict]):
+        for job in jobs:
+            self.add(job)
+
+    def remove(self, job_id: str) -> bool:
+        slot = self.slots.pop(job_id, None)
+        if slot is None:
+            return False
+        self.alive[slot] = False
+        self.job_ids[slot] = None
+        return True
+
+    def needs_compaction(self) -> bool:
+        pending = self.skills.delta_size + self.titles.delta_size + self.locations.delta_size
+        return (
+            self.dead_slots > max(1000, len(self.job_ids) // 4)
+            or pending > max(50000, len(self.job_ids))
+        )
+
+    def compact(self):
+        """Drop removed slots, renumber the rest and merge all postings"""
+        size = len(self.job_ids)
+        live = np.flatnonzero(self.alive[:size])
+        remap = np.full(size, -1, dtype=np.int64)
+        remap[live] = np.arange(len(live))
+
+        for postings in (self.skills, self.titles, self.locations):
+            postings.merge(remap)
+
+        self.job_ids = [self.job_ids[slot] for slot in live]
+        self.slots = {job_id: slot for slot, job_id in enumerate(self.job_ids)}
+        self.alive = np.ones(len(live), dtype=bool)
+        self.is_remote = self.is_remote[live]
+        self.experience = self.experience[live]
+        self.salary_min = self.salary_min[live]
+        self.salary_max = self.salary_max[live]
+
+    def _weights(self, postings: InvertedIndex, terms) -> Dict[str, float]:
+        return {term: postings.idf(term, len(self)) for term in terms}
+
+    def _coverage(self, postings: InvertedIndex, terms, slots: np.ndarray) -> Optional[np.ndarray]:
+        """IDF-weighted share of the query terms each slot contains (0..1), None if no terms"""
+        weights = self._weights(postings, terms)
+        total = sum(weights.values())
+        if not total:
+            return None
+        hit_slots, hits = postings.accumulate(weights, len(self.job_ids))
+        return lookup(hit_slots, hits, slots) / total
+
+    @staticmethod
+    def _skill_terms(persona: dict) -> set:
+        return {normalize_term(skill) for skill in persona.get("skills") or []} - {""}
+
+    @staticmethod
+    def _role_terms(persona: dict) -> List[set]:
+        roles = list(persona.get("roles") or []) + [persona.get("title")]
+        return [terms for terms in (requirement_terms(role) for role in roles if role) if terms]
+
+    def candidates(self, persona: dict, limit: int) -> np.ndarray:
+        """
+        Up to limit live slots sharing skill or title terms with the persona,
+        best first by retrieval score. Falls back to every live slot when
+        the persona has no skills or roles, or too few jobs share any.
+        """
+        skill_weights = self._weights(self.skills, self._skill_terms(persona))
+        role_weights = self._weights(self.titles, set().union(*self._role_terms(persona)))
+
+        parts = []
+        for postings, weights, share in (
+            (self.skills, skill_weights, WEIGHTS["skills"]),
+            (self.titles, role_weights, WEIGHTS["roles"]),
+        ):
+            total = sum(weights.values())
+            if total:
+                hit_slots, hits = postings.accumulate(weights, len(self.job_ids))
+                parts.append((hit_slots, hits * (share / total)))
+
+        everything = np.flatnonzero(self.alive[:len(self.job_ids)])
+        if not parts:
+            return everything
+
+        slots, inverse = np.unique(np.concatenate([s for s, _ in parts]), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate([v for _, v in parts]))
+        live = self.alive[slots]
+        slots, scores = slots[live], scores[live]
+
+        if len(slots) < limit:
+            return everything
+        if len(slots) > limit:
+            keep = np.argpartition(-scores, limit - 1)[:limit]
+            slots = np.sort(slots[keep])
+        return slots
+
+    def _neutral(self, slots: np.ndarray) -> np.ndarray:
+        return np.full(len(slots), NEUTRAL)
+
+    def _skills_score(self, persona: dict, slots: np.ndarray) -> np.ndarray:
+        score = self._coverage(self.skills, self._skill_terms(persona), slots)
+        return self._neutral(slots) if score is None else score
+
+    def _roles_score(self, persona: dict, slots: np.ndarray) -> np.ndarray:
+        # Best match between the job title and any role the persona targets
+        scores = [self._coverage(self.titles, terms, slots) for terms in self._role_terms(persona)]
+        if not scores:
+            return self._neutral(slots)
+        return np.maximum.reduce(scores) if len(scores) > 1 else scores[0]
+
+    def _experience_score(self, persona: dict, slots: np.ndarray) -> np.ndarray:
+        rank = experience_rank(persona.get("experience_level"))
+        if rank < 0:
+            return self._neutral(slots)
+        # Same level 1.0, one level apart 0.5, further 0
+        experience = self.experience[slots]
+        score = np.clip(1.0 - 0.5 * np.abs(experience - rank), 0.0, 1.0)
+        return np.where(experience < 0, NEUTRAL, score)
+
+    def _salary_score(self, persona: dict, slots: np.ndarray) -> np.ndarray:
+        wanted_min = persona.get("salary_min") or persona.get("salary_max")
+        wanted_max = persona.get("salary_max") or persona.get("salary_min")
+        if not wanted_min:
+            return self._neutral(slots)
+
+        # 1.0 once the job can pay the persona's max, 0 below 80% of their min
+        salary_max = self.salary_max[slots]
+        offered = np.where(np.isnan(salary_max), self.salary_min[slots], salary_max)
+        floor = 0.8 * wanted_min
+        score = np.clip((offered - floor) / max(wanted_max - floor, 1.0), 0.0, 1.0)
+        return np.where(np.isnan(offered), NEUTRAL, score)
+
+    def _location_score(self, persona: dict, slots: np.ndarray) -> np.ndarray:
+        wanted = location_terms(persona.get("job_search_location") or persona.get("location"))
+        wants_remote = "remote" in wanted
+        wanted.discard("remote")
+
+        score = self._coverage(self.locations, wanted, slots) if wanted else None
+        if score is None:
+            if not wants_remote:
+                return self._neutral(slots)
+            score = np.zeros(len(slots))
+        # Remote roles suit most people, and fully suit those asking for them
+        return np.maximum(score, self.is_remote[slots] * (1.0 if wants_remote else 0.7))
+
+    def score(self, persona: dict, slots: np.ndarray) -> Dict[str, np.ndarray]:
+        """Per-component scores (0..1) for the given slots, plus the weighted total (0..100)"""
+        components = {
+            "skills": self._skills_score(persona, slots),
+            "roles": self._roles_score(persona, slots),
+            "experience": self._experience_score(persona, slots),
+            "salary": self._salary_score(persona, slots),
+            "location": self._location_score(persona, slots),
+        }
+        total = sum(WEIGHTS[name] * values for name, values in components.items())
+        return {**components, "total": total * 100.0}
+
+    def top(self, persona: dict, limit: int, candidates: Optional[int] = None) -> List[dict]:
+        """The best-scoring jobs for a persona, highest first"""
+        slots = self.candidates(persona, max(limit, candidates or settings.JOB_INDEX_CANDIDATES))
+        if not len(slots):
+            return []
+
+        scores = self.score(persona, slots)
+        total = scores["total"]
+        k = min(limit, len(slots))
+        best = np.argpartition(-total, k - 1)[:k]
+        best = best[np.argsort(-total[best], kind="stable")]
+
+        # Which of the persona's skills each top job asks for
+        skills = [skill for skill in persona.get("skills") or [] if normalize_term(skill)]
+        has_skill = [contains(self.skills.postings(normalize_term(skill)), slots[best]) for skill in skills]
+
+        return [
+            {
+                "job_id": self.job_ids[slots[i]],
+                "match_score": round(float(total[i]), 2),
+                "breakdown": {name: round(float(scores[name][i]), 3) for name in WEIGHTS},
+                "matched_skills": [skill for skill, found in zip(skills, has_skill) if found[rank]]
+            }
+            for rank, i in enumerate(best)
+        ]
+
+
+class JobMatcher:
+    """
+    Scores personas against an in-memory JobIndex.
+
+    The index is rebuilt from scratch every JOB_INDEX_TTL_SECONDS (which
+    also drops deleted jobs) and, in between, jobs changed since the last
+    sync are applied incrementally every JOB_INDEX_SYNC_SECONDS. Both run
+    in the background while the current index keeps serving. Jobs are
+    written outside the API, so a deleted job is removed from the index
+    as soon as a match finds its row gone.
+    """
+
+    # Re-read this much history on each sync, for commits that land late
+    SYNC_OVERLAP = timedelta(seconds=30)
+
+    def __init__(self):
+        self._index: Optional[JobIndex] = None
+        self._lock = asyncio.Lock()
+        self._refresh: Optional[asyncio.Task] = None
+        self._synced_at = 0.0
+        self._cursor: Optional[Tuple[str, str]] = None  # (updated_at, id) of the newest job seen
+
+    async def _load_rows(self, after: Optional[Tuple[str, Optional[str]]] = None) -> List[dict]:
+        repo = JobRepository(SupabaseClient.get_service_client())
+        rows = []
+        while True:
+            page = await repo.list_page(INDEX_COLUMNS, settings.JOB_INDEX_PAGE_SIZE, after)
+            rows.extend(page)
+            if page:
+                after = (page[-1]["updated_at"], page[-1]["id"])
+                self._cursor = after
+            if len(page) < settings.JOB_INDEX_PAGE_SIZE:
+                return rows
+
+    def _sync_from(self) -> Optional[Tuple[str, Optional[str]]]:
+        if self._cursor is None:
+            return None
+        updated_at = datetime.fromisoformat(self._cursor[0]) - self.SYNC_OVERLAP
+        return updated_at.isoformat(), None
+
+    def _is_stale(self) -> bool:
+        return time.monotonic() - self._index.built_at >= settings.JOB_INDEX_TTL_SECONDS
+
+    async def _rebuild(self) -> JobIndex:
+        async with self._lock:
+            if self._index is None or self._is_stale():
+                self._cursor = None
+                rows = await self._load_rows()
+                # Tokenizing 100k jobs takes a while; keep it off the event loop
+                self._index = await asyncio.to_thread(JobIndex.build, rows)
+                self._synced_at = time.monotonic()
+            return self._index
+
+    async def _sync(self):
+        """Apply jobs added or changed since the last load to the live index"""
+        async with self._lock:
+            rows = await self._load_rows(self._sync_from())
+            index = self._index
+            # Small batches on the event loop, so no reader sees a half-added job
+            for start in range(0, len(rows), 500):
+                index.add_many(rows[start:start + 500])
+                await asyncio.sleep(0)
+            if index.needs_compaction():
+                index.compact()
+            self._synced_at = time.monotonic()
+
+    async def _refresh_in_background(self):
+        try:
+            if self._is_stale():
+                await self._rebuild()
+            else:
+                await self._sync()
+        except Exception as e:
+            # Keep serving the current index; the next request retries
+            print(f"Job index refresh failed: {str(e)}")
+
+    async def get_index(self) -> JobIndex:
+        if self._index is None:
+            return await self._rebuild()
+
+        due = self._is_stale() or time.monotonic() - self._synced_at >= settings.JOB_INDEX_SYNC_SECONDS
+        if due and (self._refresh is None or self._refresh.done()):
+            self._refresh = asyncio.create_task(self._refresh_in_background())
+        return self._index
+
+    async def match(self, persona: dict, limit: int) -> List[dict]:
+        """Top jobs for a persona with their scores and job details"""
+        index = await self.get_index()
+        matches = index.top(persona, limit)
+        attached = await attach_jobs(matches)
+
+        if len(attached) < len(matches):
+            # Jobs deleted since the index was built: drop them from it now
+            # rather than at the next rebuild, and fill their places
+            found = {match["job_id"] for match in attached}
+            for match in matches:
+                if match["job_id"] not in found:
+                    index.remove(match["job_id"])
+            if index.needs_compaction():
+                index.compact()
+            attached = await attach_jobs(index.top(persona, limit))
+        return attached
+
+
+async def attach_jobs(matches: List[dict]) -> List[dict]:
+    """Merge each match's job row into it, skipping jobs deleted since indexing"""
+    jobs = await JobRepository(SupabaseClient.get_service_client()).get_many(
+        [match["job_id"] for match in matches],
+        JOB_COLUMNS
+    )
+    jobs_by_id = {job["id"]: job for job in jobs}
+    return [
+        {**jobs_by_id[match["job_id"]], **match}
+        for match in matches
+        if match["job_id"] in jobs_by_id
+    ]
+
+
+# Singleton instance
+job_matcher = JobMatcher()
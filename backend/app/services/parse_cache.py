@@ -0,0 +1,226 @@
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional
+from app.cache import TTLCache
+from app.config import settings
+from app.database import get_supabase_admin, run_sync
+
+
+def hash_bytes(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different extractions share a key"""
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class MemoryParseCacheBackend:
+    """Per-process LRU with TTL"""
+
+    def __init__(self):
+        self._cache = TTLCache(
+            max_size=settings.CV_PARSE_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.CV_PARSE_CACHE_TTL_SECONDS
+        )
+
+    async def get(self, key: str) -> Optional[dict]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: dict):
+        self._cache.set(key, value)
+
+
+class DiskParseCacheBackend:
+    """JSON files on local disk, expired by mtime and capped by entry count"""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+    def _read(self, key: str) -> Optional[dict]:
+        path = self._path(key)
+        try:
+            if time.time() - path.stat().st_mtime > settings.CV_PARSE_CACHE_TTL_SECONDS:
+                path.unlink(missing_ok=True)
+                return None
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, key: str, value: dict):
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(value))
+        tmp_path.replace(path)
+
+        entries = sorted(self.directory.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        for stale in entries[:max(0, len(entries) - settings.CV_PARSE_CACHE_MAX_ENTRIES)]:
+            stale.unlink(missing_ok=True)
+
+    async def get(self, key: str) -> Optional[dict]:
+        return await asyncio.to_thread(self._read, key)
+
+    async def set(self, key: str, value: dict):
+        await asyncio.to_thread(self._write, key, value)
+
+
+class PostgresParseCacheBackend:
+    """Shared cache in the cv_parse_cache table (see migrations/004_cv_parse_cache.sql)"""
+
+    async def get(self, key: str) -> Optional[dict]:
+        now = datetime.now(timezone.utc).isoformat()
+        response = await run_sync(
+            get_supabase_admin().table("cv_parse_cache")
+                .select("result")
+                .eq("key", key)
+                .gt("expires_at", now)
+                .limit(1)
+                .execute
+        )
+        return response.data[0]["result"] if response.data else None
+
+    async def set(self, key: str, value: dict):
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=settings.CV_PARSE_CACHE_TTL_SECONDS)
+        await run_sync(
+            get_supabase_admin().table("cv_parse_cache")
+                .upsert({"key": key, "result": value, "expires_at": expires_at.isoformat()})
+                .execute
+        )
+
+
+class _InFlightParse:
+    """A parse shared by every request waiting for the same text"""
+
+    def __init__(self, task: "asyncio.Task[dict]"):
+        self.task = task
+        self.waiters = 0
+
+
+class CVParseCache:
+    """
+    Content-addressed cache for CV parse results.
+
+    Entries are stored under two keys: the SHA-256 of the raw upload (lets a
+    re-upload skip text extraction too) and the SHA-256 of the normalized
+    extracted text (catches the same CV re-exported to a different file).
+    Both keys include the prompt version, so changing the prompt invalidates
+    old entries. Concurrent parses of the same text share one LLM call,
+    which runs in a task owned by the cache: a request that goes away
+    doesn't cancel it for the others, and it is only cancelled once no
+    request is waiting for it.
+    """
+
+    def __init__(self, prompt_version: str):
+        self.prompt_version = prompt_version
+        self.memory = MemoryParseCacheBackend()
+        self.shared = self._create_shared_backend()
+        self._in_flight: Dict[str, _InFlightParse] = {}
+
+    @staticmethod
+    def _create_shared_backend():
+        backend = settings.CV_PARSE_CACHE_BACKEND
+        if backend == "disk":
+            return DiskParseCacheBackend(settings.CV_PARSE_CACHE_DIR)
+        if backend == "postgres":
+            return PostgresParseCacheBackend()
+        return None
+
+    def file_key(self, file_hash: str) -> str:
+        return f"file:{self.prompt_version}:{file_hash}"
+
+    def text_key(self, cv_text: str) -> str:
+        return f"text:{self.prompt_version}:{hash_bytes(normalize_text(cv_text).encode('utf-8'))}"
+
+    async def _get(self, key: str) -> Optional[dict]:
+        value = await self.memory.get(key)
+        if value is None and self.shared is not None:
+            try:
+                value = await self.shared.get(key)
+            except Exception as e:
+                print(f"CV parse cache read failed: {str(e)}")
+                value = None
+            if value is not None:
+                await self.memory.set(key, value)
+        return copy.deepcopy(value) if value is not None else None
+
+    async def _set(self, key: str, value: dict):
+        await self.memory.set(key, value)
+        if self.shared is not None:
+            try:
+                await self.shared.set(key, value)
+            except Exception as e:
+                print(f"CV parse cache write failed: {str(e)}")
+
+    async def get_by_file(self, file_hash: str) -> Optional[dict]:
+        """Cached result for an exact file, if any"""
+        return await self._get(self.file_key(file_hash))
+
+    async def get_by_text(self, cv_text: str) -> Optional[dict]:
+        """Cached result for this extracted text, if any"""
+        return await self._get(self.text_key(cv_text))
+
+    async def store(self, cv_text: str, result: dict):
+        """Cache a result produced outside get_or_parse (e.g. a streamed parse)"""
+        await self._set(self.text_key(cv_text), result)
+
+    async def store_file(self, file_hash: str, result: dict):
+        await self._set(self.file_key(file_hash), result)
+
+    async def get_or_parse(
+        self,
+        cv_text: str,
+        parse: Callable[[str], Awaitable[dict]],
+        file_hash: Optional[str] = None
+    ) -> dict:
+        """Return the cached result for this text, or parse it exactly once"""
+        key = self.text_key(cv_text)
+
+        result = await self._get(key)
+        if result is None:
+            result = await self._join(key, cv_text, parse)
+
+        if file_hash is not None:
+            await self._set(self.file_key(file_hash), result)
+        return copy.deepcopy(result)
+
+    async def _parse_and_store(self, key: str, cv_text: str, parse: Callable[[str], Awaitable[dict]]) -> dict:
+        parsed = await parse(cv_text)
+        await self._set(key, parsed)
+        return parsed
+
+    def _finished(self, key: str, in_flight: _InFlightParse):
+        if self._in_flight.get(key) is in_flight:
+            del self._in_flight[key]
+        # Mark retrieved so a failure nobody awaited isn't logged
+        if not in_flight.task.cancelled():
+            in_flight.task.exception()
+
+    async def _join(self, key: str, cv_text: str, parse: Callable[[str], Awaitable[dict]]) -> dict:
+        """Wait for the shared parse of this text, starting it if none is running"""
+        in_flight = self._in_flight.get(key)
+        if in_flight is None:
+            in_flight = _InFlightParse(asyncio.create_task(self._parse_and_store(key, cv_text, parse)))
+            self._in_flight[key] = in_flight
+            in_flight.task.add_done_callback(lambda _task: self._finished(key, in_flight))
+
+        in_flight.waiters += 1
+        try:
+            return await asyncio.shield(in_flight.task)
+        finally:
+            in_flight.waiters -= 1
+            # Nobody left to use the result (e.g. every client disconnected)
+            if in_flight.waiters == 0 and not in_flight.task.done():
+                if self._in_flight.get(key) is in_flight:
+                    del self._in_flight[key]
+                in_flight.task.cancel()
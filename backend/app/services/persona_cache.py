@@ -0,0 +1,206 @@
+import hashlib
+import itertools
+import json
+from functools import cached_property
+from typing import Any, Awaitable, Callable, Optional
+from app.cache import TTLCache
+from app.config import settings
+
+
+class RedisPersonaCacheBackend:
+    """
+    Shared tier in Redis: per-user version counters plus cached results.
+    Requires the optional `redis` package.
+    """
+
+    # Version counters must outlive every result cached under them
+    VERSION_TTL_SECONDS = 24 * 3600
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("PERSONA_CACHE_BACKEND=redis requires the 'redis' package")
+        self._redis = redis.from_url(url)
+
+    @staticmethod
+    def _version_key(user_id: str) -> str:
+        return f"personas:version:{user_id}"
+
+    async def get_version(self, user_id: str) -> int:
+        version = await self._redis.get(self._version_key(user_id))
+        return int(version or 0)
+
+    async def bump_version(self, user_id: str):
+        key = self._version_key(user_id)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.incr(key)
+            pipe.expire(key, self.VERSION_TTL_SECONDS)
+            await pipe.execute()
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = await self._redis.get(key)
+        return None if value is None else json.loads(value)
+
+    async def set(self, key: str, value: Any, ttl_seconds: int):
+        await self._redis.set(key, json.dumps(value), ex=ttl_seconds)
+
+
+class PersonaCache:
+    """
+    Read-through cache for persona queries, scoped per user.
+
+    Every entry is keyed by the user's current version; a write bumps the
+    version, which orphans all of that user's cached results at once (they
+    age out of the LRU). A read that raced with a write stores its result
+    under the old version, so it can never be served afterwards.
+
+    The in-process LRU is always consulted first. With the Redis backend the
+    version lives in Redis, so a write on any worker invalidates every
+    worker's L1 too, and a miss in one worker can be filled from another's
+    result. Redis errors fall back to the database.
+
+    The memory backend only sees writes made by its own process, so with
+    several workers it serves stale rows until they expire. It is opt-in
+    (PERSONA_CACHE_BACKEND=memory) and never used to answer If-None-Match.
+    """
+
+    def __init__(self):
+        # Local versions start from a process-wide counter, so a user whose
+        # version was evicted gets a fresh one rather than an old, reused one
+        self._version_counter = itertools.count(1)
+        self.shared_hits = 0
+        self.shared_misses = 0
+        self.shared_errors = 0
+
+    # Built from the settings on first use rather than at import
+
+    @cached_property
+    def ttl_seconds(self) -> int:
+        return settings.PERSONA_CACHE_TTL_SECONDS
+
+    @cached_property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and settings.PERSONA_CACHE_BACKEND in ("memory", "redis")
+
+    @cached_property
+    def local(self) -> TTLCache:
+        return TTLCache(max_size=settings.PERSONA_CACHE_MAX_ENTRIES, ttl_seconds=self.ttl_seconds)
+
+    @cached_property
+    def _versions(self) -> TTLCache:
+        return TTLCache(max_size=settings.PERSONA_CACHE_MAX_ENTRIES, ttl_seconds=24 * 3600)
+
+    @cached_property
+    def shared(self) -> Optional[RedisPersonaCacheBackend]:
+        return self._create_shared_backend() if self.enabled else None
+
+    @staticmethod
+    def _create_shared_backend():
+        if settings.PERSONA_CACHE_BACKEND == "redis":
+            return RedisPersonaCacheBackend(settings.PERSONA_CACHE_REDIS_URL)
+        return None
+
+    async def _version(self, user_id: str) -> Optional[int]:
+        if self.shared is not None:
+            try:
+                return await self.shared.get_version(user_id)
+            except Exception as e:
+                self.shared_errors += 1
+                print(f"Persona cache version lookup failed: {str(e)}")
+                return None
+
+        version = self._versions.get(user_id)
+        if version is None:
+            version = next(self._version_counter)
+            self._versions.set(user_id, version)
+        return version
+
+    @staticmethod
+    def _key(user_id: str, version: int, query: tuple) -> str:
+        digest = hashlib.sha256(json.dumps(query).encode("utf-8")).hexdigest()[:24]
+        return f"personas:{user_id}:{version}:{digest}"
+
+    async def get_or_load(
+        self,
+        user_id: str,
+        query: tuple,
+        load: Callable[[], Awaitable[Any]],
+        revalidation: bool = False
+    ) -> Any:
+        """
+        Return the cached result of a persona query for this user, or run
+        load() and cache what it returns. query identifies the read (kind,
+        columns, paging...) and must be JSON-serializable. None is not cached.
+        The result is shared with other callers, so don't mutate it.
+
+        Pass revalidation=True for reads that decide a 304: they are only
+        answered from the cache when it is shared across workers.
+        """
+        if not self.enabled or (revalidation and self.shared is None):
+            return await load()
+
+        version = await self._version(user_id)
+        if version is None:
+            return await load()
+
+        key = self._key(user_id, version, query)
+        value = self.local.get(key)
+        if value is not None:
+            return value
+
+        if self.shared is not None:
+            try:
+                value = await self.shared.get(key)
+            except Exception as e:
+                self.shared_errors += 1
+                print(f"Persona cache read failed: {str(e)}")
+            if value is not None:
+                self.shared_hits += 1
+                self.local.set(key, value)
+                return value
+            self.shared_misses += 1
+
+        value = await load()
+        if value is None:
+            return None
+
+        self.local.set(key, value)
+        if self.shared is not None:
+            try:
+                await self.shared.set(key, value, self.ttl_seconds)
+            except Exception as e:
+                self.shared_errors += 1
+                print(f"Persona cache write failed: {str(e)}")
+        return value
+
+    async def invalidate(self, user_id: str):
+        """Drop everything cached for a user; call after any write to their personas"""
+        if not self.enabled:
+            return
+
+        if self.shared is not None:
+            try:
+                await self.shared.bump_version(user_id)
+            except Exception as e:
+                # Other workers may serve stale rows until their entries expire
+                self.shared_errors += 1
+                print(f"Persona cache invalidation failed: {str(e)}")
+                self.local.clear()
+            return
+
+        self._versions.set(user_id, next(self._version_counter))
+
+    def stats(self) -> dict:
+        stats = {"backend": settings.PERSONA_CACHE_BACKEND if self.enabled else "disabled", **self.local.stats()}
+        if self.shared is not None:
+            stats.update(
+                shared_hits=self.shared_hits,
+                shared_misses=self.shared_misses,
+                shared_errors=self.shared_errors
+            )
+        return stats
+
+
+# Singleton instance
+persona_cache = PersonaCache()
@@ -0,0 +1,408 @@
+import asyncio
+import json
+import math
+import os
+import shutil
+import time
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.config import settings
+from app.database import SupabaseClient
+from app.repositories.jobs import JobRepository
+from app.services.matching import attach_jobs, tokenize
+
+try:
+    import fcntl
+except ImportError:  # Windows: builds are not coordinated across processes
+    fcntl = None
+
+
+# Columns embedded for each job
+SEMANTIC_COLUMNS = "id,title,tags,description,updated_at"
+
+# Only the start of long descriptions is embedded
+MAX_TEXT_CHARS = 2000
+
+
+class SemanticIndexUnavailable(Exception):
+    """The semantic index hasn't been built yet (a build has been started)"""
+
+
+def job_text(job: dict) -> str:
+    # The title is repeated so it outweighs boilerplate in the description
+    parts = [job.get("title"), job.get("title"), " ".join(job.get("tags") or []), job.get("description")]
+    return " ".join(p for p in parts if p)[:MAX_TEXT_CHARS]
+
+
+def persona_text(persona: dict) -> str:
+    parts = [
+        persona.get("title"),
+        " ".join(persona.get("roles") or []),
+        " ".join(persona.get("skills") or []),
+        persona.get("summary")
+    ]
+    for item in persona.get("work_history") or []:
+        parts.extend([item.get("position"), item.get("description"), " ".join(item.get("skills") or [])])
+    return " ".join(p for p in parts if p)[:MAX_TEXT_CHARS]
+
+
+class HashedTfidfEmbedder:
+    """
+    Offline fallback embedder: word unigrams, bigrams and character
+    trigrams hashed into a fixed number of signed buckets, weighted by
+    sublinear TF x IDF (fitted on the job corpus) and L2-normalized.
+    The trigrams let related word forms (develop/developer/development)
+    land near each other.
+    """
+
+    name = "hashed-tfidf"
+
+    def __init__(self, dim: int, idf: Optional[np.ndarray] = None):
+        self.dim = dim
+        self.idf = idf if idf is not None else np.ones(dim, dtype=np.float32)
+        self._hashes: Dict[str, int] = {}
+
+    def _hash(self, feature: str) -> int:
+        h = self._hashes.get(feature)
+        if h is None:
+            h = self._hashes[feature] = zlib.crc32(feature.encode("utf-8"))
+        return h
+
+    def _features(self, text: str) -> Counter:
+        tokens = tokenize(text)
+        features = Counter(tokens)
+        features.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+        for token in set(tokens):
+            padded = f"<{token}>"
+            features.update(padded[i:i + 3] for i in range(len(padded) - 2))
+        return features
+
+    def _buckets(self, features: Counter) -> Tuple[np.ndarray, np.ndarray]:
+        hashes = np.fromiter((self._hash(f) for f in features), dtype=np.uint32, count=len(features))
+        counts = np.fromiter(features.values(), dtype=np.float32, count=len(features))
+        signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+        return (hashes % self.dim).astype(np.int64), signs * (1.0 + np.log(counts))
+
+    def fit(self, texts: List[str]):
+        """Learn bucket IDF from the corpus"""
+        doc_freq = np.zeros(self.dim, dtype=np.float64)
+        for text in texts:
+            buckets, _ = self._buckets(self._features(text))
+            doc_freq[np.unique(buckets)] += 1
+        self.idf = (np.log((len(texts) + 1) / (doc_freq + 1)) + 1.0).astype(np.float32)
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            buckets, values = self._buckets(self._features(text))
+            np.add.at(vectors[row], buckets, values)
+        vectors *= self.idf
+        return _normalize(vectors)
+
+    def save(self, directory: Path):
+        np.save(directory / "idf.npy", self.idf)
+
+    @classmethod
+    def load(cls, directory: Path, dim: int) -> "HashedTfidfEmbedder":
+        return cls(dim, np.load(directory / "idf.npy"))
+
+
+class SentenceTransformerEmbedder:
+    """A sentence-transformers model loaded from local files only (never downloads)"""
+
+    def __init__(self, model: str):
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model, device="cpu", local_files_only=True)
+        self.name = f"sentence-transformers:{model}"
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def fit(self, texts: List[str]):
+        pass
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = self.model.encode(texts, batch_size=64, normalize_embeddings=True, show_progress_bar=False)
+        return np.asarray(vectors, dtype=np.float32)
+
+    def save(self, directory: Path):
+        pass
+
+
+def create_embedder():
+    """The configured local model if it can be loaded, else the hashed fallback"""
+    if settings.SEMANTIC_MODEL:
+        try:
+            return SentenceTransformerEmbedder(settings.SEMANTIC_MODEL)
+        except Exception as e:
+            print(f"Semantic model unavailable, using hashed TF-IDF: {str(e)}")
+    return HashedTfidfEmbedder(settings.SEMANTIC_HASH_DIM)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class IVFIndex:
+    """
+    Inverted-file ANN index over unit vectors: spherical k-means splits the
+    vectors into lists, and a query scans only the nprobe lists whose
+    centroids are closest. Vectors stay in a memory-mapped float32 matrix.
+    """
+
+    def __init__(self, vectors: np.ndarray, centroids: np.ndarray, offsets: np.ndarray, members: np.ndarray):
+        self.vectors = vectors
+        self.centroids = centroids
+        self.offsets = offsets  # members of list l are members[offsets[l]:offsets[l + 1]]
+        self.members = members
+
+    @classmethod
+    def train(cls, vectors: np.ndarray, iterations: int = 8, sample_size: int = 20000, seed: int = 0) -> "IVFIndex":
+        n = len(vectors)
+        n_lists = max(1, min(4096, int(math.sqrt(n))))
+        rng = np.random.default_rng(seed)
+        sample = np.asarray(vectors[np.sort(rng.choice(n, min(n, sample_size), replace=False))]) if n else vectors[:0]
+
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)] if n else np.zeros((0, vectors.shape[1]), np.float32)
+        for _ in range(iterations if n else 0):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            empty = np.bincount(assignment, minlength=n_lists) == 0
+            # Re-seed empty lists from random sample points
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+            centroids = _normalize(sums).astype(np.float32)
+
+        assignment = np.empty(n, dtype=np.int32)
+        for start in range(0, n, 65536):
+            assignment[start:start + 65536] = np.argmax(vectors[start:start + 65536] @ centroids.T, axis=1)
+        members = np.argsort(assignment, kind="stable").astype(np.int32)
+        offsets = np.concatenate(([0], np.cumsum(np.bincount(assignment, minlength=n_lists))))
+        return cls(vectors, centroids, offsets, members)
+
+    def search(self, query: np.ndarray, k: int, nprobe: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Row numbers and cosine similarities of (approximately) the k nearest vectors"""
+        if not len(self.members):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        nprobe = min(nprobe, len(self.centroids))
+        lists = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        candidates = np.sort(np.concatenate([self.members[self.offsets[l]:self.offsets[l + 1]] for l in lists]))
+        similarity = self.vectors[candidates] @ query
+
+        k = min(k, len(candidates))
+        if not k:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        best = np.argpartition(-similarity, k - 1)[:k]
+        best = best[np.argsort(-similarity[best], kind="stable")]
+        return candidates[best], similarity[best]
+
+
+class BuildLock:
+    """
+    Exclusive lock on directory/build.lock, so workers sharing the index
+    directory build one at a time. acquire() blocks until it is free.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self._handle = None
+
+    def acquire(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._handle = open(self.directory / "build.lock", "a")
+        if fcntl is not None:
+            fcntl.flock(self._handle, fcntl.LOCK_EX)
+
+    def release(self):
+        if self._handle is not None:
+            if fcntl is not None:
+                fcntl.flock(self._handle, fcntl.LOCK_UN)
+            self._handle.close()
+            self._handle = None
+
+
+class SemanticIndex:
+    """Job ids, their embeddings (memory-mapped) and the IVF index, persisted to one directory"""
+
+    def __init__(self, job_ids: List[str], embedder, ivf: IVFIndex, built_at: float):
+        self.job_ids = job_ids
+        self.embedder = embedder
+        self.ivf = ivf
+        self.built_at = built_at  # Wall-clock time, so it survives restarts
+
+    @classmethod
+    def build(cls, rows: List[dict], directory: Path) -> "SemanticIndex":
+        """
+        Embed every job and write the index under directory/<build>/ (run
+        off the event loop, holding the BuildLock)
+        """
+        embedder = create_embedder()
+        texts = [job_text(row) for row in rows]
+        embedder.fit(texts)
+
+        build_dir = directory / f"build-{int(time.time() * 1000)}"
+        build_dir.mkdir(parents=True)
+        vectors = np.lib.format.open_memmap(
+            build_dir / "vectors.npy", mode="w+", dtype=np.float32, shape=(len(texts), embedder.dim)
+        )
+        for start in range(0, len(texts), 1024):
+            vectors[start:start + 1024] = embedder.embed(texts[start:start + 1024])
+        vectors.flush()
+
+        ivf = IVFIndex.train(vectors)
+        np.save(build_dir / "centroids.npy", ivf.centroids)
+        np.save(build_dir / "offsets.npy", ivf.offsets)
+        np.save(build_dir / "members.npy", ivf.members)
+        embedder.save(build_dir)
+        built_at = time.time()
+        (build_dir / "meta.json").write_text(json.dumps({
+            "embedder": embedder.name,
+            "dim": embedder.dim,
+            "built_at": built_at,
+            "job_ids": [row["id"] for row in rows]
+        }))
+
+        # Switch the CURRENT pointer atomically, then drop older builds. The
+        # previous one is kept, since other workers may still be reading it;
+        # the caller holds the build lock, so no other build is in progress
+        try:
+            previous = (directory / "CURRENT").read_text().strip()
+        except OSError:
+            previous = None
+        pointer = directory / "CURRENT.tmp"
+        pointer.write_text(build_dir.name)
+        pointer.replace(directory / "CURRENT")
+        for old in directory.glob("build-*"):
+            if old.name not in (build_dir.name, previous):
+                shutil.rmtree(old, ignore_errors=True)
+
+        return cls.load(directory)
+
+    @classmethod
+    def load(cls, directory: Path) -> Optional["SemanticIndex"]:
+        """Open the current build (vectors memory-mapped), or None if there is none usable"""
+        try:
+            build_dir = directory / (directory / "CURRENT").read_text().strip()
+            meta = json.loads((build_dir / "meta.json").read_text())
+        except (OSError, ValueError):
+            return None
+
+        embedder = create_embedder()
+        if embedder.name != meta["embedder"] or embedder.dim != meta["dim"]:
+            # Built with a different model; it has to be rebuilt
+            return None
+        if isinstance(embedder, HashedTfidfEmbedder):
+            embedder = HashedTfidfEmbedder.load(build_dir, meta["dim"])
+
+        ivf = IVFIndex(
+            np.load(build_dir / "vectors.npy", mmap_mode="r"),
+            np.load(build_dir / "centroids.npy"),
+            np.load(build_dir / "offsets.npy"),
+            np.load(build_dir / "members.npy")
+        )
+        return cls(meta["job_ids"], embedder, ivf, meta["built_at"])
+
+    def top(self, persona: dict, limit: int) -> List[dict]:
+        text = persona_text(persona)
+        if not text:
+            return []
+
+        query = self.embedder.embed([text])[0]
+        rows, similarity = self.ivf.search(query, limit, settings.SEMANTIC_NPROBE)
+        return [
+            {
+                "job_id": self.job_ids[row],
+                "match_score": round(max(float(sim), 0.0) * 100.0, 2),
+                "breakdown": {"semantic": round(float(sim), 3)},
+                "matched_skills": []
+            }
+            for row, sim in zip(rows, similarity)
+        ]
+
+
+class SemanticMatcher:
+    """
+    Semantic persona/job matching that runs entirely offline. The index is
+    loaded from SEMANTIC_INDEX_DIR at startup; if there is none, the first
+    request starts a background build. It is rebuilt (in the background)
+    once older than SEMANTIC_INDEX_TTL_SECONDS. Workers sharing the
+    directory take turns to build, and pick up each other's builds.
+    """
+
+    def __init__(self):
+        self._index: Optional[SemanticIndex] = None
+        self._build: Optional[asyncio.Task] = None
+
+    @property
+    def directory(self) -> Path:
+        return Path(settings.SEMANTIC_INDEX_DIR)
+
+    def load(self) -> bool:
+        self._index = SemanticIndex.load(self.directory)
+        return self._index is not None
+
+    async def _load_rows(self) -> List[dict]:
+        repo = JobRepository(SupabaseClient.get_service_client())
+        rows = []
+        after = None
+        while True:
+            page = await repo.list_page(SEMANTIC_COLUMNS, settings.JOB_INDEX_PAGE_SIZE, after)
+            rows.extend(page)
+            if len(page) < settings.JOB_INDEX_PAGE_SIZE:
+                return rows
+            after = (page[-1]["updated_at"], page[-1]["id"])
+
+    def _is_fresh(self, index: Optional[SemanticIndex]) -> bool:
+        return index is not None and time.time() - index.built_at < settings.SEMANTIC_INDEX_TTL_SECONDS
+
+    async def _rebuild(self):
+        """
+        Build a new index, unless another worker sharing the directory has
+        just built one: builds are serialized by BuildLock, and whoever
+        gets the lock after a build loads that build instead
+        """
+        lock = BuildLock(self.directory)
+        try:
+            await asyncio.to_thread(lock.acquire)
+        except Exception as e:
+            print(f"Semantic index build failed: {str(e)}")
+            return
+
+        try:
+            index = await asyncio.to_thread(SemanticIndex.load, self.directory)
+            if self._is_fresh(index):
+                self._index = index
+                return
+            rows = await self._load_rows()
+            self._index = await asyncio.to_thread(SemanticIndex.build, rows, self.directory)
+        except Exception as e:
+            print(f"Semantic index build failed: {str(e)}")
+        finally:
+            lock.release()
+
+    def _start_build(self):
+        if self._build is None or self._build.done():
+            self._build = asyncio.create_task(self._rebuild())
+
+    async def match(self, persona: dict, limit: int) -> List[dict]:
+        """Top jobs by embedding similarity, with their job details"""
+        index = self._index
+        if index is None:
+            self._start_build()
+            raise SemanticIndexUnavailable("Semantic index is being built; try again shortly")
+
+        if not self._is_fresh(index):
+            self._start_build()
+
+        # Embedding with a local model is CPU-bound
+        matches = await asyncio.to_thread(index.top, persona, limit)
+        return await attach_jobs(matches)
+
+
+# Singleton instance
+semantic_matcher = SemanticMatcher()
@@ -0,0 +1,247 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+from app.cache import TTLCache
+from app.config import settings
+from app.database import SupabaseClient, run_sync
+from app.metrics import cv_storage_events
+from app.repositories.personas import PersonaRepository
+from app.services.cv_upload import create_persona_from_cv
+from app.services.ingest import kind_from_content_type
+
+
+# Job lifecycle
+QUEUED = "queued"
+EXTRACTING = "extracting"
+PARSING = "parsing"
+SAVING = "saving"
+DONE = "done"
+FAILED = "failed"
+
+
+class UploadQueueFull(Exception):
+    """The in-process queue holds CV_JOB_QUEUE_MAX_SIZE uploads already"""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class MemoryUploadJobBackend:
+    """
+    In-process queue; job state is lost when the worker restarts. Queued
+    jobs hold their file in memory, so the queue is bounded.
+    """
+
+    def __init__(self):
+        self._jobs = TTLCache(
+            max_size=settings.CV_JOB_MAX_TRACKED,
+            ttl_seconds=settings.CV_JOB_RETENTION_SECONDS
+        )
+        self._queue: Optional[asyncio.Queue] = None
+
+    @property
+    def queue(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=settings.CV_JOB_QUEUE_MAX_SIZE)
+        return self._queue
+
+    async def enqueue(self, job: dict, file_content: bytes):
+        try:
+            self.queue.put_nowait((job["id"], file_content))
+        except asyncio.QueueFull:
+            raise UploadQueueFull("Too many CV uploads are queued, try again shortly")
+        self._jobs.set(job["id"], job)
+
+    async def claim(self) -> Tuple[dict, bytes]:
+        while True:
+            job_id, file_content = await self.queue.get()
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return job, file_content
+
+    async def update(self, job_id: str, fields: dict):
+        job = self._jobs.get(job_id)
+        if job is not None:
+            job.update(fields, updated_at=_now())
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+    async def release(self, job: dict):
+        pass
+
+
+class PostgresUploadJobBackend:
+    """
+    Durable queue in the cv_upload_jobs table (see migrations/005_cv_upload_jobs.sql).
+    The raw upload is staged in storage so any worker can pick the job up.
+    """
+
+    @property
+    def client(self):
+        return SupabaseClient.get_service_client()
+
+    async def enqueue(self, job: dict, file_content: bytes):
+        file_extension = job["file_name"].split('.')[-1]
+        job["staging_path"] = f"{job['user_id']}/jobs/{job['id']}.{file_extension}"
+
+        await PersonaRepository(self.client).upload_cv_file(
+            job["staging_path"],
+            file_content,
+            job["content_type"]
+        )
+        await run_sync(self.client.table("cv_upload_jobs").insert(job).execute)
+
+    async def claim(self) -> Tuple[dict, bytes]:
+        while True:
+            response = await run_sync(
+                self.client.rpc(
+                    "claim_cv_upload_job",
+                    {"stale_after_seconds": settings.CV_JOB_STALE_AFTER_SECONDS}
+                ).execute
+            )
+            if response.data:
+                job = response.data[0]
+                # A job re-claimed this often keeps stopping its worker
+                # (e.g. a document that crashes it), so stop retrying it
+                if (job.get("attempts") or 0) > settings.CV_JOB_MAX_ATTEMPTS:
+                    await self.update(job["id"], {
+                        "status": FAILED,
+                        "error": f"Gave up after {settings.CV_JOB_MAX_ATTEMPTS} attempts"
+                    })
+                    await self.release(job)
+                    continue
+
+                file_content = await PersonaRepository(self.client).download_cv_file(job["staging_path"])
+                return job, file_content
+
+            await asyncio.sleep(settings.CV_JOB_POLL_INTERVAL_SECONDS)
+
+    async def update(self, job_id: str, fields: dict):
+        await run_sync(
+            self.client.table("cv_upload_jobs").update(fields).eq("id", job_id).execute
+        )
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        response = await run_sync(
+            self.client.table("cv_upload_jobs").select("*").eq("id", job_id).execute
+        )
+        return response.data[0] if response.data else None
+
+    async def release(self, job: dict):
+        """Remove the staged upload once the job has finished"""
+        try:
+            await PersonaRepository(self.client).remove_cv_files([job["staging_path"]])
+        except Exception as e:
+            cv_storage_events.inc(event="staging_remove_failed")
+            print(f"Failed to remove staged upload {job['staging_path']}: {str(e)}")
+
+
+class UploadJobQueue:
+    """
+    Runs the /personas/upload-cv pipeline in the background on a pool of
+    worker tasks, recording each job's stage as it progresses
+    """
+
+    def __init__(self):
+        self._backend = None
+        self._workers: List[asyncio.Task] = []
+
+    @property
+    def backend(self):
+        """The job store for CV_JOB_BACKEND, created on first use"""
+        if self._backend is None:
+            if settings.CV_JOB_BACKEND == "postgres":
+                self._backend = PostgresUploadJobBackend()
+            else:
+                self._backend = MemoryUploadJobBackend()
+        return self._backend
+
+    async def submit(self, user_id: str, file_name: str, content_type: Optional[str], file_content: bytes) -> dict:
+        """Queue an upload and return its job record immediately"""
+        now = _now()
+        job = {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "status": QUEUED,
+            "file_name": file_name,
+            "content_type": content_type,
+            "persona_id": None,
+            "provisional": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now
+        }
+        await self.backend.enqueue(job, file_content)
+        return job
+
+    async def get(self, job_id: str, user_id: str) -> Optional[dict]:
+        """A job owned by the given user, or None"""
+        job = await self.backend.get(job_id)
+        if job is None or job["user_id"] != user_id:
+            return None
+        return job
+
+    def start(self):
+        """Spawn the worker pool (called from the app lifespan)"""
+        if self._workers:
+            return
+        for _ in range(settings.CV_JOB_WORKERS):
+            self._workers.append(asyncio.create_task(self._worker()))
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def _worker(self):
+        while True:
+            try:
+                job, file_content = await self.backend.claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Failed to claim upload job: {str(e)}")
+                await asyncio.sleep(settings.CV_JOB_POLL_INTERVAL_SECONDS)
+                continue
+
+            try:
+                await self._run(job, file_content)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Upload job {job['id']} could not record its result: {str(e)}")
+
+    async def _run(self, job: dict, file_content: bytes):
+        job_id = job["id"]
+
+        async def on_stage(stage: str):
+            await self.backend.update(job_id, {"status": stage})
+
+        async def on_provisional(fields: dict):
+            await self.backend.update(job_id, {"provisional": fields})
+
+        try:
+            persona = await create_persona_from_cv(
+                user_id=job["user_id"],
+                file_name=job["file_name"],
+                content_type=job["content_type"],
+                file_content=file_content,
+                admin_repo=PersonaRepository(SupabaseClient.get_service_client()),
+                on_stage=on_stage,
+                kind=kind_from_content_type(job["content_type"]),
+                on_provisional=on_provisional
+            )
+            await self.backend.update(job_id, {"status": DONE, "persona_id": persona["id"]})
+        except Exception as e:
+            await self.backend.update(job_id, {"status": FAILED, "error": str(e)})
+        finally:
+            await self.backend.release(job)
+
+
+# Singleton instance
+upload_jobs = UploadJobQueue()
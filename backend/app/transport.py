@@ -0,0 +1,116 @@
+from typing import Dict, Optional, Tuple
+import httpx
+from app.config import settings
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional h2 package (pip install 'httpx[http2]')"""
+    try:
+        import h2
+        return True
+    except ImportError:
+        return False
+
+
+class TransportManager:
+    """
+    Pooled httpx clients, one per upstream ("supabase", "openai", ...) and
+    shared by everything that talks to it, so connections, TLS sessions
+    and HTTP/2 streams are reused across requests instead of being set up
+    per client. supabase-py needs a sync client and the rest async ones,
+    so an upstream can have one of each. Sync clients can also be split by
+    identity (supabase-py sets its API key headers on the client) while
+    sharing the upstream's connection pool.
+    """
+
+    def __init__(self):
+        self._async_clients: Dict[str, httpx.AsyncClient] = {}
+        self._sync_transports: Dict[str, httpx.HTTPTransport] = {}
+        self._sync_clients: Dict[Tuple[str, Optional[str]], httpx.Client] = {}
+
+    @staticmethod
+    def _options(max_connections: Optional[int], timeout: Optional[float]) -> dict:
+        max_connections = max_connections or settings.HTTP_MAX_CONNECTIONS
+        http2 = settings.HTTP2_ENABLED and _http2_available()
+        if settings.HTTP2_ENABLED and not http2:
+            print("HTTP/2 disabled: install httpx[http2] to enable it")
+        return {
+            "limits": httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=min(max_connections, settings.HTTP_MAX_KEEPALIVE_CONNECTIONS),
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS
+            ),
+            "timeout": timeout or settings.HTTP_TIMEOUT_SECONDS,
+            "http2": http2
+        }
+
+    def async_client(
+        self,
+        upstream: str,
+        max_connections: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> httpx.AsyncClient:
+        """The upstream's async client; the options only apply when it is first created"""
+        client = self._async_clients.get(upstream)
+        if client is None:
+            client = self._async_clients[upstream] = httpx.AsyncClient(**self._options(max_connections, timeout))
+        return client
+
+    def sync_client(
+        self,
+        upstream: str,
+        max_connections: Optional[int] = None,
+        timeout: Optional[float] = None,
+        identity: Optional[str] = None
+    ) -> httpx.Client:
+        """
+        The upstream's sync client (for libraries that block); options as
+        for async_client. Each identity ("anon", "service", ...) gets its own
+        client, so headers one sets never leak into another's requests, but
+        all of an upstream's clients share one pooled transport.
+        """
+        client = self._sync_clients.get((upstream, identity))
+        if client is None:
+            options = self._options(max_connections, timeout)
+            transport = self._sync_transports.get(upstream)
+            if transport is None:
+                transport = self._sync_transports[upstream] = httpx.HTTPTransport(
+                    limits=options["limits"],
+                    http2=options["http2"]
+                )
+            client = self._sync_clients[(upstream, identity)] = httpx.Client(
+                transport=transport,
+                timeout=options["timeout"]
+            )
+        return client
+
+    @staticmethod
+    def _connections(transport) -> int:
+        pool = getattr(transport, "_pool", None)
+        return len(getattr(pool, "connections", ()))
+
+    def stats(self) -> dict:
+        """Open connections per upstream pool"""
+        stats = {}
+        for upstream, client in self._async_clients.items():
+            stats[f"{upstream}:async"] = {"connections": self._connections(client._transport)}
+        for upstream, transport in self._sync_transports.items():
+            stats[f"{upstream}:sync"] = {"connections": self._connections(transport)}
+        return stats
+
+    async def aclose(self):
+        """Close every pool; clients are created afresh if used again"""
+        async_clients, self._async_clients = self._async_clients, {}
+        sync_clients, self._sync_clients = self._sync_clients, {}
+        sync_transports, self._sync_transports = self._sync_transports, {}
+        for client in async_clients.values():
+            await client.aclose()
+        # Closing a client closes its (shared) transport; closing it again is a no-op
+        for client in sync_clients.values():
+            client.close()
+        for transport in sync_transports.values():
+            transport.close()
+
+
+# Singleton instance
+transports = TransportManager()
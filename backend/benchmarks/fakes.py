@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for Supabase (PostgREST, GoTrue, Storage) and the OpenAI
+chat completions API, so the app can be load-tested without network access.
+
+Only the requests the API actually makes are implemented, against in-memory
+tables. Latency is configurable per service to approximate the real ones.
+
+    python -m benchmarks.fakes --port 54321 --llm-latency-ms 800 --llm-tokens 600
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+PERSONA_DEFAULTS = {
+    "avatar_url": None,
+    "location": None,
+    "experience_level": None,
+    "skills": [],
+    "salary_min": None,
+    "salary_max": None,
+    "cv_file_url": None,
+    "cv_file_name": None,
+    "cv_storage_path": None,
+    "market_demand": "medium",
+    "global_matches": 0,
+    "confidence_score": 0.0,
+    "is_active": False,
+    "roles": [],
+    "work_history": [],
+    "areas_of_improvement": []
+}
+
+
+class Tables:
+    """In-memory rows per table"""
+
+    def __init__(self):
+        self.rows: Dict[str, List[dict]] = {"personas": [], "jobs": [], "applications": []}
+        self.users: Dict[str, dict] = {}
+        self.objects: Dict[str, int] = {}
+
+    def add_user(self, user_id: str, email: str) -> dict:
+        user = self.users[user_id] = {
+            "id": user_id,
+            "aud": "authenticated",
+            "role": "authenticated",
+            "email": email,
+            "app_metadata": {"provider": "email"},
+            "user_metadata": {},
+            "created_at": _now()
+        }
+        return user
+
+    def insert_personas(self, user_id: str, personas: List[dict]) -> List[dict]:
+        """create_personas RPC: the first persona is active if the user has none"""
+        has_active = any(p["user_id"] == user_id and p["is_active"] for p in self.rows["personas"])
+        created = []
+        for i, data in enumerate(personas):
+            now = _now()
+            row = {
+                **PERSONA_DEFAULTS,
+                "id": str(uuid.uuid4()),
+                **data,
+                "user_id": user_id,
+                "is_active": not has_active and i == 0,
+                "created_at": now,
+                "updated_at": now
+            }
+            self.rows["personas"].append(row)
+            created.append(row)
+        return created
+
+
+def _parse_filters(params) -> list:
+    """PostgREST column=op.value filters (eq, neq, gt, gte, lt, lte, in, is)"""
+    filters = []
+    for column, expression in params.multi_items():
+        if column in ("select", "order", "limit", "offset", "on_conflict", "columns"):
+            continue
+        if column in ("or", "and"):
+            raise HTTPException(status_code=400, detail=f"Filter '{column}' is not supported by the fake")
+        op, _, value = expression.partition(".")
+        filters.append((column, op, value))
+    return filters
+
+
+def _matches(row: dict, filters: list) -> bool:
+    for column, op, value in filters:
+        actual = row.get(column)
+        actual_text = "" if actual is None else str(actual).lower() if isinstance(actual, bool) else str(actual)
+        if op == "eq" and actual_text != value:
+            return False
+        if op == "neq" and actual_text == value:
+            return False
+        if op == "in" and actual_text not in value.strip("()").split(","):
+            return False
+        if op == "is" and not (value == "null" and actual is None or actual_text == value):
+            return False
+        if op in ("gt", "gte", "lt", "lte"):
+            if actual is None:
+                return False
+            value = value.strip('"')
+            if op == "gt" and not actual_text > value:
+                return False
+            if op == "gte" and not actual_text >= value:
+                return False
+            if op == "lt" and not actual_text < value:
+                return False
+            if op == "lte" and not actual_text <= value:
+                return False
+    return True
+
+
+def _project(rows: List[dict], select: str) -> List[dict]:
+    if not select or select == "*":
+        return [dict(row) for row in rows]
+    columns = [column.strip() for column in select.split(",")]
+    return [{column: row.get(column) for column in columns} for row in rows]
+
+
+def _order(rows: List[dict], order: str) -> List[dict]:
+    for clause in reversed(order.split(",")):
+        column, _, direction = clause.partition(".")
+        rows = sorted(rows, key=lambda row: (row.get(column) is None, str(row.get(column))), reverse=direction.startswith("desc"))
+    return rows
+
+
+def create_app(db_latency: float = 0.002, storage_latency: float = 0.02, auth_latency: float = 0.01,
+               llm_latency: float = 0.8, llm_tokens: int = 600) -> FastAPI:
+    app = FastAPI(title="Supabase/OpenAI fakes")
+    tables = Tables()
+    app.state.tables = tables
+    stats = {"db": 0, "storage": 0, "auth": 0, "llm": 0}
+
+    # --- PostgREST ---------------------------------------------------------
+
+    @app.get("/rest/v1/{table}")
+    async def select_rows(table: str, request: Request):
+        await asyncio.sleep(db_latency)
+        stats["db"] += 1
+        params = request.query_params
+        rows = [row for row in tables.rows.get(table, []) if _matches(row, _parse_filters(params))]
+        if "order" in params:
+            rows = _order(rows, params["order"])
+        offset = int(params.get("offset", 0))
+        if "limit" in params:
+            rows = rows[offset:offset + int(params["limit"])]
+        return _project(rows, params.get("select", "*"))
+
+    @app.patch("/rest/v1/{table}")
+    async def update_rows(table: str, request: Request):
+        await asyncio.sleep(db_latency)
+        stats["db"] += 1
+        changes = await request.json()
+        filters = _parse_filters(request.query_params)
+        updated = []
+        for row in tables.rows.get(table, []):
+            if _matches(row, filters):
+                row.update(changes, updated_at=_now())
+                updated.append(dict(row))
+        return updated
+
+    @app.delete("/rest/v1/{table}")
+    async def delete_rows(table: str, request: Request):
+        await asyncio.sleep(db_latency)
+        stats["db"] += 1
+        filters = _parse_filters(request.query_params)
+        deleted = [row for row in tables.rows.get(table, []) if _matches(row, filters)]
+        tables.rows[table] = [row for row in tables.rows.get(table, []) if not _matches(row, filters)]
+        return deleted
+
+    @app.post("/rest/v1/rpc/{function}")
+    async def rpc(function: str, request: Request):
+        await asyncio.sleep(db_latency)
+        stats["db"] += 1
+        args = await request.json()
+        if function == "create_personas":
+            return tables.insert_personas(args["p_user_id"], args["p_personas"])
+        if function == "activate_persona":
+            target = None
+            for row in tables.rows["personas"]:
+                if row["user_id"] == args["p_user_id"]:
+                    row["is_active"] = row["id"] == args["p_persona_id"]
+                    if row["is_active"]:
+                        target = row
+            return [target] if target else []
+        if function == "delete_persona":
+            rows = tables.rows["personas"]
+            deleted = next((row for row in rows if row["id"] == args["p_persona_id"] and row["user_id"] == args["p_user_id"]), None)
+            if deleted is None:
+                return []
+            rows.remove(deleted)
+            path = deleted["cv_storage_path"]
+            unreferenced = path is not None and not any(
+                row["user_id"] == args["p_user_id"] and row["cv_storage_path"] == path for row in rows
+            )
+            return [{"persona": deleted, "cv_unreferenced": unreferenced}]
+        raise HTTPException(status_code=404, detail=f"Function {function} is not implemented by the fake")
+
+    # --- GoTrue ------------------------------------------------------------
+
+    @app.get("/auth/v1/user")
+    async def get_user(request: Request):
+        from jose import jwt
+
+        await asyncio.sleep(auth_latency)
+        stats["auth"] += 1
+        token = request.headers.get("authorization", "").removeprefix("Bearer ").strip()
+        try:
+            user_id = jwt.get_unverified_claims(token)["sub"]
+        except Exception:
+            return JSONResponse({"msg": "invalid JWT"}, status_code=401)
+        user = tables.users.get(user_id)
+        if user is None:
+            return JSONResponse({"msg": "User not found"}, status_code=404)
+        return user
+
+    # --- Storage -----------------------------------------------------------
+
+    @app.post("/storage/v1/object/{bucket}/{path:path}")
+    @app.put("/storage/v1/object/{bucket}/{path:path}")
+    async def upload_object(bucket: str, path: str, request: Request):
+        body = await request.body()
+        await asyncio.sleep(storage_latency)
+        stats["storage"] += 1
+        tables.objects[f"{bucket}/{path}"] = len(body)
+        return {"Key": f"{bucket}/{path}", "Id": str(uuid.uuid4())}
+
+    @app.head("/storage/v1/object/{bucket}/{path:path}")
+    async def object_exists(bucket: str, path: str):
+        await asyncio.sleep(storage_latency)
+        stats["storage"] += 1
+        if f"{bucket}/{path}" not in tables.objects:
+            return Response(status_code=404)
+        return Response(headers={"content-length": str(tables.objects[f"{bucket}/{path}"])})
+
+    @app.delete("/storage/v1/object/{bucket}")
+    async def remove_objects(bucket: str, request: Request):
+        await asyncio.sleep(storage_latency)
+        stats["storage"] += 1
+        prefixes = (await request.json()).get("prefixes", [])
+        for prefix in prefixes:
+            tables.objects.pop(f"{bucket}/{prefix}", None)
+        return [{"name": prefix} for prefix in prefixes]
+
+    # --- OpenAI ------------------------------------------------------------
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        await asyncio.sleep(llm_latency)
+        stats["llm"] += 1
+
+        # Pad the summary so the completion is roughly llm_tokens long (~4 chars per token)
+        padding = " ".join(["experienced"] * max(0, llm_tokens - 120))
+        content = json.dumps({
+            "name": "Bench Candidate",
+            "title": "Software Engineer",
+            "email": None,
+            "phone": None,
+            "experience": "5+ years",
+            "experience_level": "Senior",
+            "education": "BSc Computer Science",
+            "skills": ["Python", "FastAPI", "PostgreSQL", "AWS"],
+            "roles": ["Backend Engineer", "Software Engineer"],
+            "job_search_location": "Remote",
+            "location": "London, UK",
+            "summary": f"Engineer. {padding}".strip(),
+            "work_history": [],
+            "salary_min": 70000,
+            "salary_max": 90000,
+            "gender": None,
+            "areas_of_improvement": []
+        })
+        prompt_tokens = sum(len(message.get("content") or "") for message in body.get("messages", [])) // 4
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-3.5-turbo"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": llm_tokens,
+                "total_tokens": prompt_tokens + llm_tokens
+            }
+        }
+
+    # --- Benchmark control -------------------------------------------------
+
+    @app.post("/_bench/seed")
+    async def seed(request: Request):
+        """Create users with personas: {"users": [{"id", "email", "personas": n}]}"""
+        created = {}
+        for user in (await request.json())["users"]:
+            tables.add_user(user["id"], user["email"])
+            created[user["id"]] = [
+                row["id"]
+                for row in tables.insert_personas(user["id"], [
+                    {"name": f"Persona {i}", "title": "Software Engineer", "skills": ["Python", "SQL"]}
+                    for i in range(user.get("personas", 0))
+                ])
+            ]
+        return created
+
+    @app.get("/_bench/stats")
+    async def get_stats():
+        return {**stats, "personas": len(tables.rows["personas"]), "objects": len(tables.objects)}
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--db-latency-ms", type=float, default=2)
+    parser.add_argument("--storage-latency-ms", type=float, default=20)
+    parser.add_argument("--auth-latency-ms", type=float, default=10)
+    parser.add_argument("--llm-latency-ms", type=float, default=800)
+    parser.add_argument("--llm-tokens", type=int, default=600, help="Completion tokens per LLM response")
+    args = parser.parse_args()
+
+    app = create_app(
+        db_latency=args.db_latency_ms / 1000,
+        storage_latency=args.storage_latency_ms / 1000,
+        auth_latency=args.auth_latency_ms / 1000,
+        llm_latency=args.llm_latency_ms / 1000,
+        llm_tokens=args.llm_tokens
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
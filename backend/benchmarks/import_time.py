@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Measure how long `import app.main` takes (python -X importtime) and check
+that the heavy libraries loaded on first use stay out of it.
+
+    python -m benchmarks.import_time                    # compare with import_baseline.json
+    python -m benchmarks.import_time --save-baseline    # record a new baseline
+    python -m benchmarks.import_time --top 25           # show more packages
+
+Exits with status 1 if a deferred module is imported eagerly or the best
+(minimum) import time regressed by more than --tolerance; the minimum is
+the least sensitive to noise from other processes. Baselines are only
+comparable on the same machine.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+BASELINE_FILE = Path(__file__).resolve().parent / "import_baseline.json"
+
+TARGET = "app.main"
+
+# Must only be imported when first needed (see LLMClient.client and the
+# extraction workers), never as a side effect of importing the app
+DEFERRED_MODULES = ("openai", "PyPDF2", "docx", "tiktoken")
+
+# Importing app.main reads settings; the values only need to validate
+DUMMY_ENV = {
+    "SUPABASE_URL": "http://127.0.0.1:54321",
+    "SUPABASE_ANON_KEY": "import-time",
+    "SUPABASE_SERVICE_KEY": "import-time",
+    "JWT_SECRET_KEY": "import-time",
+    "OPENAI_API_KEY": "import-time"
+}
+
+PROBE = (
+    "import json, sys\n"
+    f"import {TARGET}\n"
+    f"print(json.dumps([name for name in {DEFERRED_MODULES!r} if name in sys.modules]))\n"
+)
+
+
+def _parse_importtime(stderr: str) -> Tuple[int, Dict[str, int]]:
+    """(cumulative microseconds for TARGET, self microseconds per top-level package)"""
+    total = 0
+    packages: Counter = Counter()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        packages[name.split(".")[0]] += int(self_us)
+        if name == TARGET:
+            total = int(cumulative_us)
+    return total, dict(packages)
+
+
+def measure_once() -> Tuple[int, Dict[str, int], List[str]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=BACKEND_DIR,
+        env={**os.environ, **DUMMY_ENV, "PYTHONPATH": str(BACKEND_DIR)},
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {TARGET} failed:\n{result.stderr[-2000:]}")
+    total, packages = _parse_importtime(result.stderr)
+    return total, packages, json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=7, help="Fresh interpreters to measure")
+    parser.add_argument("--top", type=int, default=15, help="Slowest top-level packages to list")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed fractional regression (default 0.2)")
+    args = parser.parse_args()
+
+    # The first run also warms the bytecode cache
+    measure_once()
+    runs = [measure_once() for _ in range(args.runs)]
+    totals = sorted(total for total, _, _ in runs)
+    median_ms = statistics.median(totals) / 1000
+    best_ms = totals[0] / 1000
+    _, packages, eager = runs[[total for total, _, _ in runs].index(totals[len(totals) // 2])]
+
+    print(f"import {TARGET}: min {best_ms:.1f}ms (median {median_ms:.1f}ms, max {totals[-1] / 1000:.1f}ms, {args.runs} runs)")
+    print(f"\n{'package':<30} {'self ms':>9}")
+    for name, self_us in Counter(packages).most_common(args.top):
+        print(f"{name:<30} {self_us / 1000:>9.1f}")
+
+    failures = []
+    if eager:
+        failures.append(f"imported eagerly: {', '.join(eager)}")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps({
+            "machine": {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()},
+            "min_ms": round(best_ms, 1),
+            "median_ms": round(median_ms, 1),
+            "packages_ms": {name: round(self_us / 1000, 1) for name, self_us in Counter(packages).most_common(args.top)}
+        }, indent=2) + "\n")
+        print(f"\nBaseline saved to {args.baseline}")
+    elif args.baseline.exists():
+        reference = json.loads(args.baseline.read_text())["min_ms"]
+        if best_ms > reference * (1 + args.tolerance):
+            failures.append(f"min {best_ms:.1f}ms vs baseline {reference:.1f}ms")
+    else:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to record one")
+
+    if failures:
+        print("\nFailed:")
+        for line in failures:
+            print(f"  {line}")
+        sys.exit(1)
+    if not args.save_baseline and args.baseline.exists():
+        print(f"\nWithin {args.tolerance:.0%} of the baseline; deferred modules not imported")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Load-test the API against local fakes and compare with a stored baseline.
+
+Starts benchmarks.fakes (Supabase + OpenAI stand-ins) and the app with
+uvicorn, seeds users and personas, then drives each endpoint at a fixed
+concurrency and reports p50/p95/p99 latency and requests/second.
+
+    python -m benchmarks.run                     # compare with baseline.json
+    python -m benchmarks.run --save-baseline     # record a new baseline
+    python -m benchmarks.run --env PERSONA_CACHE_TTL_SECONDS=0 --llm-latency-ms 1500
+
+Exits with status 1 if any endpoint's p95 or throughput regressed by more
+than --tolerance. Baselines are only comparable on the same machine.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import httpx
+from jose import jwt
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+BASELINE_FILE = Path(__file__).resolve().parent / "baseline.json"
+
+JWT_SECRET = "benchmark-jwt-secret"
+API = "/api"
+
+ENDPOINTS = ["list_personas", "get_persona", "upload_cv", "auth_me"]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _token(sub: str, role: str, email: Optional[str] = None, ttl: int = 3600) -> str:
+    claims = {"sub": sub, "role": role, "aud": "authenticated", "exp": int(time.time()) + ttl}
+    if email:
+        claims["email"] = email
+    return jwt.encode(claims, JWT_SECRET, algorithm="HS256")
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def _cv_text(n: int) -> bytes:
+    """A plausible CV, unique per request so the parse cache always misses"""
+    return (
+        f"Bench Candidate {n}\nSenior Software Engineer\nbench{n}@example.com | +44 7700 900{n % 1000:03d}\n\n"
+        "Summary\nBackend engineer building Python APIs on AWS.\n\n"
+        "Experience\nAcme Ltd - Senior Engineer (2019 - Present)\n"
+        "- Built FastAPI services backed by PostgreSQL and Redis\n"
+        "- Moved deployments to Docker and Kubernetes\n"
+        "Globex - Software Engineer (2015 - 2019)\n- Django and React applications\n\n"
+        "Skills\nPython, FastAPI, Django, PostgreSQL, AWS, Docker, Kubernetes\n\n"
+        f"Education\nBSc Computer Science\n\nReference {uuid.uuid4()}\n"
+    ).encode("utf-8")
+
+
+class Server:
+    """A uvicorn subprocess, stopped on exit"""
+
+    def __init__(self, name: str, args: List[str], port: int, health_path: str, env: Dict[str, str]):
+        self.name = name
+        self.url = f"http://127.0.0.1:{port}"
+        self.health_path = health_path
+        self.process = subprocess.Popen(
+            [sys.executable, *args],
+            cwd=BACKEND_DIR,
+            env={**os.environ, **env},
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE
+        )
+
+    def wait_ready(self, timeout: float = 30.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"{self.name} exited:\n{self.process.stderr.read().decode(errors='replace')}")
+            try:
+                if httpx.get(self.url + self.health_path, timeout=1.0).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError(f"{self.name} did not become ready within {timeout:.0f}s")
+
+    def stop(self):
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    make_request: Callable[[int], tuple],
+    requests: int,
+    concurrency: int
+) -> dict:
+    """
+    Send requests with a fixed number of workers, each issuing its next
+    request as soon as the previous one completes (closed loop).
+    """
+    latencies = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for n in counter:
+            method, url, kwargs = make_request(n)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "concurrency": concurrency,
+        "rps": round(requests / elapsed, 2),
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 2)
+    }
+
+
+async def run_suite(app_url: str, fakes_url: str, args) -> Dict[str, dict]:
+    user_ids = [str(uuid.uuid4()) for _ in range(args.users)]
+    async with httpx.AsyncClient(base_url=fakes_url) as fakes:
+        response = await fakes.post("/_bench/seed", json={"users": [
+            {"id": user_id, "email": f"user{i}@example.com", "personas": args.personas_per_user}
+            for i, user_id in enumerate(user_ids)
+        ]})
+        response.raise_for_status()
+        persona_ids = response.json()
+
+    tokens = [_token(user_id, "authenticated", f"user{i}@example.com") for i, user_id in enumerate(user_ids)]
+
+    def auth(n: int) -> dict:
+        return {"Authorization": f"Bearer {tokens[n % len(tokens)]}"}
+
+    def persona_of(n: int) -> str:
+        ids = persona_ids[user_ids[n % len(user_ids)]]
+        return ids[n % len(ids)]
+
+    scenarios = {
+        "list_personas": (lambda n: ("GET", f"{API}/personas", {"headers": auth(n)}), args.requests),
+        "get_persona": (lambda n: ("GET", f"{API}/personas/{persona_of(n)}", {"headers": auth(n)}), args.requests),
+        "upload_cv": (
+            lambda n: ("POST", f"{API}/personas/upload-cv", {
+                "headers": auth(n),
+                "files": {"file": (f"cv-{n}.txt", _cv_text(n), "text/plain")}
+            }),
+            args.upload_requests
+        ),
+        "auth_me": (lambda n: ("GET", f"{API}/auth/me", {"headers": auth(n)}), args.requests)
+    }
+
+    results = {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=app_url, limits=limits, timeout=120.0) as client:
+        for name in args.endpoints:
+            make_request, requests = scenarios[name]
+            # Warm connections, caches and lazily created clients outside the measurement
+            await drive(client, make_request, min(args.concurrency, requests), args.concurrency)
+            results[name] = await drive(client, make_request, requests, args.concurrency)
+            print(_format_row(name, results[name]))
+    return results
+
+
+def _format_row(name: str, result: dict) -> str:
+    return (
+        f"{name:<15} {result['requests']:>6} {result['errors']:>6} {result['rps']:>9.1f} "
+        f"{result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} {result['p99_ms']:>9.1f}"
+    )
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """Regressions against the baseline: p95 latency up or throughput down by more than tolerance"""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        if result["errors"] > reference.get("errors", 0):
+            regressions.append(f"{name}: {result['errors']} errors (baseline {reference.get('errors', 0)})")
+        if result["p95_ms"] > reference["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {result['p95_ms']:.1f}ms vs {reference['p95_ms']:.1f}ms")
+        if result["rps"] < reference["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: {result['rps']:.1f} req/s vs {reference['rps']:.1f} req/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=ENDPOINTS)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per read endpoint")
+    parser.add_argument("--upload-requests", type=int, default=100, help="Requests to upload-cv")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--personas-per-user", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the app")
+    parser.add_argument("--db-latency-ms", type=float, default=2)
+    parser.add_argument("--storage-latency-ms", type=float, default=20)
+    parser.add_argument("--auth-latency-ms", type=float, default=10)
+    parser.add_argument("--llm-latency-ms", type=float, default=800)
+    parser.add_argument("--llm-tokens", type=int, default=600)
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="Extra app setting (repeatable)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed fractional regression (default 0.2)")
+    args = parser.parse_args()
+
+    fakes_port, app_port = _free_port(), _free_port()
+    fakes_url = f"http://127.0.0.1:{fakes_port}"
+
+    # HS256 tokens shaped like Supabase's anon/service keys (the client checks the format)
+    app_env = {
+        "SUPABASE_URL": fakes_url,
+        "SUPABASE_ANON_KEY": _token("anon", "anon", ttl=86400),
+        "SUPABASE_SERVICE_KEY": _token("service", "service_role", ttl=86400),
+        "JWT_SECRET_KEY": JWT_SECRET,
+        "AUTH_VERIFY_MODE": "local",
+        "OPENAI_API_KEY": "sk-benchmark",
+        "OPENAI_BASE_URL": f"{fakes_url}/v1",
+        "CV_PARSE_CACHE_BACKEND": "memory",
+        "PERSONA_CACHE_BACKEND": "memory",
+        "DEBUG": "false"
+    }
+    for item in args.env:
+        key, _, value = item.partition("=")
+        app_env[key] = value
+
+    fakes = Server("fakes", [
+        "-m", "benchmarks.fakes", "--port", str(fakes_port),
+        "--db-latency-ms", str(args.db_latency_ms),
+        "--storage-latency-ms", str(args.storage_latency_ms),
+        "--auth-latency-ms", str(args.auth_latency_ms),
+        "--llm-latency-ms", str(args.llm_latency_ms),
+        "--llm-tokens", str(args.llm_tokens)
+    ], fakes_port, "/_bench/stats", {})
+    app = None
+    try:
+        fakes.wait_ready()
+        app = Server("app", [
+            "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(app_port),
+            "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"
+        ], app_port, "/health", app_env)
+        app.wait_ready()
+
+        print(f"{'endpoint':<15} {'reqs':>6} {'errors':>6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        results = asyncio.run(run_suite(app.url, fakes_url, args))
+    finally:
+        if app is not None:
+            app.stop()
+        fakes.stop()
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps({
+            "machine": {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()},
+            "options": {
+                key: getattr(args, key)
+                for key in ("concurrency", "requests", "upload_requests", "workers", "db_latency_ms",
+                            "storage_latency_ms", "auth_latency_ms", "llm_latency_ms", "llm_tokens")
+            },
+            "results": results
+        }, indent=2) + "\n")
+        print(f"\nBaseline saved to {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to record one")
+        return
+
+    baseline = json.loads(args.baseline.read_text())
+    changed = [key for key, value in baseline.get("options", {}).items() if getattr(args, key, value) != value]
+    if changed:
+        print(f"\nWarning: options differ from the baseline ({', '.join(changed)}); results may not be comparable")
+    regressions = compare(results, baseline["results"], args.tolerance)
+    if regressions:
+        print(f"\nRegressions beyond {args.tolerance:.0%} of the baseline:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"\nNo regressions beyond {args.tolerance:.0%} of the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+-- CV parse result cache
+-- Shared backend for CVParseCache (CV_PARSE_CACHE_BACKEND=postgres)
+-- Keys are content-addressed: "{file|text}:{prompt_version}:{sha256}"
+
+CREATE TABLE IF NOT EXISTS cv_parse_cache (
+    key TEXT PRIMARY KEY,
+    result JSONB NOT NULL,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Used to purge expired entries, e.g. from a scheduled job:
+-- DELETE FROM cv_parse_cache WHERE expires_at < NOW();
+CREATE INDEX IF NOT EXISTS idx_cv_parse_cache_expires_at ON cv_parse_cache(expires_at);
+
+-- Only the service role reads/writes this table
+ALTER TABLE cv_parse_cache ENABLE ROW LEVEL SECURITY;
+
+COMMENT ON TABLE cv_parse_cache IS 'Cached OpenAI CV parse results keyed by file/text hash and prompt version';
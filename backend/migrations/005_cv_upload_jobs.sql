@@ -0,0 +1,48 @@
+-- Background CV upload jobs
+-- Durable queue for POST /personas/upload-cv/async (CV_JOB_BACKEND=postgres)
+
+CREATE TABLE IF NOT EXISTS cv_upload_jobs (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued', -- 'queued', 'extracting', 'parsing', 'saving', 'done', 'failed'
+    file_name VARCHAR(255),
+    content_type VARCHAR(255),
+    staging_path TEXT, -- Raw upload in the cv-uploads bucket until a worker finishes
+    persona_id UUID REFERENCES personas(id) ON DELETE SET NULL,
+    error TEXT,
+    attempts INTEGER DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_cv_upload_jobs_user_id ON cv_upload_jobs(user_id);
+CREATE INDEX IF NOT EXISTS idx_cv_upload_jobs_pending ON cv_upload_jobs(created_at)
+    WHERE status NOT IN ('done', 'failed');
+
+ALTER TABLE cv_upload_jobs ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view own upload jobs"
+    ON cv_upload_jobs FOR SELECT
+    USING (auth.uid() = user_id);
+
+CREATE TRIGGER update_cv_upload_jobs_updated_at BEFORE UPDATE ON cv_upload_jobs
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- Atomically claim the oldest queued job (or one whose worker went quiet)
+CREATE OR REPLACE FUNCTION claim_cv_upload_job(stale_after_seconds INTEGER DEFAULT 600)
+RETURNS SETOF cv_upload_jobs AS $$
+    UPDATE cv_upload_jobs
+    SET status = 'extracting', attempts = attempts + 1
+    WHERE id = (
+        SELECT id FROM cv_upload_jobs
+        WHERE status = 'queued'
+           OR (status IN ('extracting', 'parsing', 'saving')
+               AND updated_at < NOW() - make_interval(secs => stale_after_seconds))
+        ORDER BY created_at
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+    RETURNING *;
+$$ LANGUAGE sql;
+
+COMMENT ON TABLE cv_upload_jobs IS 'Background CV upload jobs and their pipeline stage';
@@ -0,0 +1,5 @@
+-- Keyset pagination for GET /personas
+-- Serves "WHERE user_id = ? AND (created_at, id) > (?, ?) ORDER BY created_at, id LIMIT ?"
+-- straight from the index, without sorting the user's personas
+
+CREATE INDEX IF NOT EXISTS idx_personas_user_created_id ON personas(user_id, created_at, id);
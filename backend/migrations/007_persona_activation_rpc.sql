@@ -0,0 +1,72 @@
+-- Atomic persona activation and first-persona detection
+-- Each function is a single RPC round trip running in one transaction
+
+-- Keep only the most recently updated active persona per user before
+-- enforcing "at most one active persona"
+UPDATE personas p
+SET is_active = false
+WHERE p.is_active
+  AND EXISTS (
+      SELECT 1 FROM personas other
+      WHERE other.user_id = p.user_id
+        AND other.is_active
+        AND (other.updated_at, other.id) > (p.updated_at, p.id)
+  );
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_personas_one_active_per_user ON personas(user_id)
+    WHERE is_active;
+
+-- Make the selected persona the user's only active one. Returns no row
+-- (and changes nothing) if the persona doesn't belong to the user.
+CREATE OR REPLACE FUNCTION activate_persona(p_persona_id UUID, p_user_id UUID)
+RETURNS SETOF personas AS $$
+BEGIN
+    -- Serialize writes to this user's active flag
+    PERFORM pg_advisory_xact_lock(hashtext('personas:' || p_user_id::text));
+
+    IF NOT EXISTS (SELECT 1 FROM personas WHERE id = p_persona_id AND user_id = p_user_id) THEN
+        RETURN;
+    END IF;
+
+    -- The unique index is checked row by row, so deactivate first
+    UPDATE personas
+    SET is_active = false
+    WHERE user_id = p_user_id AND is_active AND id <> p_persona_id;
+
+    RETURN QUERY
+    UPDATE personas
+    SET is_active = true
+    WHERE id = p_persona_id AND user_id = p_user_id
+    RETURNING *;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Insert one or more personas (a JSON array of rows) for a user. The first
+-- row becomes active if the user had no personas yet; any is_active or
+-- user_id keys in the rows are ignored. Omitted columns keep their defaults.
+CREATE OR REPLACE FUNCTION create_personas(p_user_id UUID, p_personas JSONB)
+RETURNS SETOF personas AS $$
+DECLARE
+    v_columns TEXT;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('personas:' || p_user_id::text));
+
+    SELECT string_agg(quote_ident(a.attname), ', ')
+    INTO v_columns
+    FROM pg_attribute a
+    WHERE a.attrelid = 'personas'::regclass
+      AND a.attnum > 0
+      AND NOT a.attisdropped
+      AND a.attname NOT IN ('user_id', 'is_active')
+      AND p_personas->0 ? a.attname;
+
+    RETURN QUERY EXECUTE format(
+        'INSERT INTO personas (user_id, is_active%1$s)
+         SELECT $2, r.ordinality = 1 AND NOT EXISTS (SELECT 1 FROM personas WHERE user_id = $2)%1$s
+         FROM jsonb_populate_recordset(NULL::personas, $1) WITH ORDINALITY AS r
+         ORDER BY r.ordinality
+         RETURNING *',
+        COALESCE(', ' || v_columns, '')
+    ) USING p_personas, p_user_id;
+END;
+$$ LANGUAGE plpgsql;
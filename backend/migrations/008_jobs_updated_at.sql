@@ -0,0 +1,20 @@
+-- Incremental job index sync
+-- The matcher applies jobs changed since its last sync, read in
+-- (updated_at, id) order
+
+-- No default yet: existing rows stay NULL so the backfill below can give
+-- them their creation time rather than all the same migration time
+ALTER TABLE jobs
+ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE;
+
+-- Dropped first so the backfill doesn't fire it (and so this can be re-run)
+DROP TRIGGER IF EXISTS update_jobs_updated_at ON jobs;
+
+UPDATE jobs SET updated_at = created_at WHERE updated_at IS NULL;
+
+ALTER TABLE jobs ALTER COLUMN updated_at SET DEFAULT NOW();
+
+CREATE TRIGGER update_jobs_updated_at BEFORE UPDATE ON jobs
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+CREATE INDEX IF NOT EXISTS idx_jobs_updated_id ON jobs(updated_at, id);
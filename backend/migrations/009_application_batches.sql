@@ -0,0 +1,34 @@
+-- Batched applications
+-- A persona applies to a job at most once, so re-submitting a batch
+-- skips jobs that already have an application
+
+DELETE FROM applications a
+WHERE EXISTS (
+    SELECT 1 FROM applications other
+    WHERE other.persona_id = a.persona_id
+      AND other.job_id = a.job_id
+      AND (other.created_at, other.id) < (a.created_at, a.id)
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_applications_persona_job ON applications(persona_id, job_id);
+
+-- Apply several application updates (a JSON array of {id, status,
+-- ai_cover_letter, applied_at, notes}) in one statement. Rows deleted in the
+-- meantime are skipped rather than recreated.
+CREATE OR REPLACE FUNCTION update_applications(p_updates JSONB)
+RETURNS SETOF applications AS $$
+    UPDATE applications a
+    SET status = u.status,
+        ai_cover_letter = COALESCE(u.ai_cover_letter, a.ai_cover_letter),
+        applied_at = COALESCE(u.applied_at, a.applied_at),
+        notes = COALESCE(u.notes, a.notes)
+    FROM jsonb_to_recordset(p_updates) AS u(
+        id UUID,
+        status VARCHAR(50),
+        ai_cover_letter TEXT,
+        applied_at TIMESTAMP WITH TIME ZONE,
+        notes TEXT
+    )
+    WHERE a.id = u.id
+    RETURNING a.*;
+$$ LANGUAGE sql;
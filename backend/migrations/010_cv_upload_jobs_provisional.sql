@@ -0,0 +1,7 @@
+-- Provisional parse results
+-- Rule-based fields (email, phone, skills, ...) are stored on the job as
+-- soon as the CV text is extracted, so pollers see them before the LLM
+-- parse finishes
+
+ALTER TABLE cv_upload_jobs
+ADD COLUMN IF NOT EXISTS provisional JSONB;
@@ -0,0 +1,50 @@
+-- Content-addressed CV storage
+-- CVs are stored once per user and content hash at
+-- {user_id}/blobs/{sha256}.{ext}; personas record the object they use in
+-- cv_storage_path, and an object is removed when its last persona goes
+
+ALTER TABLE personas
+ADD COLUMN IF NOT EXISTS cv_storage_path TEXT;
+
+-- Existing personas point at their own per-persona object
+UPDATE personas
+SET cv_storage_path = substring(cv_file_url FROM '/cv-uploads/(.+)$')
+WHERE cv_storage_path IS NULL
+  AND cv_file_url IS NOT NULL;
+
+-- Reference lookups on delete
+CREATE INDEX IF NOT EXISTS idx_personas_cv_storage_path ON personas(user_id, cv_storage_path)
+    WHERE cv_storage_path IS NOT NULL;
+
+-- Delete a persona and report whether its CV object is still referenced.
+-- Takes the same per-user lock as create_personas, so a persona created
+-- with the same object is either counted here or inserted after the
+-- delete has committed. The object itself is removed by the API after
+-- this commits, outside the lock, so that alone doesn't keep a newly
+-- inserted persona's file: the API re-checks references just before
+-- removing, and uploads re-check the object after inserting (re-uploading
+-- it if it is gone). Returns no row if the persona doesn't exist.
+CREATE OR REPLACE FUNCTION delete_persona(p_persona_id UUID, p_user_id UUID)
+RETURNS TABLE (persona JSONB, cv_unreferenced BOOLEAN) AS $$
+DECLARE
+    v_deleted personas;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('personas:' || p_user_id::text));
+
+    DELETE FROM personas
+    WHERE id = p_persona_id AND user_id = p_user_id
+    RETURNING * INTO v_deleted;
+
+    IF NOT FOUND THEN
+        RETURN;
+    END IF;
+
+    RETURN QUERY SELECT
+        to_jsonb(v_deleted),
+        v_deleted.cv_storage_path IS NOT NULL AND NOT EXISTS (
+            SELECT 1 FROM personas
+            WHERE user_id = p_user_id
+              AND cv_storage_path = v_deleted.cv_storage_path
+        );
+END;
+$$ LANGUAGE plpgsql;
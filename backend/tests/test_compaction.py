@@ -0,0 +1,41 @@
+from app.services.compaction import PAGE_BREAK, compact_cv_text, strip_page_furniture
+
+
+def test_year_only_lines_in_the_body_are_kept():
+    text = "\n".join([
+        "Jane Doe",
+        "Software Engineer",
+        "Experience",
+        "Acme Ltd - Senior Engineer",
+        "2019",
+        "2021",
+        "Globex - Engineer",
+        "2015",
+        "2019",
+        "Built internal tools"
+    ])
+
+    compact, _ = compact_cv_text(text, max_tokens=1000)
+
+    assert [line for line in compact.split("\n") if line.isdigit()] == ["2019", "2021", "2015", "2019"]
+
+
+def test_page_numbers_are_dropped_only_at_page_edges():
+    pages = [
+        "Jane Doe\nExperience\nAcme Ltd\n2019\n2021\nBuilt services\nPage 1 of 2",
+        "Globex\n2015\n2019\nBuilt tools\nMentored engineers\nLed hiring\n2"
+    ]
+
+    lines = strip_page_furniture(PAGE_BREAK.join(pages)).split("\n")
+
+    assert "Page 1 of 2" not in lines
+    assert "2" not in lines
+    assert [line for line in lines if line.isdigit()] == ["2019", "2021", "2015", "2019"]
+
+
+def test_year_at_a_page_edge_is_not_a_page_number():
+    pages = ["Jane Doe\nExperience\nAcme Ltd\n2019", "2021\nGlobex\nBuilt tools"]
+
+    lines = strip_page_furniture(PAGE_BREAK.join(pages)).split("\n")
+
+    assert "2019" in lines and "2021" in lines
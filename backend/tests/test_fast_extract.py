@@ -0,0 +1,22 @@
+from app.services.fast_extract import extract_fast_fields, find_phone_match, merge_parsed, public_fields
+
+
+def test_date_ranges_are_not_phone_numbers():
+    assert find_phone_match("Acme Ltd 01.2019 - 12.2021 Senior Engineer") == (None, False)
+    assert find_phone_match("Globex 2019 - 2021 (2 years)") == (None, False)
+
+
+def test_international_and_labelled_numbers_are_confident():
+    assert find_phone_match("+44 7700 900123") == ("+44 7700 900123", True)
+    assert find_phone_match("Acme (2015 - 2019)\nTel: 020 7946 0958") == ("020 7946 0958", True)
+
+
+def test_unlabelled_national_numbers_do_not_override_the_model():
+    provisional = extract_fast_fields("Jane Doe\nEngineer\njane@example.com\n07700 900123")
+
+    assert provisional["phone"] == "07700 900123"
+    merged = merge_parsed(provisional, {"name": "Jane Doe", "phone": "+44 7700 900123", "email": "jane@example"})
+    assert merged["phone"] == "+44 7700 900123"
+    assert merged["email"] == "jane@example.com"
+    assert "confident" not in merged
+    assert "confident" not in public_fields(provisional)